@@ -1,4 +1,416 @@
 """
     MINE and CLINKER data.
     This script pulls in the mine and clinker data and pools it into a single dataframe for manipulation.
-"""
\ No newline at end of file
+
+    Every MSHA mine and GHGP cement facility is assigned a county FIPS code,
+    the pooled facilities become within-state county proxies, and the state
+    stock model (top-down/state_model.py) is disaggregated to all ~3,200
+    counties. Counties relate to states through a sparse state × county
+    membership matrix M, so
+        - aggregation:     state = M @ county
+        - disaggregation:  county = D @ state,  D = diag(share) @ M.T
+    are single sparse products over every year, flow and building type.
+    A bottom-up county allocation (national facility shares) is then raked
+    to the state model totals (top-down/raking.py).
+
+    Counties come from the Census Gazetteer county file (names, land area and
+    interior points):
+    https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.spatial import cKDTree
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+TOP_DOWN_DIR = REPO_DIR / 'top-down'
+sys.path.insert(0, str(TOP_DOWN_DIR))
+
+from acs_data import STATE_FIPS, STATE_NAMES  # noqa: E402
+from cement_data import load_facility_production  # noqa: E402
+from raking import rake_hierarchy  # noqa: E402
+from state_model import run_state_model  # noqa: E402
+
+COUNTY_GAZETTEER_FILE = REPO_DIR / 'data' / 'county_data' / '2020_Gaz_counties_national.txt'
+COUNTY_GAZETTEER_URL = ('https://www2.census.gov/geo/docs/maps-data/data/gazetteer/'
+                        '2020_Gazetteer/2020_Gaz_counties_national.zip')
+MINE_FILE = REPO_DIR / 'data' / 'mine_data' / 'cleaned_data' / 'all_mine_locations-12_8_2025.csv'
+OUTPUT_FILE = Path(__file__).resolve().parent / 'county_stock_results.parquet'
+FACILITY_OUTPUT_FILE = Path(__file__).resolve().parent / 'county_facilities.csv'
+
+# Weights of the within-state county proxies. Aggregates rarely travel far
+# from the pit, so mine counts track local construction best; the uniform
+# term keeps counties without any facility from getting zero stock.
+PROXY_WEIGHTS = {
+    'mines': 0.5,
+    'clinker': 0.2,
+    'uniform': 0.3,
+}
+
+FLOWS = ['stock', 'inflow', 'outflow', 'net_additions']
+
+
+# ============================================================================
+# COUNTIES AND FACILITIES
+# ============================================================================
+
+def _normalize_county(name: pd.Series) -> pd.Series:
+    """Upper-case county names with the 'COUNTY'/'PARISH'/... suffix removed."""
+    return (name.str.upper()
+            .str.replace(r'\s+(COUNTY|PARISH|BOROUGH|CENSUS AREA|MUNICIPIO|MUNICIPALITY)$',
+                         '', regex=True)
+            .str.replace(r'[^A-Z ]', '', regex=True)
+            .str.strip())
+
+
+def load_counties(gazetteer_file: Path = COUNTY_GAZETTEER_FILE) -> pd.DataFrame:
+    """
+    County reference table from the Census Gazetteer file.
+
+    Returns:
+        DataFrame sorted by county_fips with columns county_fips, state_fips,
+        state, county_name, land_sqmi, latitude, longitude
+    """
+    if not Path(gazetteer_file).exists():
+        raise FileNotFoundError(
+            f"County Gazetteer file not found: {gazetteer_file}\n"
+            f"Download {COUNTY_GAZETTEER_URL}\n"
+            f"and unzip 2020_Gaz_counties_national.txt to {gazetteer_file}")
+
+    df = pd.read_csv(gazetteer_file, sep='\t', dtype={'GEOID': str})
+    df.columns = df.columns.str.strip()
+    df = df[df['USPS'].isin(list(STATE_FIPS))]
+    counties = pd.DataFrame({
+        'county_fips': df['GEOID'].astype(int),
+        'state_fips': df['GEOID'].str[:2].astype(int),
+        'state': df['USPS'],
+        'county_name': df['NAME'],
+        'land_sqmi': df['ALAND_SQMI'],
+        'latitude': df['INTPTLAT'],
+        'longitude': df['INTPTLONG'],
+    })
+    return counties.sort_values('county_fips').reset_index(drop=True)
+
+
+def assign_counties(facilities: pd.DataFrame, counties: pd.DataFrame) -> np.ndarray:
+    """
+    County FIPS code for every facility.
+
+    Facilities with a county name are matched on (state, name); the rest
+    (and any unmatched names) go to the county with the nearest interior
+    point within their state.
+
+    Args:
+        facilities: DataFrame with state (postal code), latitude, longitude
+                    and optionally county_name
+        counties: Output of load_counties
+
+    Returns:
+        Array of county FIPS codes (-1 where no county could be assigned)
+    """
+    fips = np.full(len(facilities), -1, dtype=int)
+
+    if 'county_name' in facilities:
+        lookup = pd.Series(counties['county_fips'].values,
+                           index=pd.MultiIndex.from_arrays(
+                               [counties['state'], _normalize_county(counties['county_name'])]))
+        lookup = lookup[~lookup.index.duplicated()]
+        keys = pd.MultiIndex.from_arrays([facilities['state'],
+                                          _normalize_county(facilities['county_name'].fillna(''))])
+        fips = lookup.reindex(keys).fillna(-1).astype(int).to_numpy().copy()
+
+    # Nearest interior point, one KD-tree per state
+    missing = (fips < 0) & facilities['latitude'].notna().to_numpy()
+    for state in facilities.loc[missing, 'state'].unique():
+        in_state = counties[counties['state'] == state]
+        rows = np.flatnonzero(missing & (facilities['state'] == state).to_numpy())
+        if len(in_state) == 0:
+            continue
+        # Scale longitude so distances are roughly isotropic at that latitude
+        scale = np.cos(np.radians(in_state['latitude'].mean()))
+        tree = cKDTree(np.column_stack([in_state['latitude'], in_state['longitude'] * scale]))
+        points = facilities.iloc[rows]
+        _, nearest = tree.query(np.column_stack([points['latitude'], points['longitude'] * scale]))
+        fips[rows] = in_state['county_fips'].to_numpy()[nearest]
+
+    return fips
+
+
+def pool_facilities(counties: pd.DataFrame, mine_file: Path = MINE_FILE) -> pd.DataFrame:
+    """
+    Pool MSHA mines and GHGP cement facilities into one table with county FIPS.
+
+    Returns:
+        DataFrame with columns kind ('mine' or 'clinker'), facility_id, state,
+        state_fips, county_fips, latitude, longitude, production_t
+        (latest-year cement production; NaN for mines)
+    """
+    mines = pd.read_csv(mine_file)
+    # Mine states are full names
+    names = {name.upper(): code for code, name in STATE_NAMES.items()}
+
+    mines = pd.DataFrame({
+        'kind': 'mine',
+        'facility_id': mines['Mine ID'],
+        'state': mines['State'].str.upper().map(names),
+        'latitude': mines['Latitude'],
+        'longitude': mines['Longitude'],
+        'production_t': np.nan,
+    }).dropna(subset=['state'])
+
+    clinker = load_facility_production()
+    clinker = clinker[clinker['year'] == clinker['year'].max()]
+    clinker = pd.DataFrame({
+        'kind': 'clinker',
+        'facility_id': clinker['facility_id'],
+        'state': clinker['state'],
+        'county_name': clinker['county'],
+        'latitude': clinker['latitude'],
+        'longitude': clinker['longitude'],
+        'production_t': clinker['production_t'],
+    })
+
+    pooled = pd.concat([mines, clinker], ignore_index=True)
+    pooled['state_fips'] = pooled['state'].map(STATE_FIPS)
+    pooled['county_fips'] = assign_counties(pooled, counties)
+
+    unassigned = (pooled['county_fips'] < 0).sum()
+    if unassigned:
+        print(f"Warning: {unassigned} facilities could not be assigned to a county")
+    return pooled[['kind', 'facility_id', 'state', 'state_fips', 'county_fips',
+                   'latitude', 'longitude', 'production_t']]
+
+
+# ============================================================================
+# SPARSE MEMBERSHIP AND PROXIES
+# ============================================================================
+
+def membership_matrix(counties: pd.DataFrame, states: list) -> sparse.csr_matrix:
+    """
+    State × county membership matrix M with M[s, c] = 1 if county c is in state s.
+    """
+    state_index = {state: i for i, state in enumerate(states)}
+    rows = counties['state'].map(state_index).to_numpy()
+    keep = ~np.isnan(rows.astype(float))
+    cols = np.arange(len(counties))[keep]
+    return sparse.csr_matrix((np.ones(len(cols)), (rows[keep].astype(int), cols)),
+                             shape=(len(states), len(counties)))
+
+
+def within_state_shares(values: np.ndarray, membership: sparse.csr_matrix) -> np.ndarray:
+    """
+    Each county's share of its state's total; uniform in states whose total is zero.
+    """
+    state_totals = membership @ values
+    county_counts = np.asarray(membership.sum(axis=1)).ravel()
+    uniform = membership.T @ (1.0 / np.maximum(county_counts, 1))
+    totals = membership.T @ state_totals
+    return np.where(totals > 0, values / np.where(totals > 0, totals, 1.0), uniform)
+
+
+def _proxy_components(facilities: pd.DataFrame, counties: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """County totals [county] of each proxy in PROXY_WEIGHTS."""
+    position = pd.Series(np.arange(len(counties)), index=counties['county_fips'])
+    n = len(counties)
+
+    def county_totals(kind: str, values: np.ndarray) -> np.ndarray:
+        rows = facilities['kind'].eq(kind).to_numpy() & facilities['county_fips'].ge(0).to_numpy()
+        index = position.reindex(facilities.loc[rows, 'county_fips']).to_numpy()
+        return np.bincount(index, weights=values[rows], minlength=n)
+
+    return {
+        'mines': county_totals('mine', np.ones(len(facilities))),
+        'clinker': county_totals('clinker', facilities['production_t'].fillna(0).to_numpy()),
+        'uniform': np.ones(n),
+    }
+
+
+def county_proxy_shares(facilities: pd.DataFrame, counties: pd.DataFrame,
+                        membership: sparse.csr_matrix,
+                        weights: Dict[str, float] = PROXY_WEIGHTS) -> np.ndarray:
+    """
+    Blended within-state county shares [county]; sums to 1 within each state.
+    """
+    components = _proxy_components(facilities, counties)
+    shares = sum(weight * within_state_shares(components[name], membership)
+                 for name, weight in weights.items())
+    return shares / (membership.T @ (membership @ shares))
+
+
+def national_proxy_shares(facilities: pd.DataFrame, counties: pd.DataFrame,
+                          weights: Dict[str, float] = PROXY_WEIGHTS) -> np.ndarray:
+    """
+    Blended national county shares [county]; sums to 1 over all counties.
+
+    Unlike county_proxy_shares these know nothing about state totals, so
+    they are the seed that raking reconciles with the state controls.
+    """
+    components = _proxy_components(facilities, counties)
+    shares = sum(weight * components[name] / components[name].sum()
+                 for name, weight in weights.items() if components[name].sum() > 0)
+    return shares / shares.sum()
+
+
+# ============================================================================
+# COUNTY MODEL
+# ============================================================================
+
+def _load_national_inflows() -> Tuple[pd.DataFrame, Dict]:
+    """National concrete inflows and lifetimes from the top-down script."""
+    spec = importlib.util.spec_from_file_location('concrete_top_down',
+                                                  TOP_DOWN_DIR / 'concrete-top-down.py')
+    top_down = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(top_down)
+    inflows = top_down.calculate_concrete_inflows(top_down.load_usgs_cement_data(),
+                                                  top_down.load_construction_spending())
+    return inflows[inflows['year'] <= top_down.CURRENT_YEAR], top_down.LIFETIMES
+
+
+def run_county_model(inflows: pd.DataFrame, lifetimes: Dict, counties: pd.DataFrame,
+                     shares: np.ndarray, membership: sparse.csr_matrix) -> pd.DataFrame:
+    """
+    County stock-flow time series by sparse disaggregation of the state model.
+
+    County shares are constant over time, so disaggregating state flows is
+    identical to running the stock model on disaggregated inflows.
+
+    Returns:
+        Long table with columns county_fips, state_fips, year, building_type,
+        stock, inflow, outflow, net_additions
+    """
+    states = list(STATE_FIPS)
+    state_flows = run_state_model(inflows, lifetimes, states=states)
+    building_types = list(lifetimes.keys())
+    years = np.sort(state_flows['year'].unique())
+
+    # [state × (type, year)] per flow; rows follow `states`
+    wide = (state_flows.set_index(['state', 'building_type', 'year'])[FLOWS]
+            .reindex(pd.MultiIndex.from_product([states, building_types, years])))
+    values = wide.to_numpy().reshape(len(states), len(building_types) * len(years), len(FLOWS))
+
+    disaggregation = sparse.diags(shares) @ membership.T.tocsr()   # [county × state]
+    county_values = disaggregation @ values.reshape(len(states), -1)
+    county_values = county_values.reshape(len(counties), len(building_types), len(years), len(FLOWS))
+
+    # Aggregation back to states must reproduce the state model
+    check = (membership @ county_values.reshape(len(counties), -1)).reshape(values.shape)
+    has_counties = np.asarray(membership.sum(axis=1)).ravel() > 0
+    if not np.allclose(check[has_counties], values[has_counties]):
+        raise AssertionError("County flows don't aggregate back to the state model")
+
+    n_counties = len(counties)
+    per_county = len(building_types) * len(years)
+    df = pd.DataFrame({
+        'county_fips': np.repeat(counties['county_fips'].to_numpy(), per_county),
+        'state_fips': np.repeat(counties['state_fips'].to_numpy(), per_county),
+        'year': np.tile(years, n_counties * len(building_types)).astype('int16'),
+        'building_type': pd.Categorical(np.tile(np.repeat(building_types, len(years)), n_counties)),
+    })
+    for i, flow in enumerate(FLOWS):
+        df[flow] = county_values[..., i].reshape(-1)
+    return df
+
+
+def rake_county_stock(results: pd.DataFrame, counties: pd.DataFrame,
+                      membership: sparse.csr_matrix, seed_shares: np.ndarray,
+                      county_controls: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Reconcile a bottom-up county allocation with the state model by raking.
+
+    The seed spreads the national stock (by type and year) over counties by
+    their national facility shares, ignoring state borders. IPF then rakes
+    it to the state model stocks, whose state split comes from GHGP state
+    cement production and ACS housing units (see state_model.py), and
+    optionally to measured county totals (over types). Measured totals are
+    rescaled to the state totals, so they only set the pattern within each
+    state; counties without a measured total keep their seed total.
+
+    Args:
+        results: Output of run_county_model
+        counties: Output of load_counties
+        membership: State × county membership matrix
+        seed_shares: National county shares [county] (national_proxy_shares)
+        county_controls: Optional DataFrame with columns county_fips, year, stock
+
+    Returns:
+        `results` with an added stock_raked column
+    """
+    building_types = list(results['building_type'].cat.categories)
+    years = np.sort(results['year'].unique())
+    shape = (len(counties), len(building_types), len(years))
+
+    index = pd.MultiIndex.from_product([counties['county_fips'], building_types, years])
+    state_model = (results.set_index(['county_fips', 'building_type', 'year'])['stock']
+                   .reindex(index).fillna(0).to_numpy().reshape(shape))
+    # run_county_model aggregates back to the state model exactly
+    state_targets = (membership @ state_model.reshape(shape[0], -1)).reshape(membership.shape[0], *shape[1:])
+    national = state_targets.sum(axis=0)
+    seed = seed_shares[:, None, None] * national[None]
+
+    seed_states = (membership @ seed.reshape(shape[0], -1)).reshape(state_targets.shape)
+    gap = np.abs(seed_states - state_targets).sum() / (2 * national.sum())
+    print(f"Seed places {gap:.1%} of the stock in a different state than the state model")
+
+    totals = None
+    if county_controls is not None:
+        totals = (county_controls.pivot(index='county_fips', columns='year', values='stock')
+                  .reindex(index=counties['county_fips'], columns=years).to_numpy())
+        totals = np.where(np.isnan(totals), seed.sum(axis=1), totals)
+        # Measured totals set the within-state pattern; the state model sets the level
+        state_totals = state_targets.sum(axis=1)
+        totals *= membership.T @ np.divide(state_totals, membership @ totals,
+                                           out=np.zeros_like(state_totals),
+                                           where=(membership @ totals) > 0)
+
+    raked, _ = rake_hierarchy(seed, membership, state_targets, county_totals=totals)
+    raked = pd.Series(raked.reshape(-1), index=index)
+    results['stock_raked'] = raked.reindex(pd.MultiIndex.from_arrays(
+        [results['county_fips'], results['building_type'].astype(str), results['year']])).values
+    return results
+
+
+def main(gazetteer_file: Path = COUNTY_GAZETTEER_FILE, county_controls_file: Path = None):
+    print("\n Loading counties...")
+    try:
+        counties = load_counties(gazetteer_file)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    membership = membership_matrix(counties, list(STATE_FIPS))
+    print(f"{len(counties)} counties in {membership.shape[0]} states")
+
+    print("Pooling mine and clinker facilities...")
+    facilities = pool_facilities(counties)
+    facilities.to_csv(FACILITY_OUTPUT_FILE, index=False)
+    print(f"Saved {len(facilities)} facilities to {FACILITY_OUTPUT_FILE.name}")
+
+    print("Running county stock model...")
+    shares = county_proxy_shares(facilities, counties, membership)
+    inflows, lifetimes = _load_national_inflows()
+    results = run_county_model(inflows, lifetimes, counties, shares, membership)
+
+    print("Raking county stocks to the state model...")
+    county_controls = pd.read_csv(county_controls_file) if county_controls_file else None
+    results = rake_county_stock(results, counties, membership,
+                                national_proxy_shares(facilities, counties), county_controls)
+    results.to_parquet(OUTPUT_FILE, index=False)
+    print(f"Saved {len(results):,} rows to {OUTPUT_FILE.name}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='County-level concrete stock model')
+    parser.add_argument('--gazetteer', default=COUNTY_GAZETTEER_FILE,
+                        help='Census Gazetteer county file')
+    parser.add_argument('--county-controls', default=None, metavar='CSV',
+                        help='Measured county stock totals (county_fips, year, stock) to also rake to')
+    args = parser.parse_args()
+
+    main(gazetteer_file=args.gazetteer, county_controls_file=args.county_controls)
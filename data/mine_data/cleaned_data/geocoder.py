@@ -1,5 +1,15 @@
 # geocoding script to convert addresses into long/lats
+#
+# Addresses are geocoded concurrently with asyncio/aiohttp: one pooled
+# session, at most MAX_CONCURRENCY requests in flight, a token bucket capping
+# the request rate at RATE_LIMIT per second, and per-request retries with
+# exponential backoff. Pass --url to run against a local stand-in server.
 
+import argparse
+import asyncio
+import random
+
+import aiohttp
 import pandas as pd
 import requests
 import time
@@ -8,14 +18,37 @@ from tqdm import tqdm
 INPUT_FILE = "mine_data/cleaned_data/US-DOL-Cleaned-Sand-Mine-Addresses_12072025.csv"
 OUTPUT_FILE = "mine_data/cleaned_data/mine_addresses_with_coords_12072025.csv"
 ADDRESS_COLS = ["Street", "City", "State", "Zip Code"]
-SLEEP_TIME = 0.1  # seconds between API calls
+SLEEP_TIME = 0.1  # seconds between API calls (sequential geocoder)
+
+CENSUS_URL = "https://geocoding.geo.census.gov/geocoder/locations/onelineaddress"
+MAX_CONCURRENCY = 8   # requests in flight
+RATE_LIMIT = 10.0     # requests per second (token bucket refill rate)
+BURST = 10            # token bucket capacity
+RETRIES = 3           # attempts per address
+BACKOFF_BASE = 0.5    # seconds; doubles with every retry
+TIMEOUT = 10          # seconds per request
+RETRY_STATUS = {429, 500, 502, 503, 504}
 
 def join_address(row):
     return f"{row['Street']}, {row['City']}, {row['State']} {row['Zip Code']}"
 
+def first_match(data):
+    """
+    (lat, lon) of the first address match in a Census geocoder response;
+    (None, None) when there is no match or the body isn't the expected shape.
+    """
+    try:
+        matches = data.get("result", {}).get("addressMatches", [])
+        if len(matches) > 0:
+            coords = matches[0]["coordinates"]
+            return coords["y"], coords["x"]  # lat, lon
+    except (AttributeError, KeyError, TypeError, IndexError):
+        pass
+    return None, None
+
 # api caller
 def census_geocode(address, retries=3):
-    url = "https://geocoding.geo.census.gov/geocoder/locations/onelineaddress"
+    url = CENSUS_URL
     params = {
         "address": address,
         "benchmark": "Public_AR_Current",
@@ -25,14 +58,7 @@ def census_geocode(address, retries=3):
     for attempt in range(retries):
         try:
             r = requests.get(url, params=params, timeout=10)
-            data = r.json()
-
-            matches = data.get("result", {}).get("addressMatches", [])
-            if len(matches) > 0:
-                coords = matches[0]["coordinates"]
-                return coords["y"], coords["x"]  # lat, lon
-            else:
-                return None, None
+            return first_match(r.json())
 
         except Exception:
             if attempt < retries - 1:
@@ -40,10 +66,95 @@ def census_geocode(address, retries=3):
                 continue
             return None, None
 
-def main():
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, up to `capacity` at once."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        # The lock queues waiters so tokens are handed out in order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def census_geocode_async(session, address, bucket, url=CENSUS_URL, retries=RETRIES):
+    """
+    Geocode one address; retries timeouts, connection errors, 429 and 5xx
+    responses with exponential backoff (honouring Retry-After).
+    """
+    params = {
+        "address": address,
+        "benchmark": "Public_AR_Current",
+        "format": "json"
+    }
+
+    for attempt in range(retries):
+        await bucket.acquire()
+        delay = BACKOFF_BASE * 2 ** attempt * (1 + random.random())
+        try:
+            async with session.get(url, params=params) as r:
+                if r.status in RETRY_STATUS:
+                    retry_after = r.headers.get("Retry-After")
+                    if retry_after and retry_after.isdigit():
+                        delay = max(delay, float(retry_after))
+                    raise aiohttp.ClientResponseError(r.request_info, r.history, status=r.status)
+                data = await r.json(content_type=None)
+                return first_match(data)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            if attempt < retries - 1:
+                await asyncio.sleep(delay)
+                continue
+            return None, None
+
+
+async def geocode_addresses(addresses, url=CENSUS_URL, concurrency=MAX_CONCURRENCY,
+                            rate=RATE_LIMIT, burst=BURST, retries=RETRIES):
+    """
+    Geocode addresses concurrently; returns (lat, lon) per address, in order.
+
+    Duplicate addresses are only requested once. At most `concurrency`
+    requests share one pooled connection set, and the token bucket keeps
+    the overall request rate at `rate` per second.
+    """
+    unique = list(dict.fromkeys(addresses))
+    bucket = TokenBucket(rate, burst)
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=TIMEOUT)
+    coords = {}
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        with tqdm(total=len(unique)) as progress:
+
+            async def worker(address):
+                async with semaphore:
+                    coords[address] = await census_geocode_async(session, address, bucket,
+                                                                 url=url, retries=retries)
+                progress.update(1)
+
+            await asyncio.gather(*(worker(address) for address in unique))
+
+    return [coords[address] for address in addresses]
+
+
+def main(input_file=INPUT_FILE, output_file=OUTPUT_FILE, url=CENSUS_URL,
+         concurrency=MAX_CONCURRENCY, rate=RATE_LIMIT, sequential=False):
 
     print("\n Loading input CSV…")
-    df = pd.read_csv(INPUT_FILE)
+    df = pd.read_csv(input_file)
 
     # Ensure required columns exist
     for col in ADDRESS_COLS:
@@ -59,20 +170,35 @@ def main():
 
     print("\n Geocoding addresses using Census API…\n")
 
-    for addr in tqdm(df["full_address"], total=len(df)):
-        lat, lon = census_geocode(addr)
-        lats.append(lat)
-        lons.append(lon)
-        time.sleep(SLEEP_TIME)
+    if sequential:
+        for addr in tqdm(df["full_address"], total=len(df)):
+            lat, lon = census_geocode(addr)
+            lats.append(lat)
+            lons.append(lon)
+            time.sleep(SLEEP_TIME)
+    else:
+        coords = asyncio.run(geocode_addresses(list(df["full_address"]), url=url,
+                                               concurrency=concurrency, rate=rate))
+        lats = [lat for lat, _ in coords]
+        lons = [lon for _, lon in coords]
 
     df["lat"] = lats
     df["lon"] = lons
 
     print("\n Saving output CSV…")
-    df.to_csv(OUTPUT_FILE, index=False)
+    df.to_csv(output_file, index=False)
 
-    print(f"\n Done! Geocoded file saved to: {OUTPUT_FILE}\n")
+    print(f"\n Done! Geocoded file saved to: {output_file}\n")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Geocode mine addresses with the Census geocoder")
+    parser.add_argument("--input", default=INPUT_FILE, help="Address CSV")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="Output CSV with lat/lon")
+    parser.add_argument("--url", default=CENSUS_URL, help="Geocoder endpoint (e.g. a local stand-in server)")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENCY, help="Requests in flight")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="Requests per second")
+    parser.add_argument("--sequential", action="store_true", help="Use the one-at-a-time geocoder")
+    args = parser.parse_args()
+
+    main(args.input, args.output, args.url, args.concurrency, args.rate, args.sequential)
\ No newline at end of file
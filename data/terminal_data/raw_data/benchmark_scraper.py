@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+ACA Scraper Benchmark and Golden-Output Check
+Runs pdf_scraper over the local ACA one-sheets, times every PDF by stage
+(text extraction vs. regex parsing) and diffs the extracted company and
+terminal records against the golden records in aca_golden.json.
+
+The golden file holds the expected records per PDF, corrected by hand
+against the PDFs: no trailing commas or footnote digits, surnames and
+multi-word locations rejoined, and records whose line wraps in the text
+layer filled in. The current parser still produces those mis-parses, so
+the diff lists them and shrinks as the parser is fixed. Records matching
+known mis-parse patterns are also counted as suspect, as a diagnostic.
+
+Usage:
+    python3 benchmark_scraper.py                 # benchmark + diff, exit 1 on differences
+    python3 benchmark_scraper.py --cached        # time with the page text cache
+    python3 benchmark_scraper.py --update-golden # overwrite with the current output
+"""
+
+import csv
+import glob
+import json
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from pdf_scraper import CACHE_DIR, scrape_pdf
+
+SCRIPT_DIR = Path(__file__).parent.resolve()
+GOLDEN_FILE = SCRIPT_DIR / 'aca_golden.json'
+PARSE_STAGES = ['state', 'companies', 'terminals']
+RECORD_FIELDS = ['company', 'location', 'house_member']
+
+# Known mis-parse patterns: (name, field, pattern)
+SUSPECT_PATTERNS = [
+    ('trailing comma', 'company', re.compile(r',\s*$')),
+    ('trailing comma', 'location', re.compile(r',\s*$')),
+    ('footnote digit', 'company', re.compile(r'[A-Za-z]\d$')),
+    ('empty field', 'company', re.compile(r'^[\s,]*$')),
+    ('empty field', 'location', re.compile(r'^[\s,]*$')),
+    ('split name', 'house_member', re.compile(r'^[A-Z][a-z]*\s+\(')),
+    ('split name', 'location', re.compile(r'^(Mc|La|De|Van|Del)$|-$')),
+]
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def benchmark(pdf_paths: List[str], cached: bool = False,
+              repeat: int = 1) -> Tuple[Dict[str, Dict], List[Dict]]:
+    """
+    Scrape every PDF serially, timing each stage.
+
+    Args:
+        pdf_paths: PDFs to scrape
+        cached: Use the page text cache (times parsing of cached text)
+                instead of extracting every PDF from scratch
+        repeat: Runs per PDF; the fastest run is reported
+
+    Returns:
+        (results keyed by PDF file name,
+         timing rows: pdf, size_mb, extract_s, parse_s, total_s)
+    """
+    results, timings = {}, []
+    for pdf_path in pdf_paths:
+        best = None
+        for _ in range(repeat):
+            result = scrape_pdf(pdf_path, cache_dir=CACHE_DIR if cached else None, timed=True)
+            stages = result.pop('timings')
+            parse = sum(stages[stage] for stage in PARSE_STAGES)
+            if best is None or stages['extract'] + parse < best[0] + best[1]:
+                best = (stages['extract'], parse)
+        name = Path(pdf_path).name
+        results[name] = result
+        timings.append({'pdf': name,
+                        'size_mb': Path(pdf_path).stat().st_size / 1e6,
+                        'extract_s': best[0],
+                        'parse_s': best[1],
+                        'total_s': best[0] + best[1]})
+    return results, timings
+
+
+def print_timings(timings: List[Dict], slowest: int = 5):
+    """Summary throughput, stage split and the slowest PDFs."""
+    total = sum(t['total_s'] for t in timings)
+    extract = sum(t['extract_s'] for t in timings)
+    parse = sum(t['parse_s'] for t in timings)
+    size = sum(t['size_mb'] for t in timings)
+
+    print(f"\n=== Timing ({len(timings)} PDFs, {size:.1f} MB) ===")
+    print(f"Total: {total:.3f} s  ({len(timings) / total:.1f} PDFs/s, {size / total:.1f} MB/s)")
+    print(f"Text extraction: {extract:.3f} s ({100 * extract / total:.1f}%)")
+    print(f"Regex parsing:   {parse:.3f} s ({100 * parse / total:.1f}%)")
+    print(f"Slowest PDFs:")
+    for t in sorted(timings, key=lambda t: -t['total_s'])[:slowest]:
+        print(f"  {t['pdf']}: {t['total_s']:.3f} s (extract {t['extract_s']:.3f}, parse {t['parse_s']:.4f})")
+
+
+def save_timings(timings: List[Dict], path: str):
+    """Per-PDF timings as CSV."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=list(timings[0]))
+        writer.writeheader()
+        writer.writerows(timings)
+    print(f"Saved per-PDF timings to: {path}")
+
+
+# ============================================================================
+# GOLDEN RECORDS
+# ============================================================================
+
+def records(result: Dict) -> List[Tuple[str, ...]]:
+    """(type, company, location, house_member) tuples of one scraped PDF."""
+    rows = []
+    for row_type in ('companies', 'terminals'):
+        for record in result[row_type]:
+            rows.append((row_type,) + tuple(record[field] for field in RECORD_FIELDS))
+    return rows
+
+
+def golden_entry(result: Dict) -> Dict:
+    """What the golden file keeps of a result (no paths or timings)."""
+    return {'state': result['state'], 'companies': result['companies'],
+            'terminals': result['terminals']}
+
+
+def diff_against_golden(results: Dict[str, Dict], golden: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Per-PDF differences from the golden records.
+
+    Returns:
+        {pdf name: {'state': (golden, scraped) if changed, 'missing': [...],
+         'extra': [...]}} for PDFs that differ; a PDF absent from the output
+        or from the golden file counts as all records missing / extra
+    """
+    diffs = {}
+    for name in sorted(set(results) | set(golden)):
+        expected = golden.get(name, {'state': None, 'companies': [], 'terminals': []})
+        scraped = results.get(name, {'state': None, 'companies': [], 'terminals': []})
+        # Multisets, so a duplicated or dropped repeat record counts too
+        expected_rows, scraped_rows = Counter(records(expected)), Counter(records(scraped))
+        diff = {
+            'missing': list((expected_rows - scraped_rows).elements()),
+            'extra': list((scraped_rows - expected_rows).elements()),
+        }
+        if expected['state'] != scraped['state']:
+            diff['state'] = (expected['state'], scraped['state'])
+        if any(diff.values()):
+            diffs[name] = diff
+    return diffs
+
+
+def suspect_records(results: Dict[str, Dict]) -> Dict[str, int]:
+    """Count of records matching each known mis-parse pattern."""
+    counts = {name: 0 for name, _, _ in SUSPECT_PATTERNS}
+    for result in results.values():
+        for row in records(result):
+            record = dict(zip(RECORD_FIELDS, row[1:]))
+            hits = {name for name, field, pattern in SUSPECT_PATTERNS
+                    if pattern.search(record[field] or '')}
+            for name in hits:
+                counts[name] += 1
+    return counts
+
+
+def print_diffs(diffs: Dict[str, Dict], n_pdfs: int):
+    """Report golden differences."""
+    print(f"\n=== Golden records ===")
+    if not diffs:
+        print(f"All {n_pdfs} PDFs match the golden records")
+        return
+    print(f"{len(diffs)} of {n_pdfs} PDFs differ from the golden records:")
+    for name, diff in diffs.items():
+        print(f"  {name}")
+        if 'state' in diff:
+            print(f"    state: {diff['state'][0]!r} -> {diff['state'][1]!r}")
+        for label, sign in (('missing', '-'), ('extra', '+')):
+            for row in diff[label]:
+                print(f"    {sign} {row[0]}: {' | '.join(row[1:])}")
+
+
+def main():
+    """
+    Run the benchmark and the golden-record check.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark pdf_scraper and diff its output against golden records')
+    parser.add_argument('pdfs', nargs='*', help='PDF files (default: every ACA*.pdf next to this script)')
+    parser.add_argument('--golden', default=GOLDEN_FILE, help='Golden records file')
+    parser.add_argument('--update-golden', action='store_true', help='Overwrite the golden records with the current output (review before committing)')
+    parser.add_argument('--cached', action='store_true', help='Use the page text cache while timing')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per PDF (fastest is reported)')
+    parser.add_argument('--timings-csv', help='Save per-PDF timings to this CSV')
+    args = parser.parse_args()
+
+    pdfs = args.pdfs or sorted(glob.glob(str(SCRIPT_DIR / 'ACA*.pdf')))
+    if not pdfs:
+        print("No PDF files found.")
+        sys.exit(1)
+
+    print(f"Benchmarking {len(pdfs)} PDF(s)...")
+    results, timings = benchmark(pdfs, cached=args.cached, repeat=args.repeat)
+    print_timings(timings)
+    if args.timings_csv:
+        save_timings(timings, args.timings_csv)
+
+    print(f"\n=== Suspect records ===")
+    for name, count in suspect_records(results).items():
+        print(f"  {name}: {count}")
+
+    golden_path = Path(args.golden)
+    if args.update_golden:
+        suspect = sum(suspect_records(results).values())
+        if suspect:
+            print(f"\nWarning: the golden records will include {suspect} suspect records; "
+                  f"correct them by hand before committing")
+        golden = {name: golden_entry(result) for name, result in sorted(results.items())}
+        with open(golden_path, 'w', encoding='utf-8') as f:
+            json.dump(golden, f, indent=2)
+        print(f"\nSaved golden records for {len(golden)} PDFs to: {golden_path}")
+        return
+
+    with open(golden_path, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    if args.pdfs:
+        golden = {name: entry for name, entry in golden.items() if name in results}
+    diffs = diff_against_golden(results, golden)
+    print_diffs(diffs, len(results))
+    if diffs:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,30 +2,130 @@
 """
 ACA PDF Scraper
 Extracts company and terminal information from American Cement Association state one-sheets
+
+Extracted page text is cached by PDF content hash (in .cache/page_text next to
+this script), so re-runs only parse new or changed PDFs. PDFs can be fanned
+out to a process pool with --workers.
+
+Pages are read lazily and reading stops once both the company and terminal
+sections have been found and closed, so only the pages holding them are
+extracted from longer reports. --timings reports time per stage.
 """
 
 import re
+import time
+import pypdf
 from pypdf import PdfReader
 from pathlib import Path
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 import csv
+import hashlib
 import json
-from typing import List, Dict
+import os
+from typing import List, Dict, Iterator, Optional
 import sys
 
+CACHE_DIR = Path(__file__).parent.resolve() / '.cache' / 'page_text'
+CSV_HEADER = ['State', 'Type', 'Company', 'Location', 'House Member']
 
-def extract_text_from_pdf(pdf_path: str) -> str:
-    """Extract text from a PDF file."""
+# Patterns, compiled once
+STATE_PATTERN = re.compile(r'^([A-Z\s]+):\s*\n', re.MULTILINE)
+COMPANY_HEADING = re.compile(r'COMPANY\s+LOCATION\s+HOUSE\s+MEMBERS', re.IGNORECASE)
+TERMINAL_HEADING = re.compile(r'PLANT\s+LOCATIONS\s+TERMINALS', re.IGNORECASE)
+TERMINAL_SECTION_END = re.compile(r'Locations\s+with\s+terminals|American\s+Cement|For\s+more\s+information',
+                                  re.IGNORECASE)
+COMPANY_SECTION = re.compile(
+    r'COMPANY\s+LOCATION\s+HOUSE\s+MEMBERS\s*\n(.*?)(?=PLANT\s+LOCATIONS|$)',
+    re.DOTALL | re.IGNORECASE
+)
+TERMINAL_SECTION = re.compile(
+    r'PLANT\s+LOCATIONS\s+TERMINALS\s*\n(.*?)(?=Locations\s+with\s+terminals|American\s+Cement|For\s+more\s+information|$)',
+    re.DOTALL | re.IGNORECASE
+)
+# Representative at the end of a company line, e.g. "Jerry Carl (R-1st)"
+REPRESENTATIVE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+\(([RD])-(\d+(?:st|nd|rd|th))\)\s*$')
+# Terminal entry: Company, Location, Representative (Party-District)
+TERMINAL_ENTRY = re.compile(
+    r'([^,\n]+),\s*([^,]+),\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+\(([RD])-(\d+(?:st|nd|rd|th))\)'
+)
+
+
+def pdf_hash(pdf_path: str) -> str:
+    """SHA-256 of the PDF's contents and the pypdf version that extracts it."""
+    digest = hashlib.sha256(pypdf.__version__.encode())
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_pages(pdf_path: str, cache_dir: Optional[Path] = None,
+                  sections_only: bool = False) -> List[str]:
+    """
+    Extract the text of the pages of a PDF.
+    
+    With a cache_dir, page text is read from / written to
+    <cache_dir>/<content hash>.json, so unchanged PDFs are parsed once.
+    
+    Args:
+        pdf_path: PDF file
+        cache_dir: Page text cache directory (None to always extract)
+        sections_only: Stop reading pages once the company heading, the
+                       terminal heading and the end of the terminal
+                       section have all been seen
+    """
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = Path(cache_dir) / f"{pdf_hash(pdf_path)}.json"
+        if cache_file.exists():
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            # Partial extractions only serve section-only reads
+            if cached.get('complete', True) or sections_only:
+                return cached['pages']
+    
     reader = PdfReader(pdf_path)
-    text = ""
+    pages = []
+    found_company = found_terminal = terminal_closed = False
     for page in reader.pages:
-        text += page.extract_text()
-    return text
+        page_text = page.extract_text()
+        pages.append(page_text)
+        if not sections_only:
+            continue
+        # Track the sections page by page instead of rescanning the whole text
+        found_company = found_company or COMPANY_HEADING.search(page_text) is not None
+        start = 0
+        if not found_terminal:
+            heading = TERMINAL_HEADING.search(page_text)
+            found_terminal = heading is not None
+            start = heading.end() if heading else len(page_text)
+        if found_terminal and not terminal_closed:
+            terminal_closed = TERMINAL_SECTION_END.search(page_text, start) is not None
+        if found_company and terminal_closed:
+            break
+    complete = len(pages) == len(reader.pages)
+    
+    if cache_file is not None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so parallel workers never read a partial file
+        tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'source': Path(pdf_path).name, 'complete': complete, 'pages': pages}, f)
+        os.replace(tmp_file, cache_file)
+    return pages
+
+
+def extract_text_from_pdf(pdf_path: str, cache_dir: Optional[Path] = None,
+                          sections_only: bool = False) -> str:
+    """Extract text from a PDF file."""
+    return "".join(extract_pages(pdf_path, cache_dir, sections_only))
 
 
 def extract_state_name(text: str) -> str:
     """Extract the state name from the document."""
     # Look for pattern like "ALABAMA:" at the start
-    match = re.search(r'^([A-Z\s]+):\s*\n', text, re.MULTILINE)
+    match = STATE_PATTERN.search(text)
     if match:
         return match.group(1).strip()
     return "Unknown"
@@ -39,11 +139,7 @@ def extract_companies(text: str) -> List[Dict[str, str]]:
     companies = []
     
     # Find the COMPANY LOCATION HOUSE MEMBERS section
-    company_section_match = re.search(
-        r'COMPANY\s+LOCATION\s+HOUSE\s+MEMBERS\s*\n(.*?)(?=PLANT\s+LOCATIONS|$)',
-        text,
-        re.DOTALL | re.IGNORECASE
-    )
+    company_section_match = COMPANY_SECTION.search(text)
     
     if not company_section_match:
         print("Warning: Could not find COMPANY LOCATION HOUSE MEMBERS section", file=sys.stderr)
@@ -63,7 +159,7 @@ def extract_companies(text: str) -> List[Dict[str, str]]:
             continue
         
         # Check if this line contains a representative (has party-district pattern)
-        rep_match = re.search(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+\(([RD])-(\d+(?:st|nd|rd|th))\)\s*$', line)
+        rep_match = REPRESENTATIVE.search(line)
         
         if rep_match:
             # This line contains the representative
@@ -119,11 +215,7 @@ def extract_terminals(text: str) -> List[Dict[str, str]]:
     terminals = []
     
     # Find the PLANT LOCATIONS TERMINALS section  
-    terminal_section_match = re.search(
-        r'PLANT\s+LOCATIONS\s+TERMINALS\s*\n(.*?)(?=Locations\s+with\s+terminals|American\s+Cement|For\s+more\s+information|$)',
-        text,
-        re.DOTALL | re.IGNORECASE
-    )
+    terminal_section_match = TERMINAL_SECTION.search(text)
     
     if not terminal_section_match:
         print("Warning: Could not find PLANT LOCATIONS TERMINALS section", file=sys.stderr)
@@ -133,9 +225,7 @@ def extract_terminals(text: str) -> List[Dict[str, str]]:
     
     # Terminals have format: Company, Location, Representative (Party-District)
     # They're comma-separated which makes them easier to parse
-    pattern = r'([^,\n]+),\s*([^,]+),\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+\(([RD])-(\d+(?:st|nd|rd|th))\)'
-    
-    matches = re.finditer(pattern, terminal_section)
+    matches = TERMINAL_ENTRY.finditer(terminal_section)
     
     for match in matches:
         company = match.group(1).strip()
@@ -154,37 +244,92 @@ def extract_terminals(text: str) -> List[Dict[str, str]]:
     return terminals
 
 
-def scrape_pdf(pdf_path: str) -> Dict:
+def scrape_pdf(pdf_path: str, cache_dir: Optional[Path] = None, timed: bool = False) -> Dict:
     """
     Scrape a single PDF and return the extracted data.
+    
+    Only the pages up to the end of the terminal section are read. With
+    timed=True the result also holds 'timings': seconds spent on text
+    extraction and on each section's parsing.
     """
-    text = extract_text_from_pdf(pdf_path)
+    timings = {}
+    started = time.perf_counter()
+    
+    def lap(stage: str):
+        nonlocal started
+        now = time.perf_counter()
+        timings[stage] = now - started
+        started = now
+    
+    text = extract_text_from_pdf(pdf_path, cache_dir, sections_only=True)
+    lap('extract')
     state = extract_state_name(text)
+    lap('state')
     companies = extract_companies(text)
+    lap('companies')
     terminals = extract_terminals(text)
+    lap('terminals')
     
-    return {
+    result = {
         'state': state,
         'pdf_path': pdf_path,
         'companies': companies,
         'terminals': terminals
     }
+    if timed:
+        result['timings'] = timings
+    return result
 
 
-def scrape_multiple_pdfs(pdf_paths: List[str]) -> List[Dict]:
+def iter_scraped_pdfs(pdf_paths: List[str], workers: int = 1,
+                      cache_dir: Optional[Path] = CACHE_DIR, timed: bool = False) -> Iterator[Dict]:
     """
-    Scrape multiple PDFs and return all extracted data.
+    Scrape PDFs one at a time, yielding each result in input order.
+    
+    With workers > 1 the PDFs are scraped in a process pool, keeping at most
+    2 × workers PDFs in flight so finished results don't pile up.
     """
-    results = []
+    if workers > 1 and len(pdf_paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for pdf_path in pdf_paths:
+                pending.append((pdf_path, pool.submit(scrape_pdf, pdf_path, cache_dir, timed)))
+                if len(pending) >= 2 * workers:
+                    yield from _report(*pending.popleft())
+            while pending:
+                yield from _report(*pending.popleft())
+        return
+    
     for pdf_path in pdf_paths:
-        print(f"Processing: {pdf_path}")
-        try:
-            result = scrape_pdf(pdf_path)
-            results.append(result)
-            print(f"  Found {len(result['companies'])} companies and {len(result['terminals'])} terminals")
-        except Exception as e:
-            print(f"  Error processing {pdf_path}: {e}", file=sys.stderr)
-    return results
+        yield from _report(pdf_path, None, cache_dir, timed)
+
+
+def _report(pdf_path: str, future: Optional[Future] = None,
+            cache_dir: Optional[Path] = None, timed: bool = False) -> Iterator[Dict]:
+    """Yield one PDF's result (from a future or scraped here), reporting counts and errors."""
+    print(f"Processing: {pdf_path}")
+    try:
+        result = future.result() if future is not None else scrape_pdf(pdf_path, cache_dir, timed)
+        print(f"  Found {len(result['companies'])} companies and {len(result['terminals'])} terminals")
+        yield result
+    except Exception as e:
+        print(f"  Error processing {pdf_path}: {e}", file=sys.stderr)
+
+
+def scrape_multiple_pdfs(pdf_paths: List[str], workers: int = 1,
+                         cache_dir: Optional[Path] = CACHE_DIR, timed: bool = False) -> List[Dict]:
+    """
+    Scrape multiple PDFs and return all extracted data.
+    """
+    return list(iter_scraped_pdfs(pdf_paths, workers, cache_dir, timed))
+
+
+def csv_rows(result: Dict) -> Iterator[List[str]]:
+    """CSV rows (companies, then terminals) of one scraped PDF."""
+    state = result['state']
+    for row_type, records in (('Company', result['companies']), ('Terminal', result['terminals'])):
+        for record in records:
+            yield [state, row_type, record['company'], record['location'], record['house_member']]
 
 
 def save_to_csv(results: List[Dict], output_dir: str = "."):
@@ -198,30 +343,9 @@ def save_to_csv(results: List[Dict], output_dir: str = "."):
     combined_file = output_dir / "aca_data.csv"
     with open(combined_file, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
-        writer.writerow(['State', 'Type', 'Company', 'Location', 'House Member'])
-        
+        writer.writerow(CSV_HEADER)
         for result in results:
-            state = result['state']
-            
-            # Write companies
-            for company in result['companies']:
-                writer.writerow([
-                    state,
-                    'Company',
-                    company['company'],
-                    company['location'],
-                    company['house_member']
-                ])
-            
-            # Write terminals
-            for terminal in result['terminals']:
-                writer.writerow([
-                    state,
-                    'Terminal',
-                    terminal['company'],
-                    terminal['location'],
-                    terminal['house_member']
-                ])
+            writer.writerows(csv_rows(result))
     
     print(f"Saved combined data to: {combined_file}")
 
@@ -240,6 +364,89 @@ def save_to_json(results: List[Dict], output_dir: str = "."):
     print(f"Saved JSON data to: {json_file}")
 
 
+class StreamingOutput:
+    """
+    Crash-safe incremental output: one JSON line per PDF in aca_data.jsonl
+    plus its rows in aca_data.csv, written as soon as the PDF is parsed.
+    
+    The JSON Lines file is the record of what's done. On resume, a partly
+    written last line is dropped, the CSV is rebuilt from the JSON lines
+    (line by line), and PDFs already present are skipped.
+    """
+    
+    def __init__(self, output_dir: str = ".", resume: bool = True, fsync_every: int = 10):
+        """
+        Args:
+            output_dir: Directory for aca_data.jsonl and aca_data.csv
+            resume: Keep existing output and skip PDFs already in it;
+                    otherwise start both files afresh
+            fsync_every: fsync both files after this many PDFs
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.jsonl_file = output_dir / "aca_data.jsonl"
+        self.csv_file = output_dir / "aca_data.csv"
+        self.fsync_every = fsync_every
+        self.done = self._recover() if resume else set()
+        
+        self._jsonl = open(self.jsonl_file, 'a' if resume else 'w', encoding='utf-8')
+        self._csv = open(self.csv_file, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._csv)
+        self._writer.writerow(CSV_HEADER)
+        if self.done:
+            with open(self.jsonl_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._writer.writerows(csv_rows(json.loads(line)))
+        self._unsynced = 0
+    
+    def _recover(self) -> set:
+        """Names of the PDFs already written, truncating a partial last line."""
+        done = set()
+        if not self.jsonl_file.exists():
+            return done
+        valid_bytes = 0
+        with open(self.jsonl_file, 'rb') as f:
+            for line in f:
+                try:
+                    done.add(Path(json.loads(line)['pdf_path']).name)
+                except (ValueError, KeyError):
+                    break
+                valid_bytes += len(line)
+        with open(self.jsonl_file, 'r+b') as f:
+            f.truncate(valid_bytes)
+        return done
+    
+    def is_done(self, pdf_path: str) -> bool:
+        return Path(pdf_path).name in self.done
+    
+    def write(self, result: Dict):
+        """Append one PDF's result to both files."""
+        self._writer.writerows(csv_rows(result))
+        self._jsonl.write(json.dumps(result) + "\n")
+        self.done.add(Path(result['pdf_path']).name)
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+    
+    def sync(self):
+        """Flush and fsync both files."""
+        for f in (self._csv, self._jsonl):
+            f.flush()
+            os.fsync(f.fileno())
+        self._unsynced = 0
+    
+    def close(self):
+        self.sync()
+        self._csv.close()
+        self._jsonl.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
 def main():
     """
     Main function to run the scraper.
@@ -253,6 +460,17 @@ def main():
     parser.add_argument('--csv', action='store_true', help='Output to CSV files')
     parser.add_argument('--json', action='store_true', help='Output to JSON file')
     parser.add_argument('--both', action='store_true', help='Output to both CSV and JSON')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help='Number of PDFs to scrape in parallel (default: CPU count)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-extract every PDF instead of using the page text cache')
+    parser.add_argument('--stream', action='store_true',
+                        help='Append each PDF to aca_data.jsonl and aca_data.csv as it is parsed, '
+                             'skipping PDFs already in the output')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='With --stream, start the output afresh instead of resuming')
+    parser.add_argument('--timings', action='store_true',
+                        help='Record and report time per stage (extraction, state, companies, terminals)')
     
     args = parser.parse_args()
     
@@ -276,23 +494,52 @@ def main():
     if not args.csv and not args.json and not args.both:
         args.both = True
     
-    # Scrape PDFs
-    results = scrape_multiple_pdfs(args.pdfs)
+    cache_dir = None if args.no_cache else CACHE_DIR
     
-    # Save results
-    if args.csv or args.both:
-        save_to_csv(results, args.output_dir)
+    stage_totals = {}
     
-    if args.json or args.both:
-        save_to_json(results, args.output_dir)
+    if args.stream:
+        # Streaming mode: write each PDF as soon as it's parsed
+        n_processed = total_companies = total_terminals = 0
+        with StreamingOutput(args.output_dir, resume=not args.no_resume) as output:
+            pdfs = [pdf for pdf in args.pdfs if not output.is_done(pdf)]
+            if len(pdfs) < len(args.pdfs):
+                print(f"Resuming: skipping {len(args.pdfs) - len(pdfs)} PDF(s) already in {output.jsonl_file}")
+            for result in iter_scraped_pdfs(pdfs, workers=args.workers, cache_dir=cache_dir,
+                                            timed=args.timings):
+                for stage, seconds in result.pop('timings', {}).items():
+                    stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+                output.write(result)
+                n_processed += 1
+                total_companies += len(result['companies'])
+                total_terminals += len(result['terminals'])
+        print(f"Saved streamed data to: {output.jsonl_file} and {output.csv_file}")
+    else:
+        # Scrape PDFs
+        results = scrape_multiple_pdfs(args.pdfs, workers=args.workers, cache_dir=cache_dir,
+                                       timed=args.timings)
+        for result in results:
+            for stage, seconds in result.pop('timings', {}).items():
+                stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+        
+        # Save results
+        if args.csv or args.both:
+            save_to_csv(results, args.output_dir)
+        
+        if args.json or args.both:
+            save_to_json(results, args.output_dir)
+        
+        n_processed = len(results)
+        total_companies = sum(len(r['companies']) for r in results)
+        total_terminals = sum(len(r['terminals']) for r in results)
     
     # Print summary
     print(f"\n=== Summary ===")
-    total_companies = sum(len(r['companies']) for r in results)
-    total_terminals = sum(len(r['terminals']) for r in results)
-    print(f"Processed {len(results)} PDFs")
+    print(f"Processed {n_processed} PDFs")
     print(f"Total companies: {total_companies}")
     print(f"Total terminals: {total_terminals}")
+    for stage, seconds in stage_totals.items():
+        print(f"Time in {stage}: {seconds:.3f} s")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,147 @@
+"""
+Census ACS Housing Data Loaders
+===============================
+
+Reads the cleaned ACS tables in data/stock_data/cleaned_data:
+- B25001: total housing units
+- B25024: units in structure (structure-type mix)
+- B01003: total population (optional)
+
+Files may hold state, county or metro-area (MSA) rows; the geography level
+is read from the geo_id summary-level prefix, so county or MSA exports can
+sit next to the state files (e.g. total_units_county_Y2024_B25001_Data_cleaned.csv).
+
+Source: https://data.census.gov (5-year ACS)
+"""
+
+import re
+from pathlib import Path
+
+import pandas as pd
+
+STOCK_DATA_DIR = Path(__file__).resolve().parent.parent / 'data' / 'stock_data' / 'cleaned_data'
+
+# Postal code -> state FIPS (50 states, DC and Puerto Rico)
+STATE_FIPS = {
+    'AL': 1, 'AK': 2, 'AZ': 4, 'AR': 5, 'CA': 6, 'CO': 8, 'CT': 9, 'DE': 10,
+    'DC': 11, 'FL': 12, 'GA': 13, 'HI': 15, 'ID': 16, 'IL': 17, 'IN': 18,
+    'IA': 19, 'KS': 20, 'KY': 21, 'LA': 22, 'ME': 23, 'MD': 24, 'MA': 25,
+    'MI': 26, 'MN': 27, 'MS': 28, 'MO': 29, 'MT': 30, 'NE': 31, 'NV': 32,
+    'NH': 33, 'NJ': 34, 'NM': 35, 'NY': 36, 'NC': 37, 'ND': 38, 'OH': 39,
+    'OK': 40, 'OR': 41, 'PA': 42, 'RI': 44, 'SC': 45, 'SD': 46, 'TN': 47,
+    'TX': 48, 'UT': 49, 'VT': 50, 'VA': 51, 'WA': 53, 'WV': 54, 'WI': 55,
+    'WY': 56, 'PR': 72,
+}
+
+STATE_NAMES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas',
+    'CA': 'California', 'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware',
+    'DC': 'District of Columbia', 'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii',
+    'ID': 'Idaho', 'IL': 'Illinois', 'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas',
+    'KY': 'Kentucky', 'LA': 'Louisiana', 'ME': 'Maine', 'MD': 'Maryland',
+    'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota', 'MS': 'Mississippi',
+    'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma',
+    'OR': 'Oregon', 'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina',
+    'SD': 'South Dakota', 'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah',
+    'VT': 'Vermont', 'VA': 'Virginia', 'WA': 'Washington', 'WV': 'West Virginia',
+    'WI': 'Wisconsin', 'WY': 'Wyoming', 'PR': 'Puerto Rico',
+}
+
+# geo_id summary-level prefixes, e.g. 0400000US06, 0500000US06037, 310M700US12060
+GEO_LEVELS = {'state': '040', 'county': '050', 'msa': '310'}
+
+
+def _year_from_filename(path: Path) -> int:
+    """Extract the ACS year from names like total_units_Y2024_B25001_Data_cleaned.csv."""
+    match = re.search(r'_Y(\d{4})_', path.name)
+    if match is None:
+        raise ValueError(f"Couldn't extract year from: {path.name}")
+    return int(match.group(1))
+
+
+def _read_acs_table(path: Path, level: str = 'state') -> pd.DataFrame:
+    """
+    Read one cleaned ACS file and keep the rows of one geography level.
+
+    Adds year, integer fips (state, county or CBSA code) and, for states and
+    counties, integer state_fips.
+    """
+    df = pd.read_csv(path, dtype={'geo_id': str})
+    df = df.loc[:, ~df.columns.str.startswith('Unnamed')]
+    df = df[df['geo_id'].str.startswith(GEO_LEVELS[level])].copy()
+    df['year'] = _year_from_filename(path)
+    # geo_id looks like 0400000US06 -> FIPS 6, 0500000US06037 -> FIPS 6037
+    code = df['geo_id'].str.split('US').str[-1]
+    df['fips'] = code.astype(int)
+    if level in ('state', 'county'):
+        df['state_fips'] = code.str[:2].astype(int)
+    return df
+
+
+def _load_level(stock_dir: Path, pattern: str, table: str, level: str) -> pd.DataFrame:
+    """Concatenate every file matching `pattern` at one geography level."""
+    if level not in GEO_LEVELS:
+        raise ValueError(f"Unknown geography level: {level}")
+    files = sorted(Path(stock_dir).glob(pattern))
+    df = pd.concat([_read_acs_table(f, level) for f in files], ignore_index=True) if files else None
+    if df is None or df.empty:
+        raise FileNotFoundError(f"No {level}-level {table} rows found in {stock_dir}")
+    return df
+
+
+def acs_files(stock_dir: Path = STOCK_DATA_DIR) -> list:
+    """Every cleaned ACS file the loaders read (for cache invalidation)."""
+    patterns = ['total_units*_Y*_B25001_Data_cleaned.csv', 'stock*_Y*_B25024_Data_cleaned.csv',
+                'population*_Y*_B01003_Data_cleaned.csv']
+    return sorted(f for pattern in patterns for f in Path(stock_dir).glob(pattern))
+
+
+def load_housing_units(stock_dir: Path = STOCK_DATA_DIR, level: str = 'state') -> pd.DataFrame:
+    """
+    Total housing units (B25001) by geography and year.
+
+    Args:
+        stock_dir: Directory with the cleaned ACS files
+        level: 'state', 'county' or 'msa'
+
+    Returns:
+        DataFrame with columns year, state_fips, state_name, housing_units
+        (states) or year, fips, name, housing_units (plus state_fips for
+        counties)
+    """
+    df = _load_level(stock_dir, 'total_units*_Y*_B25001_Data_cleaned.csv', 'B25001', level)
+    df = df.rename(columns={'B25001_001E': 'housing_units'})
+    if level == 'state':
+        return df[['year', 'state_fips', 'state_name', 'housing_units']]
+    df = df.rename(columns={'state_name': 'name'})
+    keys = ['year', 'fips', 'state_fips'] if level == 'county' else ['year', 'fips']
+    return df[keys + ['name', 'housing_units']]
+
+
+def load_structure_types(stock_dir: Path = STOCK_DATA_DIR, level: str = 'state') -> pd.DataFrame:
+    """
+    Housing units by units-in-structure category (B25024) by geography and year.
+
+    Returns:
+        DataFrame with year, fips, state_fips, state_name, total_units and
+        one column per structure category
+    """
+    df = _load_level(stock_dir, 'stock*_Y*_B25024_Data_cleaned.csv', 'B25024', level)
+    return df.drop(columns=['geo_id'])
+
+
+def load_population(stock_dir: Path = STOCK_DATA_DIR, level: str = 'state') -> pd.DataFrame:
+    """
+    Total population (B01003) by geography and year.
+
+    Returns:
+        DataFrame with columns year, fips, population
+
+    Raises:
+        FileNotFoundError if no B01003 files have been added
+    """
+    df = _load_level(stock_dir, 'population*_Y*_B01003_Data_cleaned.csv', 'B01003', level)
+    df = df.rename(columns={'B01003_001E': 'population'})
+    return df[['year', 'fips', 'population']]
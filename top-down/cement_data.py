@@ -0,0 +1,231 @@
+"""
+Cement Inflow Data from the EPA GHGP Clinker Files
+==================================================
+
+Builds national and state-by-year cement production series from the
+facility-level GHG Reporting Program files in data/clinker_data/cleaned_data
+and splices a long-run historical series in for the years GHGP doesn't cover.
+
+Parsing the facility CSVs (thousands separators, mixed column orders) is
+slow relative to the ~75 numbers the model needs, so the parsed aggregate is
+cached as Parquet next to the source data and rebuilt only when the hash of
+the source files changes.
+
+Source: https://www.epa.gov/ghgreporting/archive-ghg-reporting-program-data-sets
+"""
+
+import re
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_cache import cached_table
+
+CLINKER_DATA_DIR = (Path(__file__).resolve().parent.parent
+                    / 'data' / 'clinker_data' / 'cleaned_data')
+
+# Optional long-run USGS series (columns: year, production_mt); when absent
+# the approximate series below is used for years before GHGP coverage
+HISTORY_FILE = CLINKER_DATA_DIR / 'usgs_cement_production_history.csv'
+
+# GHGP years with incomplete facility reporting (first reporting year)
+GHGP_PARTIAL_YEARS = [2010]
+
+
+def _approximate_history() -> pd.DataFrame:
+    """
+    Approximate US cement production 1950-2024 (million metric tons).
+
+    Rough figures after the USGS Mineral Commodity Summaries; replace with
+    HISTORY_FILE for publication runs.
+    """
+    production = [
+        # 1950s - post-WWII construction boom
+        *[40 + i*1.5 for i in range(10)],
+        # 1960s - sustained growth
+        *[55 + i*2 for i in range(10)],
+        # 1970s - oil crisis slowdown
+        *[75 + i*0.5 for i in range(10)],
+        # 1980s - recovery
+        *[80 + i*1 for i in range(10)],
+        # 1990s - strong growth
+        *[90 + i*0.8 for i in range(10)],
+        # 2000s - peak then recession
+        *[98, 99.3, 97, 95, 94, 92, 90, 85, 75, 65],
+        # 2010s - recovery
+        *[66, 67, 71, 76, 81, 84, 86, 87, 88, 87],
+        # 2020s - recent
+        *[83, 90, 91, 93, 90]
+    ]
+    return pd.DataFrame({'year': list(range(1950, 2025)), 'production_mt': production})
+
+
+# ============================================================================
+# FACILITY FILES
+# ============================================================================
+
+def _source_files(data_dir: Path) -> Tuple[List[Path], List[Path]]:
+    """Per-year facility files and merged multi-year files, oldest first."""
+    yearly = sorted(data_dir.glob('cement_production_[0-9][0-9][0-9][0-9]-*.csv'))
+    merged = sorted(data_dir.glob('all_cement_production_*.csv'))
+    return yearly, merged
+
+
+def _read_facilities(path: Path) -> pd.DataFrame:
+    """Read one facility file with production parsed as a number."""
+    df = pd.read_csv(path, thousands=',', dtype={'State': str})
+    df['Cement Production'] = pd.to_numeric(df['Cement Production'], errors='coerce')
+    return df
+
+
+def load_facility_production(data_dir: Path = CLINKER_DATA_DIR) -> pd.DataFrame:
+    """
+    Facility-level cement production for every available year.
+
+    Per-year files take precedence; merged 'all_cement_production_*' files
+    only fill years that have no per-year file (e.g. 2021). This also keeps
+    out the merged file whose 2010 rows accidentally include an earlier
+    merged file relabelled as 2010.
+
+    Returns:
+        DataFrame with columns year, facility_id, state, county,
+        latitude, longitude, production_t (metric tons)
+    """
+    yearly, merged = _source_files(Path(data_dir))
+    frames = {}
+
+    for path in yearly:
+        year = int(re.match(r'cement_production_(\d{4})', path.name).group(1))
+        df = _read_facilities(path)
+        df['year'] = year
+        frames[year] = df  # later (newer) files replace earlier ones
+
+    for path in reversed(merged):  # newest merged file first
+        df = _read_facilities(path)
+        for year, group in df.groupby('year'):
+            frames.setdefault(int(year), group)
+
+    if not frames:
+        raise FileNotFoundError(f"No GHGP cement production files found in {data_dir}")
+
+    df = pd.concat(frames.values(), ignore_index=True)
+    df = df.rename(columns={
+        'Facility Id': 'facility_id',
+        'State': 'state',
+        'County': 'county',
+        'Latitude': 'latitude',
+        'Longitude': 'longitude',
+        'Cement Production': 'production_t',
+    })
+    df = df[['year', 'facility_id', 'state', 'county', 'latitude', 'longitude', 'production_t']]
+    df = df.dropna(subset=['state', 'production_t'])
+    df['facility_id'] = df['facility_id'].astype('int64')
+    df['year'] = df['year'].astype('int64')
+
+    duplicates = df.duplicated(subset=['facility_id', 'year'])
+    if duplicates.any():
+        print(f"Warning: dropping {duplicates.sum()} duplicate facility-year rows")
+        df = df[~duplicates]
+
+    return df.reset_index(drop=True)
+
+
+# ============================================================================
+# CACHED AGGREGATES
+# ============================================================================
+
+def load_state_production(data_dir: Path = CLINKER_DATA_DIR,
+                          use_cache: bool = True) -> pd.DataFrame:
+    """
+    Cement production by state and year from the GHGP facility files.
+
+    The aggregate is cached as Parquet in <data_dir>/.cache and rebuilt
+    whenever the source files change (see data_cache.py).
+
+    Returns:
+        DataFrame with columns year, state (postal code), production_mt,
+        n_facilities
+    """
+    data_dir = Path(data_dir)
+    yearly, merged = _source_files(data_dir)
+
+    def build() -> pd.DataFrame:
+        facilities = load_facility_production(data_dir)
+        df = (facilities.groupby(['year', 'state'])
+              .agg(production_t=('production_t', 'sum'), n_facilities=('facility_id', 'count'))
+              .reset_index())
+        df['production_mt'] = df.pop('production_t') / 1e6
+        df = df[['year', 'state', 'production_mt', 'n_facilities']]
+        return df.astype({'year': 'int16', 'state': 'category',
+                          'production_mt': 'float64', 'n_facilities': 'int32'})
+
+    return cached_table('cement_production_by_state', data_dir, yearly + merged,
+                        build, use_cache=use_cache)
+
+
+def load_historical_production(history_file: Path = HISTORY_FILE) -> pd.DataFrame:
+    """Long-run national production (year, production_mt)."""
+    if Path(history_file).exists():
+        return pd.read_csv(history_file)[['year', 'production_mt']]
+    return _approximate_history()
+
+
+def load_national_production(data_dir: Path = CLINKER_DATA_DIR,
+                             history_file: Path = HISTORY_FILE,
+                             splice: str = 'none') -> pd.DataFrame:
+    """
+    National cement production: GHGP where available, history elsewhere.
+
+    GHGP only covers reporting facilities, so its level is below national
+    production; partial reporting years (GHGP_PARTIAL_YEARS) are taken from
+    the history instead. Years after the last GHGP year are extrapolated
+    from that year with the year-on-year change of the history, so the
+    series never jumps back up to the national level at its end.
+
+    Args:
+        data_dir: Directory with the GHGP facility files
+        history_file: Long-run national series (see HISTORY_FILE)
+        splice: How years before the first GHGP year are filled.
+                'none' uses the historical series unscaled (the series
+                drops to facility coverage at the seam); 'ratio' scales it
+                to the GHGP level over the overlapping full GHGP years
+                (no jump at the seam, but the whole history is lowered to
+                facility coverage)
+
+    Returns:
+        DataFrame with columns year, production_mt, source ('ghgp',
+        'history' or 'extrapolated')
+    """
+    ghgp = (load_state_production(data_dir)
+            .groupby('year', observed=True)['production_mt'].sum()
+            .rename('ghgp'))
+    ghgp = ghgp.drop(GHGP_PARTIAL_YEARS, errors='ignore')
+    history = load_historical_production(history_file).set_index('year')['production_mt']
+
+    if splice not in ('ratio', 'none'):
+        raise ValueError(f"Unknown splice method: {splice}")
+    scale = 1.0
+    overlap = ghgp.index.intersection(history.index)
+    if splice == 'ratio' and len(overlap) > 0:
+        scale = ghgp[overlap].sum() / history[overlap].sum()
+
+    first, last = ghgp.index.min(), ghgp.index.max()
+    before = history[history.index < first] * scale
+    after = history[history.index > last]
+    if len(after) > 0:
+        if last not in history.index:
+            raise ValueError(f"Historical series must cover {last} to extend GHGP past it")
+        after = ghgp[last] * after / history[last]
+
+    df = pd.concat([
+        pd.DataFrame({'year': before.index, 'production_mt': before.to_numpy(),
+                      'source': 'history'}),
+        pd.DataFrame({'year': ghgp.index, 'production_mt': ghgp.to_numpy(),
+                      'source': 'ghgp'}),
+        pd.DataFrame({'year': after.index, 'production_mt': after.to_numpy(),
+                      'source': 'extrapolated'}),
+    ], ignore_index=True)
+    df['year'] = df['year'].astype('int64')
+    return df.sort_values('year').reset_index(drop=True)
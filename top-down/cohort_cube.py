@@ -0,0 +1,219 @@
+"""
+Cohort-Resolved Stock Cubes
+===========================
+
+Stores the full stock matrix Stock[..., observation year, construction
+cohort, building type] on disk so age profiles, demolition-waste timing and
+carbonation can be analyzed without collapsing cohorts.
+
+A cube is a directory of .npy chunks split along the first axis plus a
+metadata file naming every axis:
+
+    cube/
+        cube.json          # dims, coords, shape, dtype, chunk layout
+        chunk_0000.npy
+        chunk_0001.npy
+        ...
+
+The last three axes are always year (observation year), cohort
+(construction year) and building_type. Chunks are written one at a time
+and read back as memory maps, so a state × 120-year × 120-cohort × type
+cube can be sliced without ever holding it all in RAM.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+META_FILE = 'cube.json'
+
+
+# ============================================================================
+# WRITING
+# ============================================================================
+
+def _cube_block(inflows: np.ndarray, curves: np.ndarray, obs_index: np.ndarray,
+                n_years: int) -> np.ndarray:
+    """
+    Cohort stock for a block of observation years.
+
+    Args:
+        inflows: Inflows [..., building_type, cohort]
+        curves: Survival curves [building_type, age]
+        obs_index: Observation year positions in the block
+        n_years: Number of cohorts
+
+    Returns:
+        Array [..., obs_year, cohort, building_type]
+    """
+    ages = obs_index[:, None] - np.arange(n_years)[None, :]   # [obs × cohort]
+    survival = np.where(ages >= 0, curves[:, np.clip(ages, 0, None)], 0.0)  # [type × obs × cohort]
+    block = inflows[..., :, None, :] * survival                 # [..., type, obs, cohort]
+    return np.moveaxis(block, -3, -1)
+
+
+def write_cohort_cube(path: str, inflows: np.ndarray, curves: np.ndarray,
+                      years: Sequence[int], building_types: Sequence[str],
+                      lead_coords: Dict[str, Sequence] = None,
+                      chunk_size: int = None, dtype: str = 'float32') -> Path:
+    """
+    Compute the cohort stock cube chunk by chunk and write it to disk.
+
+    Args:
+        path: Cube directory (created or overwritten)
+        inflows: Inflows [..., building_type, year]
+        curves: Survival curves [building_type, age] covering all years
+        years: Year labels (used for both the year and cohort axes)
+        building_types: Building type labels
+        lead_coords: Names and labels of any leading axes of `inflows`,
+                     e.g. {'state': ['AL', 'AK', ...]}
+        chunk_size: Entries of the first axis per chunk (default: one
+                    leading unit, or 10 observation years for a national cube)
+        dtype: Storage dtype
+
+    Returns:
+        Path of the cube directory
+    """
+    inflows = np.asarray(inflows, dtype=float)
+    curves = np.asarray(curves, dtype=float)
+    n_types, n_years = inflows.shape[-2:]
+    lead_shape = inflows.shape[:-2]
+    shape = lead_shape + (n_years, n_years, n_types)
+
+    lead_coords = lead_coords or {}
+    dims = list(lead_coords) + ['year', 'cohort', 'building_type']
+    coords = dict(lead_coords, year=list(years), cohort=list(years),
+                  building_type=list(building_types))
+    if len(dims) != len(shape):
+        raise ValueError(f"Inflows have {len(lead_shape)} leading axes, "
+                         f"got labels for {list(lead_coords)}")
+    for dim, size in zip(dims, shape):
+        if len(coords[dim]) != size:
+            raise ValueError(f"Axis '{dim}' has {size} entries but {len(coords[dim])} labels")
+
+    if chunk_size is None:
+        chunk_size = 1 if lead_shape else 10
+
+    cube_dir = Path(path)
+    cube_dir.mkdir(parents=True, exist_ok=True)
+    for old in cube_dir.glob('chunk_*.npy'):
+        old.unlink()
+
+    chunks = []
+    for i, start in enumerate(range(0, shape[0], chunk_size)):
+        stop = min(start + chunk_size, shape[0])
+        if lead_shape:
+            block = _cube_block(inflows[start:stop], curves, np.arange(n_years), n_years)
+        else:
+            block = _cube_block(inflows, curves, np.arange(start, stop), n_years)
+
+        name = f'chunk_{i:04d}.npy'
+        out = np.lib.format.open_memmap(cube_dir / name, mode='w+',
+                                        dtype=dtype, shape=block.shape)
+        out[...] = block
+        out.flush()
+        del out
+        chunks.append({'file': name, 'start': start, 'stop': stop})
+
+    meta = {
+        'dims': list(dims),
+        'coords': {dim: [c.item() if hasattr(c, 'item') else c for c in coords[dim]]
+                   for dim in dims},
+        'shape': list(shape),
+        'dtype': dtype,
+        'chunks': chunks,
+    }
+    with open(cube_dir / META_FILE, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+    return cube_dir
+
+
+# ============================================================================
+# READING
+# ============================================================================
+
+class CohortCube:
+    """
+    Lazy, label-indexed reader for a cube written by write_cohort_cube.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Cube directory
+        """
+        self.path = Path(path)
+        with open(self.path / META_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.dims: List[str] = meta['dims']
+        self.coords: Dict[str, list] = meta['coords']
+        self.shape = tuple(meta['shape'])
+        self.dtype = np.dtype(meta['dtype'])
+        self._chunks = meta['chunks']
+        self._maps = {}
+
+    def _chunk(self, i: int) -> np.memmap:
+        """Memory map of one chunk, opened on first use."""
+        if i not in self._maps:
+            self._maps[i] = np.load(self.path / self._chunks[i]['file'], mmap_mode='r')
+        return self._maps[i]
+
+    def _indexer(self, dim: str, label):
+        """Translate a label, list of labels or label slice to positions."""
+        values = self.coords[dim]
+        if isinstance(label, slice):
+            positions = [i for i, v in enumerate(values)
+                         if (label.start is None or v >= label.start)
+                         and (label.stop is None or v <= label.stop)]
+            return np.array(positions, dtype=int)
+        if isinstance(label, (list, tuple, np.ndarray)):
+            return np.array([values.index(v) for v in label], dtype=int)
+        return values.index(label)
+
+    def sel(self, **labels) -> np.ndarray:
+        """
+        Select by coordinate labels, reading only the chunks needed.
+
+        Scalars drop their axis; lists and slices (inclusive of both ends)
+        keep it. Example: cube.sel(state='CA', year=slice(2000, 2024))
+
+        Returns:
+            Array with the remaining axes in cube order
+        """
+        unknown = set(labels) - set(self.dims)
+        if unknown:
+            raise KeyError(f"Unknown dims: {sorted(unknown)}")
+
+        index = [self._indexer(dim, labels[dim]) if dim in labels else slice(None)
+                 for dim in self.dims]
+
+        first = index[0]
+        if isinstance(first, slice):
+            first = np.arange(self.shape[0])
+        first = np.atleast_1d(first)
+
+        # Read the selected rows of the first axis from each chunk they fall in
+        pieces = []
+        rest = tuple(np.ix_(*[np.atleast_1d(i) if not isinstance(i, slice)
+                              else np.arange(n) for i, n in zip(index[1:], self.shape[1:])]))
+        for position in first:
+            for i, chunk in enumerate(self._chunks):
+                if chunk['start'] <= position < chunk['stop']:
+                    pieces.append(np.asarray(self._chunk(i)[position - chunk['start']][rest]))
+                    break
+        result = np.stack(pieces)
+
+        # Drop axes selected by scalar label
+        drop = [axis for axis, i in enumerate(index) if np.isscalar(i)]
+        return result.reshape([n for axis, n in enumerate(result.shape) if axis not in drop])
+
+    def stock(self, **labels) -> np.ndarray:
+        """Selection summed over cohorts (total stock by observation year)."""
+        if 'cohort' in labels:
+            raise ValueError("stock() sums over all cohorts; use sel() for cohort slices")
+        remaining = [dim for dim in self.dims
+                     if dim not in labels or not np.isscalar(self._indexer(dim, labels[dim]))]
+        return self.sel(**labels).sum(axis=remaining.index('cohort'))
@@ -14,9 +14,20 @@ Approach: Stock = Σ[Inflow(t) × Survival(year, t)]
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from scipy.stats import weibull_min, norm
 from typing import Dict, Tuple
 
+from lifetime_distributions import survival_probability
+from survival_tables import SurvivalTable, survival_curve
+from stock_engine import (calculate_stock_flows, solve_inflows,
+                          steady_state_cohorts)
+from acs_data import load_housing_units
+from cement_data import load_historical_production, load_national_production
+from incremental import StockState, update_state
+from monte_carlo import run_monte_carlo, percentile_bands
+from sensitivity import run_sobol, run_morris
+from scenario_runner import load_scenario_grid, run_scenario_grid
+from state_model import run_state_model
+
 # ============================================================================
 # CONFIGURATION PARAMETERS
 # ============================================================================
@@ -25,6 +36,9 @@ from typing import Dict, Tuple
 CURRENT_YEAR = 2024
 
 # Building lifetime parameters (in years)
+# Each type may name its own family via 'distribution' ('normal' by default,
+# also 'weibull' (shape, scale), 'lognormal' (mean, std), 'gamma' (shape, scale));
+# see lifetime_distributions.py
 LIFETIMES = {
     'residential': {'mean': 70, 'std': 20},      # Single family, multi-family
     'commercial': {'mean': 60, 'std': 15},       # Office, retail, warehouse
@@ -48,46 +62,82 @@ BUILDING_FRACTION = 0.55  # 55% to buildings, 45% to infrastructure
 # Concrete to cement ratio (typically 1 ton cement makes ~5-6 tons of concrete)
 CONCRETE_TO_CEMENT_RATIO = 5.5  # tons concrete per ton cement
 
+# Uncertainty in the point estimates above, used by the Monte Carlo mode
+# (see monte_carlo.py for the spec format)
+PARAMETER_DISTRIBUTIONS = {
+    'concrete_to_cement_ratio': {'dist': 'triangular', 'left': 5.0, 'mode': 5.5, 'right': 6.5},
+    'building_fraction': {'dist': 'uniform', 'low': 0.50, 'high': 0.60},
+    'lifetimes': {
+        'residential': {'mean': {'dist': 'normal', 'loc': 70, 'scale': 7},
+                        'std': {'dist': 'uniform', 'low': 15, 'high': 25}},
+        'commercial': {'mean': {'dist': 'normal', 'loc': 60, 'scale': 6},
+                       'std': {'dist': 'uniform', 'low': 10, 'high': 20}},
+        'institutional': {'mean': {'dist': 'normal', 'loc': 75, 'scale': 7.5},
+                          'std': {'dist': 'uniform', 'low': 15, 'high': 25}},
+        'industrial': {'mean': {'dist': 'normal', 'loc': 50, 'scale': 5},
+                       'std': {'dist': 'uniform', 'low': 10, 'high': 20}},
+    },
+    'spending_fractions': {'dist': 'dirichlet', 'concentration': 100},
+}
+
+# Parameter ranges for global sensitivity analysis (see sensitivity.py);
+# 'fractions.<type>' scales that type's spending fraction before renormalizing
+SENSITIVITY_BOUNDS = {
+    'concrete_to_cement_ratio': (5.0, 6.5),
+    'building_fraction': (0.45, 0.65),
+    'lifetimes.residential.mean': (55, 85),
+    'lifetimes.residential.std': (10, 30),
+    'lifetimes.commercial.mean': (45, 75),
+    'lifetimes.commercial.std': (8, 25),
+    'lifetimes.institutional.mean': (60, 90),
+    'lifetimes.institutional.std': (10, 30),
+    'lifetimes.industrial.mean': (35, 65),
+    'lifetimes.industrial.std': (8, 25),
+    'fractions.residential': (0.8, 1.2),
+    'fractions.commercial': (0.8, 1.2),
+    'fractions.institutional': (0.8, 1.2),
+    'fractions.industrial': (0.8, 1.2),
+}
+
 
 # ============================================================================
 # DATA LOADING FUNCTIONS
 # ============================================================================
 
-def load_usgs_cement_data() -> pd.DataFrame:
+def load_usgs_cement_data(source: str = 'sample') -> pd.DataFrame:
     """
-    Load historical cement production data from USGS.
+    Load historical cement production data.
     
-    For now, returns sample data. Replace with actual USGS data loading.
+    'ghgp' builds the series from the EPA GHGP facility files in
+    data/clinker_data/cleaned_data (2011 onward), splices the long-run
+    historical series in for earlier years and extrapolates past the last
+    GHGP year with the historical trend (see cement_data.py).
+    'sample' uses the approximate historical series alone.
     Data source: https://www.usgs.gov/centers/national-minerals-information-center/cement-statistics-and-information
     
+    Args:
+        source: 'ghgp' or 'sample'
+    
     Returns:
         DataFrame with columns: year, production_mt (million metric tons)
     """
-    # Sample data from USGS Mineral Commodity Summaries
-    # You should replace this with actual historical data
-    sample_data = {
-        'year': list(range(1950, 2025)),
-        'production_mt': [
-            # 1950s - post-WWII construction boom
-            *[40 + i*1.5 for i in range(10)],
-            # 1960s - sustained growth
-            *[55 + i*2 for i in range(10)],
-            # 1970s - oil crisis slowdown
-            *[75 + i*0.5 for i in range(10)],
-            # 1980s - recovery
-            *[80 + i*1 for i in range(10)],
-            # 1990s - strong growth
-            *[90 + i*0.8 for i in range(10)],
-            # 2000s - peak then recession
-            *[98, 99.3, 97, 95, 94, 92, 90, 85, 75, 65],
-            # 2010s - recovery
-            *[66, 67, 71, 76, 81, 84, 86, 87, 88, 87],
-            # 2020s - recent
-            *[83, 90, 91, 93, 90]
-        ]
-    }
+    if source == 'ghgp':
+        df = load_national_production()
+        ghgp_years = df.loc[df['source'] == 'ghgp', 'year']
+        print(f"GHGP facility data for {ghgp_years.min()}-{ghgp_years.max()}, "
+              f"historical series before {ghgp_years.min()}")
+        extrapolated = df.loc[df['source'] == 'extrapolated', 'year']
+        if len(extrapolated) > 0:
+            span = (f"{extrapolated.min()}" if len(extrapolated) == 1
+                    else f"{extrapolated.min()}-{extrapolated.max()}")
+            print(f"Extrapolated {span} from {ghgp_years.max()} GHGP production "
+                  f"with the historical trend")
+        df = df[['year', 'production_mt']]
+    elif source == 'sample':
+        df = load_historical_production()
+    else:
+        raise ValueError(f"Unknown cement data source: {source}")
     
-    df = pd.DataFrame(sample_data)
     print(f"Loaded cement production data for {len(df)} years")
     print(f"Total cumulative production: {df['production_mt'].sum():.1f} million metric tons")
     return df
@@ -129,23 +179,27 @@ def survival_function(age: int, lifetime_params: Dict) -> float:
     """
     Calculate survival probability for a building of given age.
     
-    Uses a normal distribution for building lifetime.
-    Could also use Weibull distribution for more flexibility.
+    Uses the lifetime distribution family named in lifetime_params
+    (normal unless 'distribution' says otherwise).
+    
+    Whole-year ages read from the cached survival curve (see
+    survival_tables.py), so repeated calls for the same lifetime parameters
+    never hit scipy; fractional ages are evaluated directly and negative
+    ages (not yet built) count as standing.
     
     Args:
         age: Age of building in years
-        lifetime_params: Dict with 'mean' and 'std' for lifetime distribution
+        lifetime_params: LIFETIMES entry for one building type
         
     Returns:
         Probability that building is still standing (0 to 1)
     """
-    mean_life = lifetime_params['mean']
-    std_life = lifetime_params['std']
-    
-    # Survival = P(lifetime > age) = 1 - CDF(age)
-    survival_prob = 1 - norm.cdf(age, loc=mean_life, scale=std_life)
-    
-    return max(0, survival_prob)  # Ensure non-negative
+    if age < 0:
+        return 1.0
+    if age != int(age):
+        return float(survival_probability(age, lifetime_params))
+    age = int(age)
+    return float(survival_curve(lifetime_params, age)[age])
 
 
 def calculate_survival_matrix(current_year: int, start_year: int,
@@ -161,18 +215,8 @@ def calculate_survival_matrix(current_year: int, start_year: int,
     Returns:
         DataFrame with survival probabilities [year_built × building_type]
     """
-    years = range(start_year, current_year + 1)
-    survival_data = {}
-    
-    for building_type, life_params in lifetimes.items():
-        survival_probs = []
-        for year_built in years:
-            age = current_year - year_built
-            survival_probs.append(survival_function(age, life_params))
-        survival_data[building_type] = survival_probs
-    
-    df = pd.DataFrame(survival_data, index=years)
-    df.index.name = 'year_built'
+    table = SurvivalTable(lifetimes, max_age=current_year - start_year)
+    df = table.matrix(current_year, start_year)
     
     print(f"\nCalculated survival probabilities:")
     print(f"Example - building built in 1970 (age {current_year - 1970}):")
@@ -239,19 +283,15 @@ def calculate_stock(inflows: pd.DataFrame, survival_matrix: pd.DataFrame,
     stocks = {}
     building_types = ['residential', 'commercial', 'institutional', 'industrial']
     
-    for btype in building_types:
-        # Get inflows and survival probabilities for this building type
-        inflow_col = f'{btype}_concrete_mt'
-        
-        # Calculate stock: sum of (inflow × survival) for all past years
-        stock = 0
-        for year in inflows['year']:
-            if year in survival_matrix.index:
-                inflow = inflows.loc[inflows['year'] == year, inflow_col].values[0]
-                survival = survival_matrix.loc[year, btype]
-                stock += inflow * survival
-        
-        stocks[btype] = stock
+    # Align inflows with the survival matrix by construction year;
+    # years outside the matrix contribute nothing
+    survival = survival_matrix.reindex(inflows['year'])[building_types].fillna(0.0)
+    inflow_values = inflows[[f'{btype}_concrete_mt' for btype in building_types]].to_numpy()
+    
+    # Calculate stock: sum of (inflow × survival) for all past years
+    totals = (inflow_values * survival.to_numpy()).sum(axis=0)
+    for btype, stock in zip(building_types, totals):
+        stocks[btype] = float(stock)
     
     stocks['total'] = sum(stocks.values())
     
@@ -281,34 +321,25 @@ def print_stock_summary(stocks: Dict, current_year: int):
 
 
 def calculate_stock_timeseries(inflows: pd.DataFrame, survival_matrix: pd.DataFrame,
-                               start_year: int, end_year: int) -> pd.DataFrame:
-    """Calculate stock for each year in the time series."""
-    years = range(start_year, end_year + 1)
+                               start_year: int, end_year: int,
+                               cohort_cube: str = None) -> pd.DataFrame:
+    """
+    Calculate stock for each year in the time series.
+    
+    Runs the convolution engine (see stock_engine.py) for all building types
+    at once; use calculate_stock_flows directly for inflows and outflows.
+    If cohort_cube is given, the cohort-resolved stock is also written there.
+    """
     building_types = ['residential', 'commercial', 'institutional', 'industrial']
+    flows = calculate_stock_flows(inflows, {bt: LIFETIMES[bt] for bt in building_types},
+                                  start_year, end_year, cohort_cube=cohort_cube)
     
-    results = []
-    for year in years:
-        year_stocks = {'year': year}
-        
-        for btype in building_types:
-            inflow_col = f'{btype}_concrete_mt'
-            stock = 0
-            
-            # Sum contributions from all past years still standing
-            for built_year in inflows['year']:
-                if built_year <= year:
-                    age = year - built_year
-                    inflow = inflows.loc[inflows['year'] == built_year, inflow_col].values[0]
-                    # Recalculate survival for this specific year
-                    survival = survival_function(age, LIFETIMES[btype])
-                    stock += inflow * survival
-            
-            year_stocks[btype] = stock
-        
-        year_stocks['total'] = sum(year_stocks[k] for k in building_types)
-        results.append(year_stocks)
+    results = flows[['year']].copy()
+    for btype in building_types:
+        results[btype] = flows[f'{btype}_stock']
+    results['total'] = results[building_types].sum(axis=1)
     
-    return pd.DataFrame(results)
+    return results
 
 
 def plot_results(stock_timeseries: pd.DataFrame, inflows: pd.DataFrame):
@@ -360,19 +391,284 @@ def plot_results(stock_timeseries: pd.DataFrame, inflows: pd.DataFrame):
     print("Saved visualization to concrete_stock_analysis.png")
 
 
+def build_model_inputs(inflows: pd.DataFrame, building_types: list) -> Dict:
+    """
+    Collect the point-estimate model inputs for the batched array kernels
+    (Monte Carlo and sensitivity analysis).
+    
+    Args:
+        inflows: Output of calculate_concrete_inflows
+        building_types: Building types to model
+        
+    Returns:
+        Dictionary of base inputs (see monte_carlo.run_monte_carlo)
+    """
+    return {
+        'building_types': building_types,
+        'production': inflows['production_mt'].to_numpy(),
+        'fractions': inflows[[f'{bt}_fraction' for bt in building_types]].to_numpy(),
+        'lifetimes': {bt: LIFETIMES[bt] for bt in building_types},
+        'concrete_to_cement_ratio': CONCRETE_TO_CEMENT_RATIO,
+        'building_fraction': BUILDING_FRACTION,
+    }
+
+
+def run_uncertainty_analysis(inflows: pd.DataFrame, n_draws: int, seed: int = 0,
+                             workers: int = None) -> pd.DataFrame:
+    """
+    Monte Carlo percentile bands for the stock time series.
+    
+    Samples PARAMETER_DISTRIBUTIONS around the point estimates and evaluates
+    all draws in batched array form (see monte_carlo.py).
+    
+    Args:
+        inflows: Output of calculate_concrete_inflows
+        n_draws: Number of Monte Carlo draws
+        seed: Root random seed
+        workers: Worker processes (None = all cores)
+        
+    Returns:
+        DataFrame with {type}_p{q} percentile columns by year
+    """
+    building_types = ['residential', 'commercial', 'institutional', 'industrial']
+    base = build_model_inputs(inflows, building_types)
+    
+    stocks = run_monte_carlo(base, PARAMETER_DISTRIBUTIONS, n_draws,
+                             seed=seed, workers=workers)
+    bands = percentile_bands(stocks, inflows['year'], building_types)
+    
+    latest = bands.iloc[-1]
+    print(f"Evaluated {n_draws:,} draws")
+    print(f"Total stock {int(latest['year'])}: {latest['total_p50']:,.0f} million metric tons "
+          f"(95% interval {latest['total_p2.5']:,.0f} - {latest['total_p97.5']:,.0f})")
+    
+    return bands
+
+
+def run_sensitivity_analysis(inflows: pd.DataFrame, method: str = 'sobol',
+                             n_samples: int = 1024, seed: int = 0,
+                             workers: int = None) -> pd.DataFrame:
+    """
+    Global sensitivity of the current-year stock to SENSITIVITY_BOUNDS.
+    
+    Args:
+        inflows: Output of calculate_concrete_inflows
+        method: 'sobol' (first-order and total indices) or 'morris'
+        n_samples: Sobol base sample size or number of Morris trajectories
+        seed: Random seed for the design
+        workers: Worker processes (None = all cores)
+        
+    Returns:
+        Long table of indices per building type and parameter
+    """
+    building_types = ['residential', 'commercial', 'institutional', 'industrial']
+    base = build_model_inputs(inflows, building_types)
+    
+    if method == 'sobol':
+        indices = run_sobol(base, SENSITIVITY_BOUNDS, n_base=n_samples,
+                            seed=seed, workers=workers)
+        rank_by = 'ST'
+    elif method == 'morris':
+        indices = run_morris(base, SENSITIVITY_BOUNDS, n_trajectories=n_samples,
+                             seed=seed, workers=workers)
+        rank_by = 'mu_star'
+    else:
+        raise ValueError(f"Unknown sensitivity method: {method}")
+    
+    top = indices[indices['output'] == 'total'].nlargest(5, rank_by)
+    print(f"Most influential parameters for total stock ({rank_by}):")
+    for _, row in top.iterrows():
+        print(f"  {row['parameter']:<32} {row[rank_by]:>10.3f}")
+    
+    return indices
+
+
+def run_scenarios(inflows: pd.DataFrame, grid_file: str,
+                  output_dir: str = 'scenario_results', workers: int = None) -> pd.DataFrame:
+    """
+    Run every scenario in a grid file against the loaded data.
+    
+    Scenarios override the configuration constants above (see
+    scenario_runner.py); results go to a Parquet dataset partitioned by
+    scenario id instead of concrete_stock_results.csv.
+    
+    Args:
+        inflows: Output of calculate_concrete_inflows
+        grid_file: JSON grid file
+        output_dir: Parquet dataset directory
+        workers: Worker processes (None = all cores)
+        
+    Returns:
+        Summary with one row per scenario
+    """
+    building_types = ['residential', 'commercial', 'institutional', 'industrial']
+    base = build_model_inputs(inflows, building_types)
+    base['years'] = inflows['year'].to_numpy()
+    base['current_year'] = CURRENT_YEAR
+    
+    scenarios = load_scenario_grid(grid_file)
+    print(f"Running {len(scenarios)} scenarios from {grid_file}")
+    summary = run_scenario_grid(base, scenarios, output_dir=output_dir, workers=workers)
+    print(f"Wrote {summary['rows'].sum():,} rows to {output_dir}/")
+    
+    return summary
+
+
+def calculate_housing_flows(max_age: int = 200) -> pd.DataFrame:
+    """
+    Stock-driven housing flows by state from the ACS housing-unit series.
+    
+    Treats the observed housing units as the stock trajectory and solves for
+    the construction (inflow) and demolition (outflow) it implies under the
+    residential lifetime distribution. The first ACS year is taken as a
+    steady-state stock whose age profile follows the survival curve.
+    
+    Args:
+        max_age: Oldest age in the assumed initial age profile
+        
+    Returns:
+        DataFrame with state, year, housing units, new units, demolished
+        units and net additions
+    """
+    units = load_housing_units()
+    stock = units.pivot(index='state_fips', columns='year', values='housing_units')
+    names = units.drop_duplicates('state_fips').set_index('state_fips')['state_name']
+    years = stock.columns.to_numpy()
+    
+    curve = SurvivalTable({'residential': LIFETIMES['residential']},
+                          max_age=max_age + len(years)).curve('residential')
+    initial = steady_state_cohorts(stock[years[0]].to_numpy(), curve[:max_age + 1])
+    flows = solve_inflows(stock[years[1:]].to_numpy(), curve, initial_cohorts=initial)
+    
+    results = []
+    for i, year in enumerate(years[1:]):
+        results.append(pd.DataFrame({
+            'state_fips': stock.index,
+            'state_name': names.reindex(stock.index).values,
+            'year': year,
+            'housing_units': flows['stock'][:, i],
+            'new_units': flows['inflow'][:, i],
+            'demolished_units': flows['outflow'][:, i],
+            'net_additions': flows['net_additions'][:, i],
+        }))
+    df = pd.concat(results, ignore_index=True)
+    
+    print(f"Solved housing flows for {stock.shape[0]} states, {years[1]}-{years[-1]}")
+    for year, group in df.groupby('year'):
+        print(f"  {year}: {group['new_units'].sum():>12,.0f} new units, "
+              f"{group['demolished_units'].sum():>10,.0f} demolished")
+    negative = df[df['new_units'] < 0]
+    if len(negative) > 0:
+        print(f"  Warning: {len(negative)} state-years need negative construction "
+              f"(stock shrinks faster than the lifetime distribution allows)")
+    
+    return df
+
+
+def calculate_state_stocks(inflows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stock-flow time series for every state (see state_model.py).
+    
+    National inflows are distributed by blended state shares of GHGP cement
+    production and ACS housing units, and all states are run as one batch.
+    
+    Args:
+        inflows: Output of calculate_concrete_inflows
+        
+    Returns:
+        Long table by state, year and building type
+    """
+    building_types = ['residential', 'commercial', 'institutional', 'industrial']
+    lifetimes = {bt: LIFETIMES[bt] for bt in building_types}
+    df = run_state_model(inflows[inflows['year'] <= CURRENT_YEAR], lifetimes)
+    
+    current = (df[df['year'] == CURRENT_YEAR]
+               .groupby('state')['stock'].sum()
+               .sort_values(ascending=False))
+    print(f"Ran {df['state'].nunique()} states, {df['year'].min()}-{df['year'].max()}")
+    print(f"Largest {CURRENT_YEAR} stocks:")
+    for state, stock in current.head(5).items():
+        print(f"  {state}: {stock:>10,.1f} million metric tons")
+    
+    return df
+
+
+def update_stock_incrementally(inflows: pd.DataFrame, state_file: str,
+                               verify: bool = False) -> Tuple[Dict, pd.DataFrame]:
+    """
+    Apply only the inflow years newer than a persisted engine state.
+    
+    The first run builds the state with a full computation; later runs age
+    the stored cohorts one year per new data year (see incremental.py).
+    
+    Args:
+        inflows: Output of calculate_concrete_inflows
+        state_file: .npz state file (created if missing)
+        verify: Check the result against a full recompute
+        
+    Returns:
+        (stock by building type in the latest year, flows for each new year)
+    """
+    building_types = ['residential', 'commercial', 'institutional', 'industrial']
+    lifetimes = {bt: LIFETIMES[bt] for bt in building_types}
+    
+    new_flows = update_state(state_file, inflows, lifetimes, verify=verify)
+    state = StockState.load(state_file)
+    
+    if len(new_flows) > 0:
+        print(f"Applied {len(new_flows)} new year(s): "
+              f"{new_flows['year'].min()}-{new_flows['year'].max()}")
+    else:
+        print(f"State in {state_file} is current through {state.last_year}")
+    if verify:
+        print("Verified against full recompute")
+    
+    stocks = {bt: float(v) for bt, v in state.stock().items()}
+    stocks['total'] = sum(stocks.values())
+    return stocks, new_flows
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
 
-def main():
-    """Main execution function."""
+def main(monte_carlo_draws: int = 0, sensitivity: str = None,
+         sensitivity_samples: int = 1024, scenario_file: str = None,
+         scenario_output: str = 'scenario_results', stock_driven: bool = False,
+         cohort_cube: str = None, incremental_state: str = None,
+         verify: bool = False, seed: int = 0, workers: int = None,
+         cement_source: str = 'sample', state_level: bool = False):
+    """
+    Main execution function.
+    
+    Args:
+        monte_carlo_draws: If > 0, add Monte Carlo percentile bands with
+                           this many draws to the saved results
+        sensitivity: 'sobol' or 'morris' to run a global sensitivity analysis
+        sensitivity_samples: Sobol base sample size or Morris trajectories
+        scenario_file: JSON grid of scenarios to run (see scenario_runner.py)
+        scenario_output: Parquet dataset directory for scenario results
+        stock_driven: Also solve the stock-driven housing model from ACS data
+        cohort_cube: Directory to write the cohort-resolved stock cube to
+        incremental_state: .npz engine state file; when given, only years
+                           newer than the stored state are computed and the
+                           full time series, plots and CSV are skipped
+        verify: Check the incremental update against a full recompute
+        seed: Root random seed for the Monte Carlo and sensitivity modes
+        workers: Worker processes for the batched modes (None = all cores)
+        cement_source: 'sample' (approximate historical series) or 'ghgp'
+                       (GHGP facility data from 2011, history before);
+                       GHGP covers reporting facilities only, so 'ghgp'
+                       gives a lower stock
+        state_level: Also run the batched per-state stock model
+    """
     print("=" * 70)
     print("TOP-DOWN CONCRETE STOCK ESTIMATION FOR US BUILDINGS")
     print("=" * 70)
     
     # Load data
     print("\n1. Loading data...")
-    cement_data = load_usgs_cement_data()
+    cement_data = load_usgs_cement_data(cement_source)
     spending_data = load_construction_spending()
     
     # Calculate survival probabilities
@@ -384,6 +680,12 @@ def main():
     print("\n3. Calculating concrete inflows to buildings...")
     inflows = calculate_concrete_inflows(cement_data, spending_data)
     
+    if incremental_state:
+        print("\n4. Updating stock state incrementally...")
+        stocks, new_flows = update_stock_incrementally(inflows, incremental_state, verify)
+        print_stock_summary(stocks, CURRENT_YEAR)
+        return stocks, new_flows, inflows
+    
     # Calculate current stock
     print("\n4. Calculating current concrete stock...")
     stocks = calculate_stock(inflows, survival_matrix, CURRENT_YEAR)
@@ -394,12 +696,46 @@ def main():
     # Calculate time series
     print("5. Calculating historical stock time series...")
     stock_timeseries = calculate_stock_timeseries(inflows, survival_matrix, 
-                                                   start_year, CURRENT_YEAR)
+                                                   start_year, CURRENT_YEAR,
+                                                   cohort_cube=cohort_cube)
+    if cohort_cube:
+        print(f"Saved cohort-resolved stock cube to {cohort_cube}/")
     
     # Create visualizations
     print("\n6. Creating visualizations...")
     plot_results(stock_timeseries, inflows)
     
+    # Uncertainty bands
+    if monte_carlo_draws > 0:
+        print("\n7. Running Monte Carlo uncertainty analysis...")
+        bands = run_uncertainty_analysis(inflows, monte_carlo_draws,
+                                         seed=seed, workers=workers)
+        stock_timeseries = stock_timeseries.merge(bands, on='year', how='left')
+    
+    if sensitivity:
+        print(f"\n8. Running {sensitivity} sensitivity analysis...")
+        indices = run_sensitivity_analysis(inflows, method=sensitivity,
+                                           n_samples=sensitivity_samples,
+                                           seed=seed, workers=workers)
+        indices.to_csv('concrete_stock_sensitivity.csv', index=False)
+        print("Saved sensitivity indices to concrete_stock_sensitivity.csv")
+    
+    if scenario_file:
+        print("\n9. Running scenario grid...")
+        run_scenarios(inflows, scenario_file, output_dir=scenario_output, workers=workers)
+    
+    if stock_driven:
+        print("\n10. Solving stock-driven housing flows...")
+        housing_flows = calculate_housing_flows()
+        housing_flows.to_csv('housing_stock_driven_results.csv', index=False)
+        print("Saved housing flows to housing_stock_driven_results.csv")
+    
+    if state_level:
+        print("\n11. Running state-level stock model...")
+        state_stocks = calculate_state_stocks(inflows)
+        state_stocks.to_csv('concrete_stock_by_state.csv', index=False)
+        print("Saved state results to concrete_stock_by_state.csv")
+    
     # Save detailed results
     output_file = 'concrete_stock_results.csv'
     stock_timeseries.to_csv(output_file, index=False)
@@ -413,4 +749,47 @@ def main():
 
 
 if __name__ == "__main__":
-    stocks, stock_timeseries, inflows = main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Top-down concrete stock estimation for US buildings')
+    parser.add_argument('--monte-carlo', type=int, default=0, metavar='N',
+                        help='Add percentile bands from N Monte Carlo draws (default: off)')
+    parser.add_argument('--sensitivity', choices=['sobol', 'morris'], default=None,
+                        help='Run a global sensitivity analysis of the current-year stock')
+    parser.add_argument('--sensitivity-samples', type=int, default=1024, metavar='N',
+                        help='Sobol base sample size or Morris trajectories (default: 1024)')
+    parser.add_argument('--scenarios', default=None, metavar='GRID_FILE',
+                        help='Run every scenario in a JSON grid file (see scenario_runner.py)')
+    parser.add_argument('--scenario-output', default='scenario_results', metavar='DIR',
+                        help='Parquet dataset directory for scenario results (default: scenario_results)')
+    parser.add_argument('--stock-driven', action='store_true',
+                        help='Solve stock-driven housing flows from the ACS housing-unit files')
+    parser.add_argument('--cohort-cube', default=None, metavar='DIR',
+                        help='Write the [year x cohort x type] stock cube to DIR (see cohort_cube.py)')
+    parser.add_argument('--incremental', default=None, metavar='STATE_FILE',
+                        help='Only compute years newer than the engine state in STATE_FILE (.npz)')
+    parser.add_argument('--verify', action='store_true',
+                        help='Check an incremental update against a full recompute')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed for Monte Carlo draws and sensitivity designs')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for batched modes (default: all cores)')
+    parser.add_argument('--cement-source', choices=['ghgp', 'sample'], default='sample',
+                        help='Cement production series: the approximate sample series, '
+                             'or GHGP facility data spliced with history')
+    parser.add_argument('--states', action='store_true',
+                        help='Also run the stock model for every state as one batch')
+    args = parser.parse_args()
+    
+    stocks, stock_timeseries, inflows = main(monte_carlo_draws=args.monte_carlo,
+                                             sensitivity=args.sensitivity,
+                                             sensitivity_samples=args.sensitivity_samples,
+                                             scenario_file=args.scenarios,
+                                             scenario_output=args.scenario_output,
+                                             stock_driven=args.stock_driven,
+                                             cohort_cube=args.cohort_cube,
+                                             incremental_state=args.incremental,
+                                             verify=args.verify,
+                                             seed=args.seed, workers=args.workers,
+                                             cement_source=args.cement_source,
+                                             state_level=args.states)
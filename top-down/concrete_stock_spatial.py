@@ -21,6 +21,16 @@ import geopandas as gpd
 from typing import Dict, List, Tuple
 import seaborn as sns
 
+from acs_data import STATE_FIPS
+from footprint_data import accumulate_footprints
+from permit_data import permit_history
+from spatial_allocation import (DEFAULT_PERCENTILES, METHOD_WEIGHTS, PROXY_COLUMNS,
+                                MatrixAllocator, allocation_percentiles, default_priors,
+                                dirichlet_weights, survival_weighted_history, weight_matrix)
+from spatial_proxies import load_proxy_table
+from weight_calibration import calibrate_weights
+from zonal_stats import zones_from_geodataframe
+
 # ============================================================================
 # SPATIAL ALLOCATION METHODS
 # ============================================================================
@@ -91,7 +101,9 @@ class SpatialAllocator:
         allocation_factor = floor_area / floor_area.sum()
         return self.national_stock * allocation_factor
     
-    def allocate_by_construction_spending(self, spending_ts: pd.DataFrame) -> pd.Series:
+    def allocate_by_construction_spending(self, spending_ts: pd.DataFrame,
+                                          lifetime_params: Dict = None,
+                                          current_year: int = 2024) -> pd.Series:
         """
         Historical construction spending-based allocation.
         
@@ -102,14 +114,26 @@ class SpatialAllocator:
         Pro: Captures temporal dynamics
         Con: Requires detailed historical data
         
+        Without lifetime_params every year counts equally; with them each
+        year is weighted by the survival of its cohort in current_year, so
+        a 1960 dollar counts less than a 2020 dollar.
+        
         Args:
             spending_ts: DataFrame with columns for each spatial unit, rows for years
+                         (or months)
+            lifetime_params: Lifetime distribution (same format as LIFETIMES
+                             in concrete-top-down.py)
+            current_year: Year the stock is evaluated in
             
         Returns:
             Allocated stock by spatial unit
         """
-        # Calculate cumulative spending share for each region
-        cumulative_spending = spending_ts.sum(axis=0)  # Sum over time
+        if lifetime_params is None:
+            # Calculate cumulative spending share for each region
+            cumulative_spending = spending_ts.sum(axis=0)  # Sum over time
+        else:
+            cumulative_spending = survival_weighted_history(spending_ts.T, lifetime_params,
+                                                            current_year)
         allocation_factor = cumulative_spending / cumulative_spending.sum()
         return self.national_stock * allocation_factor
     
@@ -122,7 +146,8 @@ class SpatialAllocator:
         Con: Biased toward commercial/industrial, not residential
         
         Args:
-            ntl: Total nighttime light radiance by spatial unit
+            ntl: Total nighttime light radiance by spatial unit, e.g. the
+                 'sum' column of zonal_stats.zonal_stats on a VIIRS raster
             
         Returns:
             Allocated stock by spatial unit
@@ -196,19 +221,62 @@ class SpatialAllocator:
 # ENHANCED MODEL WITH SPATIAL CAPABILITIES
 # ============================================================================
 
-def load_spatial_proxy_data(method: str = 'state') -> pd.DataFrame:
+def measure_floor_area(footprints: List[str], boundaries: str, label_column: str,
+                       height_weighted: bool = False) -> pd.Series:
+    """
+    Measured floor area by spatial unit from building-footprint files.
+    
+    Args:
+        footprints: Footprint files (see footprint_data.py)
+        boundaries: Unit boundary file readable by geopandas
+        label_column: Boundary column identifying units (e.g. 'NAME' or 'GEOID')
+        height_weighted: Multiply footprints by storeys from building height
+        
+    Returns:
+        Floor area (million m²) indexed by unit label
+    """
+    units = gpd.read_file(boundaries).to_crs(epsg=4326)
+    zones = zones_from_geodataframe(units, label_column)
+    measured = accumulate_footprints(footprints, zones, height_weighted=height_weighted)
+    return measured['floor_area_m2'] / 1e6
+
+
+def load_spatial_proxy_data(method: str = 'state', source: str = 'sample',
+                            floor_area: pd.Series = None) -> pd.DataFrame:
     """
     Load proxy data for spatial allocation.
     
     Args:
         method: Geographic resolution ('state', 'county', 'msa')
+        source: 'sample' for the 10-state demo table with population, GDP,
+                floor area and urbanization (state only), or 'census' for
+                the ACS/permit proxy table (see spatial_proxies.py). The
+                census table has housing units, structure mix and permits
+                but no GDP or floor area, and population only when the ACS
+                B01003 files are present (they aren't in the repo), so it
+                supports the 'housing_units', 'permits' and
+                'permit_history' methods; only state-level ACS files are
+                in the repo
+        floor_area: Measured floor area (million m², see measure_floor_area)
+                    indexed by fips (census) or state name (sample); replaces
+                    the estimated floor areas
         
     Returns:
         DataFrame with proxy variables by spatial unit
     """
-    # Sample data - replace with real data sources
-    # For states:
-    if method == 'state':
+    if source == 'census':
+        df = load_proxy_table(level=method)
+        # Names used by the allocation and plotting code
+        df['state'] = df['name']
+        if 'state_abbrev' not in df:
+            df['state_abbrev'] = df['fips'].astype(str)
+        if floor_area is not None:
+            df['floor_area'] = df['fips'].map(floor_area.rename(index=int)).fillna(0).values
+        return df
+    
+    # Sample data for the hybrid demo (GDP, floor area and urbanization
+    # aren't in the Census tables)
+    if source == 'sample' and method == 'state':
         # Top 10 states by population for demo
         states = ['California', 'Texas', 'Florida', 'New York', 'Pennsylvania',
                  'Illinois', 'Ohio', 'Georgia', 'North Carolina', 'Michigan']
@@ -229,11 +297,13 @@ def load_spatial_proxy_data(method: str = 'state') -> pd.DataFrame:
         
         df = pd.DataFrame(data)
         df['state_abbrev'] = ['CA', 'TX', 'FL', 'NY', 'PA', 'IL', 'OH', 'GA', 'NC', 'MI']
+        if floor_area is not None:
+            df['floor_area'] = df['state'].map(floor_area).fillna(0).values
         
         return df
     
     else:
-        raise NotImplementedError(f"Method {method} not yet implemented")
+        raise ValueError(f"No {source} proxy data for method {method}")
 
 
 def calculate_regional_characteristics(proxy_data: pd.DataFrame) -> pd.DataFrame:
@@ -247,6 +317,8 @@ def calculate_regional_characteristics(proxy_data: pd.DataFrame) -> pd.DataFrame
         Enhanced DataFrame with derived metrics
     """
     df = proxy_data.copy()
+    if 'urbanization' not in df:
+        return df
     
     # Population density proxy (using urbanization as proxy)
     df['density_score'] = df['urbanization'] * df['population']
@@ -264,16 +336,49 @@ def calculate_regional_characteristics(proxy_data: pd.DataFrame) -> pd.DataFrame
     return df
 
 
+def _proxy_matrix(proxy_data: pd.DataFrame, method: str = None,
+                  lifetimes: Dict = None, current_year: int = 2024) -> pd.DataFrame:
+    """
+    Stack the proxy columns of a proxy table into a [unit × proxy] matrix.
+    """
+    proxies = proxy_data.reindex(columns=PROXY_COLUMNS).dropna(axis=1, how='all')
+    if 'urbanization' in proxy_data:
+        proxies['urban'] = proxy_data['urbanization'] * proxy_data['population']
+    if method == 'permit_history':
+        if lifetimes is None:
+            raise ValueError("The permit_history method needs lifetimes by building type")
+        # Both proxy tables carry postal codes; the permit history is keyed by FIPS
+        state_fips = proxy_data['state_abbrev'].map(STATE_FIPS)
+        if state_fips.isna().any():
+            raise ValueError("The permit_history method needs state-level proxy data, got units "
+                             f"{list(proxy_data.loc[state_fips.isna(), 'state_abbrev'])}")
+        history = permit_history().reindex(state_fips.astype(int)).fillna(0)
+        for building_type, lifetime_params in lifetimes.items():
+            proxies[f'permit_history_{building_type}'] = survival_weighted_history(
+                history, lifetime_params, current_year).values
+    return proxies
+
+
 def allocate_national_stock(national_stocks: Dict[str, float],
                            proxy_data: pd.DataFrame,
-                           method: str = 'hybrid') -> pd.DataFrame:
+                           method: str = 'hybrid',
+                           lifetimes: Dict = None,
+                           current_year: int = 2024) -> pd.DataFrame:
     """
     Allocate national stock to spatial units.
     
     Args:
         national_stocks: Stock by building type (million metric tons)
         proxy_data: Spatial proxy data
-        method: Allocation method ('population', 'gdp', 'hybrid', etc.)
+        method: Allocation method ('population', 'gdp', 'hybrid',
+                'permit_history', 'calibrated', etc.)
+        lifetimes: Lifetime parameters by building type; required for
+                   'permit_history', which weights each state's permit
+                   history by the survival curve of each building type.
+                   The permit files only cover 2019-2024, where survival
+                   is close to 1 for every type, so for now this is
+                   nearly the same as 'permits' (recent permit totals)
+        current_year: Year the stock is evaluated in
         
     Returns:
         DataFrame with allocated stocks by spatial unit and building type
@@ -283,79 +388,114 @@ def allocate_national_stock(national_stocks: Dict[str, float],
     # Calculate enhanced characteristics
     proxy_data = calculate_regional_characteristics(proxy_data)
     
-    # For each building type, allocate differently
-    for building_type, national_stock in national_stocks.items():
-        if building_type == 'total':
-            continue
-            
-        allocator = SpatialAllocator(national_stock, proxy_data['state'].tolist())
-        
-        if method == 'population':
-            results[f'{building_type}_stock'] = allocator.allocate_by_population(
-                proxy_data['population']
-            )
-        
-        elif method == 'gdp':
-            results[f'{building_type}_stock'] = allocator.allocate_by_gdp(
-                proxy_data['gdp']
-            )
-        
-        elif method == 'floor_area':
-            results[f'{building_type}_stock'] = allocator.allocate_by_floor_area(
-                proxy_data['floor_area']
-            )
-        
-        elif method == 'hybrid':
-            # Different building types use different allocation strategies
-            if building_type == 'residential':
-                # Residential: Population + floor area
-                results[f'{building_type}_stock'] = allocator.allocate_hybrid(
-                    weights={'population': 0.6, 'floor_area': 0.4},
-                    population=proxy_data['population'],
-                    floor_area=proxy_data['floor_area']
-                )
-            elif building_type == 'commercial':
-                # Commercial: GDP + urbanization
-                urban_score = proxy_data['urbanization'] * proxy_data['population']
-                results[f'{building_type}_stock'] = allocator.allocate_hybrid(
-                    weights={'gdp': 0.7, 'urban': 0.3},
-                    gdp=proxy_data['gdp'],
-                    urban=urban_score
-                )
-            elif building_type == 'institutional':
-                # Institutional: Population-based (schools, hospitals serve people)
-                results[f'{building_type}_stock'] = allocator.allocate_by_population(
-                    proxy_data['population']
-                )
-            elif building_type == 'industrial':
-                # Industrial: GDP-based
-                results[f'{building_type}_stock'] = allocator.allocate_by_gdp(
-                    proxy_data['gdp']
-                )
+    if method not in METHOD_WEIGHTS and method != 'calibrated':
+        raise ValueError(f"Unknown allocation method: {method}")
+    
+    # Stack the normalized proxies once and allocate every building type
+    # in one matrix product (see spatial_allocation.py)
+    proxies = _proxy_matrix(proxy_data, method, lifetimes, current_year)
+    building_types = [bt for bt in national_stocks if bt != 'total']
+    if method == 'calibrated':
+        # Weights fitted to observed state data over the proxies this table
+        # has (see weight_calibration.py)
+        weights, diagnostics = calibrate_weights(proxies=list(proxies.columns))
+        print(diagnostics.to_string(index=False))
+        weights = weights.reindex(index=proxies.columns, columns=building_types, fill_value=0.0)
+        totals = weights.sum(axis=0)
+        if not np.allclose(totals, 1.0, atol=1e-3):
+            raise ValueError(f"Calibrated weights must sum to 1.0 per building type, "
+                             f"got {totals.to_dict()}")
+    else:
+        required = {proxy for bt in building_types for proxy in METHOD_WEIGHTS[method][bt]}
+        missing = sorted(required - set(proxies.columns))
+        if missing:
+            raise ValueError(f"Method '{method}' needs proxies {missing} that the proxy table "
+                             f"doesn't have (the census table supports 'housing_units', "
+                             f"'permits' and 'permit_history')")
+        weights = weight_matrix(METHOD_WEIGHTS[method], proxies.columns, building_types)
+    allocated = MatrixAllocator(proxies).allocate(national_stocks, weights)
+    for building_type in building_types:
+        results[f'{building_type}_stock'] = allocated[building_type].values
     
     # Calculate total for each region
     stock_columns = [col for col in results.columns if col.endswith('_stock')]
     results['total_stock'] = results[stock_columns].sum(axis=1)
     
     # Add proxy data for reference
-    results['population'] = proxy_data['population'].values
-    results['gdp'] = proxy_data['gdp'].values
-    results['floor_area'] = proxy_data['floor_area'].values
+    for column in ['population', 'gdp', 'floor_area', 'housing_units']:
+        if column in proxy_data:
+            results[column] = proxy_data[column].values
     
     # Calculate per capita metrics
-    results['stock_per_capita'] = results['total_stock'] / results['population']  # million tons / million people = tons/person
+    if 'population' in results:
+        results['stock_per_capita'] = results['total_stock'] / results['population']  # million tons / million people = tons/person
     
     return results
 
 
+def allocate_ensemble(national_stocks: Dict[str, float],
+                      proxy_data: pd.DataFrame,
+                      priors: Dict[str, Dict[str, float]] = None,
+                      n_draws: int = 2000, seed: int = 0,
+                      percentiles: Tuple[float, ...] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """
+    Allocation percentiles over an ensemble of hybrid weights.
+    
+    Instead of one fixed weight dict per building type, draws n_draws weight
+    matrices from Dirichlet priors and allocates them all in one batched
+    product against the stacked proxies.
+    
+    Args:
+        national_stocks: Stock by building type (million metric tons)
+        proxy_data: Spatial proxy data
+        priors: {building_type: {proxy: concentration}} (default:
+                ENSEMBLE_PRIORS, or a symmetric prior over the available
+                proxies for types whose ENSEMBLE_PRIORS proxies are missing;
+                see spatial_allocation.default_priors)
+        n_draws: Number of weight draws
+        seed: Random seed
+        percentiles: Percentiles to report (0-100)
+        
+    Returns:
+        DataFrame with state, state_abbrev and {type}_stock_p{q} columns
+    """
+    proxy_data = calculate_regional_characteristics(proxy_data)
+    proxies = _proxy_matrix(proxy_data)
+    building_types = [bt for bt in national_stocks if bt != 'total']
+    if priors is None:
+        priors = default_priors(proxies.columns, building_types)
+    missing = {bt: sorted(set(priors[bt]) - set(proxies.columns)) for bt in building_types}
+    missing = {bt: proxies_ for bt, proxies_ in missing.items() if proxies_}
+    if missing:
+        raise ValueError(f"Ensemble priors use proxies the proxy table doesn't have: {missing}; "
+                         f"available: {list(proxies.columns)}")
+    
+    rng = np.random.default_rng(seed)
+    weights = dirichlet_weights(priors, proxies.columns, n_draws, rng, building_types)
+    stocks = [national_stocks[bt] for bt in building_types]
+    allocations = MatrixAllocator(proxies).allocate_batch(stocks, weights)
+    
+    bands = allocation_percentiles(allocations, list(proxies.index), building_types, percentiles)
+    results = proxy_data[['state', 'state_abbrev']].copy()
+    return pd.concat([results, bands.set_axis(results.index)], axis=1)
+
+
 # ============================================================================
 # VISUALIZATION FOR SPATIAL RESULTS
 # ============================================================================
 
+def _require_per_capita(spatial_results: pd.DataFrame):
+    """The report functions need population and per capita stock."""
+    if 'stock_per_capita' not in spatial_results:
+        raise ValueError("Spatial results have no population / stock_per_capita column; "
+                         "allocate with a proxy table that has population (source='sample')")
+
+
 def plot_spatial_distribution(spatial_results: pd.DataFrame):
     """
     Create visualizations of spatial distribution.
     """
+    _require_per_capita(spatial_results)
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
     
     # Sort by total stock for better visualization
@@ -431,6 +571,7 @@ def print_spatial_summary(spatial_results: pd.DataFrame):
     """
     Print summary statistics for spatial distribution.
     """
+    _require_per_capita(spatial_results)
     print("\n" + "="*80)
     print("SPATIAL DISTRIBUTION OF CONCRETE STOCK")
     print("="*80)
@@ -467,9 +608,19 @@ def print_spatial_summary(spatial_results: pd.DataFrame):
 # MAIN EXECUTION
 # ============================================================================
 
-def main():
+def main(ensemble_draws: int = 0, seed: int = 0, footprints: List[str] = None,
+         boundaries: str = None, height_weighted: bool = False):
     """
     Demonstrate spatial allocation.
+    
+    Args:
+        ensemble_draws: If > 0, also save allocation percentiles over this
+                        many Dirichlet draws of the hybrid weights
+        seed: Random seed for the weight ensemble
+        footprints: Building-footprint files; with boundaries, replaces the
+                    estimated floor areas with measured ones
+        boundaries: State boundary file with a NAME column
+        height_weighted: Weight footprints by storeys from building height
     """
     print("="*80)
     print("SPATIAL CONCRETE STOCK ALLOCATION - DEMONSTRATION")
@@ -486,7 +637,14 @@ def main():
     }
     
     print("\n1. Loading spatial proxy data...")
-    proxy_data = load_spatial_proxy_data(method='state')
+    floor_area = None
+    if footprints:
+        if boundaries is None:
+            raise ValueError("Measuring floor area from footprints needs a boundary file")
+        print("   Measuring floor area from building footprints...")
+        floor_area = measure_floor_area(footprints, boundaries, 'NAME', height_weighted)
+    # The hybrid demo needs GDP and floor area, which only the sample table has
+    proxy_data = load_spatial_proxy_data(method='state', source='sample', floor_area=floor_area)
     print(f"   Loaded data for {len(proxy_data)} states")
     
     print("\n2. Allocating national stock spatially...")
@@ -507,6 +665,15 @@ def main():
     spatial_results.to_csv(output_file, index=False)
     print(f"\n5. Saved detailed results to {output_file}")
     
+    if ensemble_draws > 0:
+        print(f"\n6. Allocating {ensemble_draws} Dirichlet weight draws...")
+        bands = allocate_ensemble(national_stocks, proxy_data,
+                                  n_draws=ensemble_draws, seed=seed)
+        bands.to_csv('spatial_concrete_stock_ensemble.csv', index=False)
+        print(bands[['state_abbrev', 'total_stock_p2.5', 'total_stock_p50',
+                     'total_stock_p97.5']].to_string(index=False))
+        print("Saved weight-ensemble percentiles to spatial_concrete_stock_ensemble.csv")
+    
     print("\n" + "="*80)
     print("SPATIAL ALLOCATION COMPLETE")
     print("="*80)
@@ -515,4 +682,20 @@ def main():
 
 
 if __name__ == "__main__":
-    results = main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Spatial allocation of the national concrete stock')
+    parser.add_argument('--ensemble', type=int, default=0, metavar='N',
+                        help='Add allocation percentiles over N Dirichlet draws of the hybrid weights')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed for the weight ensemble')
+    parser.add_argument('--footprints', nargs='+', metavar='FILE',
+                        help='Building-footprint files to measure floor area from')
+    parser.add_argument('--boundaries', metavar='FILE',
+                        help='State boundary file (with a NAME column) for --footprints')
+    parser.add_argument('--height-weighted', action='store_true',
+                        help='Weight footprint area by storeys from building height')
+    args = parser.parse_args()
+    
+    results = main(ensemble_draws=args.ensemble, seed=args.seed, footprints=args.footprints,
+                   boundaries=args.boundaries, height_weighted=args.height_weighted)
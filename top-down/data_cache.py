@@ -0,0 +1,64 @@
+"""
+Source-Hash Keyed Parquet Cache
+===============================
+
+Caches tables assembled from many CSVs as Parquet in a `.cache` directory
+next to the source data. Each cache file has a JSON manifest holding the
+SHA-256 of its source files; the table is rebuilt whenever a source file is
+added, removed or changed.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Callable, List
+
+import pandas as pd
+
+CACHE_DIR_NAME = '.cache'
+
+
+def source_hash(paths: List[Path]) -> str:
+    """SHA-256 over the names and contents of the source files."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(p) for p in paths):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def cached_table(name: str, data_dir: Path, sources: List[Path],
+                 build: Callable[[], pd.DataFrame], use_cache: bool = True) -> pd.DataFrame:
+    """
+    Read `name` from the cache, or build it and write it there.
+
+    Args:
+        name: Cache file stem (e.g. 'cement_production_by_state')
+        data_dir: Directory holding the sources; the cache goes in <data_dir>/.cache
+        sources: Files the table is built from
+        build: Function that assembles the table from the sources
+        use_cache: If False, always build and don't write the cache
+
+    Returns:
+        The cached or freshly built table
+    """
+    if not use_cache:
+        return build()
+
+    digest = source_hash(sources)
+    cache_dir = Path(data_dir) / CACHE_DIR_NAME
+    cache_file = cache_dir / f'{name}.parquet'
+    manifest_file = cache_dir / f'{name}.json'
+
+    if cache_file.exists() and manifest_file.exists():
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            if json.load(f).get('source_hash') == digest:
+                return pd.read_parquet(cache_file)
+
+    df = build()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(cache_file, index=False)
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump({'source_hash': digest,
+                   'sources': sorted(Path(p).name for p in sources)}, f, indent=2)
+    return df
@@ -0,0 +1,324 @@
+"""
+Floor Area from Building Footprints
+===================================
+
+Measures building floor area per spatial unit (state or county) from local
+building-footprint files, replacing the estimated floor areas of the
+sample proxy table.
+
+Footprint files are streamed chunk by chunk, so only one chunk of
+geometries is in memory at a time:
+1. Each chunk of footprint polygons is reduced to centroids, areas (m²)
+   and heights with vectorized shoelace sums.
+2. Centroids are assigned to units with a grid index over the unit
+   polygons' bounding boxes; only the candidate units of a grid cell are
+   tested with point-in-polygon.
+3. Areas (optionally × storeys from the building height) are added per
+   unit with np.bincount.
+
+Supported files:
+- GeoJSON with one feature per line (e.g. Microsoft US Building Footprints
+  state files) or GeoJSON Sequence (.geojsonl, .geojsons, .ndjson)
+- CSV with centroid and area columns (e.g. USA Structures: LONGITUDE,
+  LATITUDE, SQMETERS, HEIGHT)
+
+Coordinates are WGS84 longitude/latitude; areas use a local equirectangular
+projection per footprint, which is accurate to well under 1% at building
+scale.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+import pandas as pd
+from matplotlib.path import Path as MplPath
+
+from zonal_stats import Polygon
+
+FOOTPRINT_DATA_DIR = Path(__file__).resolve().parent.parent / 'data' / 'footprint_data'
+
+CHUNK_SIZE = 100_000
+EARTH_RADIUS = 6_371_008.8  # m
+STOREY_HEIGHT = 3.0  # m
+
+# Accepted CSV column names (case-insensitive), first match wins
+CSV_COLUMNS = {
+    'x': ['longitude', 'lon', 'x'],
+    'y': ['latitude', 'lat', 'y'],
+    'area_m2': ['area_m2', 'sqmeters', 'area'],
+    'height': ['height', 'height_m'],
+}
+
+
+# ============================================================================
+# FOOTPRINT READERS
+# ============================================================================
+
+def _polygons(geometry: Dict) -> List[List]:
+    """Polygon coordinate lists of a GeoJSON Polygon or MultiPolygon."""
+    if geometry is None:
+        return []
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def _ring_measures(rings: List[np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Centroid and absolute area of many rings at once.
+
+    Each ring is projected around its first vertex (x east, y north, in m)
+    and measured with the shoelace formula; segment terms of all rings are
+    summed per ring with np.add.reduceat.
+    """
+    lengths = np.array([len(ring) for ring in rings])
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    coords = np.concatenate(rings).astype(float)
+
+    origin = np.repeat(coords[starts], lengths, axis=0)
+    scale = np.pi / 180 * EARTH_RADIUS
+    x = (coords[:, 0] - origin[:, 0]) * scale * np.cos(np.radians(origin[:, 1]))
+    y = (coords[:, 1] - origin[:, 1]) * scale
+
+    # Next vertex within the same ring (wrapping to the ring's first vertex)
+    following = np.arange(len(coords)) + 1
+    following[starts + lengths - 1] = starts
+    cross = x * y[following] - x[following] * y
+
+    signed = np.add.reduceat(cross, starts) / 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cx = np.add.reduceat((x + x[following]) * cross, starts) / (6 * signed)
+        cy = np.add.reduceat((y + y[following]) * cross, starts) / (6 * signed)
+    # Degenerate rings fall back to their first vertex
+    cx = np.nan_to_num(cx, nan=0.0, posinf=0.0, neginf=0.0)
+    cy = np.nan_to_num(cy, nan=0.0, posinf=0.0, neginf=0.0)
+
+    first = coords[starts]
+    return {
+        'x': first[:, 0] + cx / (scale * np.cos(np.radians(first[:, 1]))),
+        'y': first[:, 1] + cy / scale,
+        'area_m2': np.abs(signed),
+    }
+
+
+def _measure_features(features: List[Dict]) -> pd.DataFrame:
+    """
+    One row per footprint polygon: centroid x, y, area_m2 and height.
+
+    Holes are subtracted from the area; the centroid is the exterior's.
+    Multipolygon parts become separate rows.
+    """
+    rings, polygon_of_ring, heights, exterior = [], [], [], []
+    n_polygons = 0
+    for feature in features:
+        height = (feature.get('properties') or {}).get('height')
+        for polygon in _polygons(feature.get('geometry')):
+            for i, ring in enumerate(polygon):
+                if len(ring) >= 3:
+                    rings.append(np.asarray(ring)[:, :2])
+                    polygon_of_ring.append(n_polygons)
+                    exterior.append(i == 0)
+            heights.append(height)
+            n_polygons += 1
+
+    columns = ['x', 'y', 'area_m2', 'height']
+    if not rings:
+        return pd.DataFrame(columns=columns, dtype=float)
+
+    measures = _ring_measures(rings)
+    polygon_of_ring = np.asarray(polygon_of_ring)
+    exterior = np.asarray(exterior)
+    sign = np.where(exterior, 1.0, -1.0)
+    area = np.bincount(polygon_of_ring, weights=sign * measures['area_m2'], minlength=n_polygons)
+
+    df = pd.DataFrame({'x': np.nan, 'y': np.nan, 'area_m2': np.clip(area, 0, None),
+                       'height': pd.to_numeric(pd.Series(heights, dtype=object),
+                                               errors='coerce').to_numpy(dtype=float)})
+    df.loc[polygon_of_ring[exterior], 'x'] = measures['x'][exterior]
+    df.loc[polygon_of_ring[exterior], 'y'] = measures['y'][exterior]
+    return df.dropna(subset=['x', 'y'])[columns]
+
+
+def _geojson_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Measured chunks of a GeoJSON file with one feature per line."""
+    features = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip().rstrip(',').lstrip('\x1e')
+            # Skips the FeatureCollection header and closing lines
+            if not line.startswith('{') or '"geometry"' not in line:
+                continue
+            feature = json.loads(line)
+            features.append(feature)
+            if len(features) >= chunk_size:
+                yield _measure_features(features)
+                features = []
+    if features:
+        yield _measure_features(features)
+
+
+def _csv_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Chunks of a CSV with centroid, area and (optionally) height columns."""
+    header = pd.read_csv(path, nrows=0).columns
+    lookup = {column.lower(): column for column in header}
+    rename = {}
+    for name, candidates in CSV_COLUMNS.items():
+        match = next((lookup[c] for c in candidates if c in lookup), None)
+        if match is None and name != 'height':
+            raise ValueError(f"{path.name} has no {name} column (tried {candidates})")
+        if match is not None:
+            rename[match] = name
+
+    for chunk in pd.read_csv(path, usecols=list(rename), chunksize=chunk_size):
+        chunk = chunk.rename(columns=rename)
+        if 'height' not in chunk:
+            chunk['height'] = np.nan
+        yield chunk[['x', 'y', 'area_m2', 'height']].astype(float)
+
+
+def iter_footprint_chunks(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Stream a footprint file as DataFrames with columns x, y, area_m2, height.
+
+    Args:
+        path: GeoJSON(-Seq) or CSV footprint file
+        chunk_size: Footprints per chunk (bounds memory use)
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        return _csv_chunks(path, chunk_size)
+    return _geojson_chunks(path, chunk_size)
+
+
+def footprint_files(footprint_dir: Path = FOOTPRINT_DATA_DIR) -> list:
+    """Every footprint file in a directory."""
+    patterns = ['*.geojson', '*.geojsonl', '*.geojsons', '*.ndjson', '*.csv']
+    return sorted(f for pattern in patterns for f in Path(footprint_dir).glob(pattern))
+
+
+# ============================================================================
+# SPATIAL INDEX
+# ============================================================================
+
+class ZoneIndex:
+    """
+    Grid index for assigning points to unit polygons.
+
+    Every unit is registered in the grid cells its bounding box covers;
+    a point is only tested against the units of its own cell.
+    """
+
+    def __init__(self, zones: Dict[str, List[Polygon]], cell_size: float = 1.0):
+        """
+        Args:
+            zones: {label: [polygon, ...]} in lon/lat (see zonal_stats)
+            cell_size: Grid cell size in degrees
+        """
+        self.labels = list(zones)
+        self.cell_size = cell_size
+        self.parts = []  # (unit, bbox, exterior path, hole paths)
+        self.cells = {}  # (cell_x, cell_y) -> part indices
+        for unit, label in enumerate(self.labels):
+            for polygon in zones[label]:
+                exterior = np.asarray(polygon[0], dtype=float)[:, :2]
+                bbox = (*exterior.min(axis=0), *exterior.max(axis=0))
+                part = len(self.parts)
+                self.parts.append((unit, bbox, MplPath(exterior),
+                                   [MplPath(np.asarray(ring)[:, :2]) for ring in polygon[1:]]))
+                x0, y0 = np.floor(np.array(bbox[:2]) / cell_size).astype(int)
+                x1, y1 = np.floor(np.array(bbox[2:]) / cell_size).astype(int)
+                for cx in range(x0, x1 + 1):
+                    for cy in range(y0, y1 + 1):
+                        self.cells.setdefault((cx, cy), []).append(part)
+
+    def locate(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        Unit index of each point (-1 outside every unit).
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        units = np.full(len(x), -1)
+        cell_x = np.floor(x / self.cell_size).astype(int)
+        cell_y = np.floor(y / self.cell_size).astype(int)
+        cells, cell_of_point = np.unique(np.column_stack([cell_x, cell_y]), axis=0,
+                                         return_inverse=True)
+        order = np.argsort(cell_of_point, kind='stable')
+        bounds = np.searchsorted(cell_of_point[order], np.arange(len(cells) + 1))
+
+        for i, (cx, cy) in enumerate(cells):
+            points = order[bounds[i]:bounds[i + 1]]
+            for part in self.cells.get((cx, cy), []):
+                unit, (xmin, ymin, xmax, ymax), exterior, holes = self.parts[part]
+                candidates = points[(units[points] < 0)
+                                    & (x[points] >= xmin) & (x[points] <= xmax)
+                                    & (y[points] >= ymin) & (y[points] <= ymax)]
+                if len(candidates) == 0:
+                    continue
+                xy = np.column_stack([x[candidates], y[candidates]])
+                inside = exterior.contains_points(xy)
+                for hole in holes:
+                    inside &= ~hole.contains_points(xy)
+                units[candidates[inside]] = unit
+        return units
+
+
+# ============================================================================
+# ACCUMULATION
+# ============================================================================
+
+def storeys(height: np.ndarray) -> np.ndarray:
+    """Storey count from building height (1 where the height is unknown)."""
+    height = np.asarray(height, dtype=float)
+    known = np.isfinite(height) & (height > 0)
+    return np.where(known, np.maximum(np.round(np.where(known, height, 0) / STOREY_HEIGHT), 1), 1)
+
+
+def accumulate_footprints(paths: Sequence[Path], zones: Dict[str, List[Polygon]],
+                          height_weighted: bool = False, chunk_size: int = CHUNK_SIZE,
+                          cell_size: float = 1.0) -> pd.DataFrame:
+    """
+    Footprint count, footprint area and floor area per spatial unit.
+
+    Args:
+        paths: Footprint files (see iter_footprint_chunks)
+        zones: Unit polygons {label: [polygon, ...]} in lon/lat
+        height_weighted: Multiply each footprint by its storey count
+                         (height / STOREY_HEIGHT); otherwise floor area
+                         equals footprint area
+        chunk_size: Footprints per chunk
+        cell_size: Spatial index cell size in degrees
+
+    Returns:
+        DataFrame indexed by unit label with n_footprints,
+        footprint_area_m2 and floor_area_m2 (footprints outside every unit
+        are counted in the printed summary only)
+    """
+    index = ZoneIndex(zones, cell_size)
+    n_units = len(index.labels)
+    counts = np.zeros(n_units + 1)
+    areas = np.zeros(n_units + 1)
+    floor_areas = np.zeros(n_units + 1)
+
+    for path in paths:
+        n_read = 0
+        for chunk in iter_footprint_chunks(path, chunk_size):
+            # Slot n_units collects footprints outside every unit
+            units = index.locate(chunk['x'].values, chunk['y'].values)
+            units = np.where(units < 0, n_units, units)
+            area = chunk['area_m2'].to_numpy(dtype=float)
+            floor_area = area * storeys(chunk['height'].values) if height_weighted else area
+            counts += np.bincount(units, minlength=n_units + 1)
+            areas += np.bincount(units, weights=area, minlength=n_units + 1)
+            floor_areas += np.bincount(units, weights=floor_area, minlength=n_units + 1)
+            n_read += len(chunk)
+        print(f"   {Path(path).name}: {n_read:,} footprints")
+
+    print(f"   {int(counts[-1]):,} footprints outside every unit")
+    return pd.DataFrame({'n_footprints': counts[:-1].astype(int),
+                         'footprint_area_m2': areas[:-1],
+                         'floor_area_m2': floor_areas[:-1]},
+                        index=pd.Index(index.labels, name='unit'))
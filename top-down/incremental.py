@@ -0,0 +1,203 @@
+"""
+Incremental Stock Updates
+=========================
+
+Persists the stock-flow engine state between runs so that a new data year
+(e.g. a new USGS or EPA release) costs O(years) instead of a full O(years²)
+recompute.
+
+The state holds the surviving stock of every cohort. Advancing one year
+ages each cohort by its conditional survival S(a + 1) / S(a), adds the new
+cohort's contribution Inflow × S(0), and reports the resulting stock and
+outflow. verify() compares the state against a full recompute.
+"""
+
+import json
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from stock_engine import inflow_array, stock_flows
+from survival_tables import SurvivalTable
+
+
+class StockState:
+    """
+    Cohort-level engine state that can be advanced one year at a time.
+    """
+
+    def __init__(self, lifetimes: Dict, years: np.ndarray, inflows: np.ndarray,
+                 cohort_stock: np.ndarray):
+        """
+        Args:
+            lifetimes: Dictionary of lifetime parameters by building type
+            years: Cohort (construction) years, contiguous
+            inflows: Inflows [building_type × cohort]
+            cohort_stock: Surviving stock [building_type × cohort] at the
+                          end of the last year
+        """
+        self.lifetimes = lifetimes
+        self.building_types = list(lifetimes.keys())
+        self.years = np.asarray(years, dtype=int)
+        self.inflows = np.asarray(inflows, dtype=float)
+        self.cohort_stock = np.asarray(cohort_stock, dtype=float)
+
+    @property
+    def last_year(self) -> int:
+        """Most recent cohort year in the state."""
+        return int(self.years[-1])
+
+    def _curves(self, max_age: int) -> np.ndarray:
+        """Cached survival curves [building_type × age] for ages 0..max_age."""
+        return SurvivalTable(self.lifetimes, max_age=max_age).curves
+
+    @classmethod
+    def from_inflows(cls, inflows: pd.DataFrame, lifetimes: Dict) -> 'StockState':
+        """
+        Build the state with one full computation.
+
+        Args:
+            inflows: Concrete inflows by year and building type
+                     (columns: year, {type}_concrete_mt)
+            lifetimes: Dictionary of lifetime parameters by building type
+        """
+        building_types = list(lifetimes.keys())
+        years = np.arange(int(inflows['year'].min()), int(inflows['year'].max()) + 1)
+        dense = inflow_array(inflows, building_types, years)
+
+        curves = SurvivalTable(lifetimes, max_age=len(years) - 1).curves
+        ages = years[-1] - years
+        return cls(lifetimes, years, dense, dense * curves[:, ages])
+
+    def advance(self, year: int, new_inflows: Dict[str, float]) -> Dict[str, np.ndarray]:
+        """
+        Add one year of inflows.
+
+        Args:
+            year: Must be last_year + 1
+            new_inflows: Inflow by building type for `year`
+
+        Returns:
+            Dictionary of arrays [building_type]: stock, inflow, outflow,
+            net_additions for `year`
+        """
+        if year != self.last_year + 1:
+            raise ValueError(f"Next year must be {self.last_year + 1}, got {year}; "
+                             f"rebuild the state to revise earlier years")
+
+        inflow = np.array([new_inflows[bt] for bt in self.building_types], dtype=float)
+        n_cohorts = len(self.years)
+        curves = self._curves(max_age=n_cohorts)
+
+        # One-year aging: survivors at age a move to a + 1
+        ages = self.last_year - self.years
+        now = curves[:, ages]
+        later = curves[:, ages + 1]
+        aging = np.divide(later, now, out=np.zeros_like(later), where=now > 0)
+
+        previous_stock = self.cohort_stock.sum(axis=1)
+        aged = self.cohort_stock * aging
+        new_cohort = inflow * curves[:, 0]
+
+        self.years = np.append(self.years, year)
+        self.inflows = np.column_stack([self.inflows, inflow])
+        self.cohort_stock = np.column_stack([aged, new_cohort])
+
+        stock = self.cohort_stock.sum(axis=1)
+        net_additions = stock - previous_stock
+        return {
+            'stock': stock,
+            'inflow': inflow,
+            'outflow': inflow - net_additions,
+            'net_additions': net_additions,
+        }
+
+    def stock(self) -> Dict[str, float]:
+        """Current stock by building type."""
+        return dict(zip(self.building_types, self.cohort_stock.sum(axis=1)))
+
+    def verify(self, rtol: float = 1e-9) -> float:
+        """
+        Compare against a full recompute from the stored inflow history.
+
+        Returns:
+            Largest relative difference in current stock by building type
+
+        Raises:
+            AssertionError if the difference exceeds rtol
+        """
+        curves = self._curves(max_age=len(self.years) - 1)
+        full = stock_flows(self.inflows, curves)['stock'][:, -1]
+        incremental = self.cohort_stock.sum(axis=1)
+        scale = np.maximum(np.abs(full), np.finfo(float).tiny)
+        max_diff = float(np.max(np.abs(incremental - full) / scale))
+        if max_diff > rtol:
+            raise AssertionError(f"Incremental stock drifted from full recompute "
+                                 f"by {max_diff:.3e} (rtol {rtol:.1e})")
+        return max_diff
+
+    def save(self, path: str):
+        """Persist the state to a .npz file."""
+        with open(path, 'wb') as f:
+            np.savez(f, years=self.years, inflows=self.inflows,
+                     cohort_stock=self.cohort_stock,
+                     lifetimes=np.array(json.dumps(self.lifetimes)))
+
+    @classmethod
+    def load(cls, path: str, lifetimes: Dict = None) -> 'StockState':
+        """
+        Load a persisted state.
+
+        Args:
+            path: .npz file written by save()
+            lifetimes: Current lifetime parameters; if given and different
+                       from the stored ones, the state is stale
+
+        Raises:
+            ValueError if the stored lifetimes don't match `lifetimes`
+        """
+        with np.load(path) as data:
+            stored = json.loads(str(data['lifetimes']))
+            if lifetimes is not None and stored != json.loads(json.dumps(lifetimes)):
+                raise ValueError(f"Lifetime parameters changed since {path} was written; "
+                                 f"rebuild the state with a full recompute")
+            return cls(stored, data['years'], data['inflows'], data['cohort_stock'])
+
+
+def update_state(state_file: str, inflows: pd.DataFrame, lifetimes: Dict,
+                 verify: bool = False) -> pd.DataFrame:
+    """
+    Bring a persisted state up to date with the inflow table.
+
+    Builds the state with one full computation if `state_file` doesn't exist;
+    otherwise applies only the years after the stored last year.
+
+    Args:
+        state_file: .npz state file (created or updated)
+        inflows: Concrete inflows by year and building type
+        lifetimes: Dictionary of lifetime parameters by building type
+        verify: Check the updated state against a full recompute
+
+    Returns:
+        DataFrame of flows for each newly added year (empty if none)
+    """
+    rows = []
+    if Path(state_file).exists():
+        state = StockState.load(state_file, lifetimes)
+        new = inflows[inflows['year'] > state.last_year].sort_values('year')
+        for _, row in new.iterrows():
+            flows = state.advance(int(row['year']), {bt: row[f'{bt}_concrete_mt']
+                                                     for bt in state.building_types})
+            record = {'year': int(row['year'])}
+            for flow, values in flows.items():
+                record.update({f'{bt}_{flow}': v for bt, v in zip(state.building_types, values)})
+            rows.append(record)
+    else:
+        state = StockState.from_inflows(inflows, lifetimes)
+
+    if verify:
+        state.verify()
+    state.save(state_file)
+    return pd.DataFrame(rows)
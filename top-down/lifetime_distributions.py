@@ -0,0 +1,103 @@
+"""
+Lifetime Distribution Registry
+==============================
+
+Maps distribution family names to vectorized survival functions so each
+building type in LIFETIMES can use its own family:
+
+    LIFETIMES = {
+        'residential': {'distribution': 'weibull', 'shape': 3.0, 'scale': 80},
+        'commercial': {'mean': 60, 'std': 15},   # 'normal' when unspecified
+    }
+
+Every survival function takes an array of ages plus the family's parameters
+(scalars or arrays that broadcast against ages) and returns P(lifetime > age).
+"""
+
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+from scipy.stats import gamma, lognorm, norm, weibull_min
+
+DEFAULT_DISTRIBUTION = 'normal'
+
+# family name -> (survival function, parameter names)
+LIFETIME_DISTRIBUTIONS: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {}
+
+
+def register_distribution(name: str, params: Tuple[str, ...]):
+    """
+    Decorator registering a survival function under a family name.
+
+    Args:
+        name: Family name used in LIFETIMES['distribution']
+        params: Parameter names the function expects
+    """
+    def decorator(func: Callable) -> Callable:
+        LIFETIME_DISTRIBUTIONS[name] = (func, tuple(params))
+        return func
+    return decorator
+
+
+# ============================================================================
+# BUILT-IN FAMILIES
+# ============================================================================
+
+@register_distribution('normal', params=('mean', 'std'))
+def normal_survival(ages, mean, std):
+    """Normal lifetime with the given mean and standard deviation (years)."""
+    return norm.sf(ages, loc=mean, scale=std)
+
+
+@register_distribution('weibull', params=('shape', 'scale'))
+def weibull_survival(ages, shape, scale):
+    """Weibull lifetime with shape k and scale λ (years)."""
+    return weibull_min.sf(ages, shape, scale=scale)
+
+
+@register_distribution('lognormal', params=('mean', 'std'))
+def lognormal_survival(ages, mean, std):
+    """Lognormal lifetime parameterized by its mean and standard deviation (years)."""
+    mean = np.asarray(mean, dtype=float)
+    sigma = np.sqrt(np.log1p((np.asarray(std, dtype=float) / mean) ** 2))
+    mu = np.log(mean) - sigma ** 2 / 2
+    return lognorm.sf(ages, sigma, scale=np.exp(mu))
+
+
+@register_distribution('gamma', params=('shape', 'scale'))
+def gamma_survival(ages, shape, scale):
+    """Gamma lifetime with shape k and scale θ (years)."""
+    return gamma.sf(ages, shape, scale=scale)
+
+
+# ============================================================================
+# LOOKUP
+# ============================================================================
+
+def distribution_family(lifetime_params: Dict) -> str:
+    """Family name for a LIFETIMES entry ('normal' when unspecified)."""
+    family = lifetime_params.get('distribution', DEFAULT_DISTRIBUTION)
+    if family not in LIFETIME_DISTRIBUTIONS:
+        raise ValueError(f"Unknown lifetime distribution: {family}. "
+                         f"Available: {sorted(LIFETIME_DISTRIBUTIONS)}")
+    return family
+
+
+def distribution_params(lifetime_params: Dict) -> Dict[str, float]:
+    """The numeric parameters a LIFETIMES entry's family expects."""
+    _, names = LIFETIME_DISTRIBUTIONS[distribution_family(lifetime_params)]
+    missing = [name for name in names if name not in lifetime_params]
+    if missing:
+        raise ValueError(f"Lifetime parameters missing {missing}: {lifetime_params}")
+    return {name: lifetime_params[name] for name in names}
+
+
+def survival_probability(ages, lifetime_params: Dict) -> np.ndarray:
+    """
+    Survival probabilities for the family named in `lifetime_params`.
+
+    Parameter values may be arrays; they broadcast against `ages`.
+    """
+    func, _ = LIFETIME_DISTRIBUTIONS[distribution_family(lifetime_params)]
+    survival = func(np.asarray(ages, dtype=float), **distribution_params(lifetime_params))
+    return np.clip(survival, 0.0, 1.0)
@@ -0,0 +1,236 @@
+"""
+Monte Carlo Uncertainty Analysis for the Top-Down Model
+=======================================================
+
+Samples the model's point-estimate parameters (concrete-to-cement ratio,
+building fraction, building lifetimes, spending fractions) from
+user-specified distributions and evaluates all draws as one batched array
+computation of shape [draw × building_type × year].
+
+Large ensembles are split into fixed-size shards, each seeded from its own
+child of a single SeedSequence, so results are reproducible regardless of
+how many worker processes evaluate them.
+
+Distribution specs name a numpy Generator method plus its keyword arguments:
+
+    {'dist': 'triangular', 'left': 5.0, 'mode': 5.5, 'right': 6.5}
+    {'dist': 'normal', 'loc': 70, 'scale': 7}
+    {'dist': 'fixed', 'value': 0.55}
+
+Spending fractions are perturbed with a Dirichlet draw centred on the base
+fractions: {'dist': 'dirichlet', 'concentration': 100}.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from lifetime_distributions import distribution_family, distribution_params
+from stock_engine import stock_flows
+from survival_tables import survival_curves
+
+# Draws evaluated per shard (bounds peak memory of one batched evaluation)
+SHARD_SIZE = 5000
+
+DEFAULT_PERCENTILES = (2.5, 50, 97.5)
+
+
+# ============================================================================
+# SAMPLING
+# ============================================================================
+
+def sample_distribution(spec: Dict, rng: np.random.Generator, size: int) -> np.ndarray:
+    """
+    Draw `size` samples from a distribution spec.
+
+    Args:
+        spec: Dict with 'dist' (a numpy Generator method or 'fixed') and
+              that method's keyword arguments
+        rng: Random generator
+        size: Number of samples
+
+    Returns:
+        Array of shape (size,)
+    """
+    params = dict(spec)
+    dist = params.pop('dist')
+
+    if dist == 'fixed':
+        return np.full(size, float(params['value']))
+
+    sampler = getattr(rng, dist, None)
+    if sampler is None:
+        raise ValueError(f"Unknown distribution: {dist}")
+    return np.asarray(sampler(size=size, **params), dtype=float)
+
+
+def sample_parameters(base: Dict, spec: Dict, rng: np.random.Generator,
+                      n_draws: int) -> Dict:
+    """
+    Sample every uncertain model parameter.
+
+    Parameters without an entry in `spec` keep their base point estimate.
+
+    Args:
+        base: Base model inputs (see run_monte_carlo)
+        spec: Distribution specs keyed like `base`; 'lifetimes' is nested
+              by building type and lifetime parameter
+        rng: Random generator
+        n_draws: Number of draws
+
+    Returns:
+        Dictionary of sampled arrays with a leading draw axis
+    """
+    building_types = base['building_types']
+    samples = {}
+
+    for name in ['concrete_to_cement_ratio', 'building_fraction']:
+        if name in spec:
+            samples[name] = sample_distribution(spec[name], rng, n_draws)
+        else:
+            samples[name] = np.full(n_draws, float(base[name]))
+
+    # Lifetime parameters keep their family; only numeric parameters are sampled
+    lifetime_spec = spec.get('lifetimes', {})
+    samples['lifetimes'] = {}
+    for btype in building_types:
+        base_params = base['lifetimes'][btype]
+        sampled = {'distribution': distribution_family(base_params)}
+        for param, value in distribution_params(base_params).items():
+            if param in lifetime_spec.get(btype, {}):
+                draws = sample_distribution(lifetime_spec[btype][param], rng, n_draws)
+            else:
+                draws = np.full(n_draws, float(value))
+            # All supported lifetime parameters are strictly positive
+            sampled[param] = np.clip(draws, 1e-6, None)
+        samples['lifetimes'][btype] = sampled
+
+    # Spending fractions [draw × year × type]
+    fractions = np.asarray(base['fractions'], dtype=float)
+    if 'spending_fractions' in spec:
+        fraction_spec = spec['spending_fractions']
+        if fraction_spec['dist'] != 'dirichlet':
+            raise ValueError("spending_fractions must use a 'dirichlet' spec")
+        mean_share = fractions.mean(axis=0)
+        shares = rng.dirichlet(mean_share * fraction_spec['concentration'], size=n_draws)
+        scaled = fractions[None, :, :] * (shares / mean_share)[:, None, :]
+        samples['fractions'] = scaled / scaled.sum(axis=2, keepdims=True)
+    else:
+        samples['fractions'] = np.broadcast_to(fractions, (n_draws,) + fractions.shape)
+
+    return samples
+
+
+# ============================================================================
+# BATCHED EVALUATION
+# ============================================================================
+
+def batched_inputs(base: Dict, samples: Dict):
+    """
+    Inflow and survival arrays for a batch of sampled parameters.
+
+    Returns:
+        (inflows [draw × building_type × year],
+         curves [draw × building_type × age])
+    """
+    building_types = base['building_types']
+    production = np.asarray(base['production'], dtype=float)
+    n_years = len(production)
+
+    # Concrete to buildings [draw × year], then split by type [draw × type × year]
+    to_buildings = (production[None, :]
+                    * samples['concrete_to_cement_ratio'][:, None]
+                    * samples['building_fraction'][:, None])
+    inflows = to_buildings[:, None, :] * samples['fractions'].transpose(0, 2, 1)
+
+    curves = np.stack([
+        survival_curves(samples['lifetimes'][bt], max_age=n_years - 1)
+        for bt in building_types
+    ], axis=1)
+
+    return inflows, curves
+
+
+def evaluate_draws(base: Dict, samples: Dict) -> np.ndarray:
+    """
+    Evaluate the stock model for a batch of sampled parameters.
+
+    Returns:
+        Stock array [draw × building_type × year]
+    """
+    inflows, curves = batched_inputs(base, samples)
+    return stock_flows(inflows, curves, method='fft')['stock']
+
+
+def _run_shard(base: Dict, spec: Dict, seed: np.random.SeedSequence,
+               n_draws: int) -> np.ndarray:
+    """Sample and evaluate one shard of draws (process pool entry point)."""
+    rng = np.random.default_rng(seed)
+    samples = sample_parameters(base, spec, rng, n_draws)
+    return evaluate_draws(base, samples).astype(np.float32)
+
+
+def run_monte_carlo(base: Dict, spec: Dict, n_draws: int, seed: int = 0,
+                    workers: int = None, shard_size: int = SHARD_SIZE) -> np.ndarray:
+    """
+    Run a Monte Carlo ensemble of the top-down stock model.
+
+    Args:
+        base: Base model inputs with keys
+              'building_types' (list), 'production' (cement, one per year),
+              'fractions' ([year × type] spending fractions), 'lifetimes',
+              'concrete_to_cement_ratio' and 'building_fraction'
+        spec: Distribution specs (see module docstring)
+        n_draws: Number of draws
+        seed: Root seed; the same seed always gives the same draws
+        workers: Worker processes (None = all cores, 1 = run in-process)
+        shard_size: Draws per shard
+
+    Returns:
+        Stock array [draw × building_type × year] (float32)
+    """
+    shard_sizes = [shard_size] * (n_draws // shard_size)
+    if n_draws % shard_size:
+        shard_sizes.append(n_draws % shard_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(shard_sizes))
+
+    if workers == 1 or len(shard_sizes) == 1:
+        results = [_run_shard(base, spec, s, n) for s, n in zip(seeds, shard_sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_shard, [base] * len(seeds), [spec] * len(seeds),
+                                    seeds, shard_sizes))
+
+    return np.concatenate(results, axis=0)
+
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+
+def percentile_bands(stocks: np.ndarray, years: Sequence[int],
+                     building_types: List[str],
+                     percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """
+    Summarize an ensemble as percentile bands per year.
+
+    Args:
+        stocks: Stock array [draw × building_type × year]
+        years: Year labels for the last axis
+        building_types: Labels for the building type axis
+        percentiles: Percentiles to report (0-100)
+
+    Returns:
+        DataFrame with a year column and {type}_p{q} columns, including total
+    """
+    totals = stocks.sum(axis=1, keepdims=True)
+    stacked = np.concatenate([stocks, totals], axis=1)
+    bands = np.percentile(stacked, percentiles, axis=0)  # [q × type × year]
+
+    df = pd.DataFrame({'year': np.asarray(years)})
+    for i, label in enumerate(list(building_types) + ['total']):
+        for j, q in enumerate(percentiles):
+            df[f'{label}_p{q:g}'] = bands[j, i]
+    return df
@@ -0,0 +1,63 @@
+"""
+Census Building Permit Loaders
+==============================
+
+Reads the cleaned state annual Building Permits Survey files in
+data/permit_data/cleaned_data (stateannual_YYYY99_cleaned.csv). Each file
+holds new privately-owned housing units authorized, by units in structure,
+for the US, census regions and divisions, and every state; only the state
+rows are kept.
+
+Source: https://www.census.gov/construction/bps/index.html
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from acs_data import STATE_FIPS, STATE_NAMES
+
+PERMIT_DATA_DIR = Path(__file__).resolve().parent.parent / 'data' / 'permit_data' / 'cleaned_data'
+
+
+def permit_files(permit_dir: Path = PERMIT_DATA_DIR) -> list:
+    """Every cleaned state annual permit file."""
+    return sorted(Path(permit_dir).glob('stateannual_*_cleaned.csv'))
+
+
+def load_state_permits(permit_dir: Path = PERMIT_DATA_DIR) -> pd.DataFrame:
+    """
+    Housing units authorized by building permits, by state and year.
+
+    Returns:
+        DataFrame with columns year, state_fips, state_name, permits_total,
+        permits_1_unit, permits_2_units, permits_3_4_units, permits_5plus_units
+    """
+    files = permit_files(permit_dir)
+    if not files:
+        raise FileNotFoundError(f"No state annual permit files found in {permit_dir}")
+
+    df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+    name_to_fips = {name: STATE_FIPS[code] for code, name in STATE_NAMES.items()}
+    df = df[df['location'].isin(name_to_fips)].copy()
+    df['state_fips'] = df['location'].map(name_to_fips)
+    df = df.rename(columns={
+        'location': 'state_name',
+        'total': 'permits_total',
+        'num_1_units': 'permits_1_unit',
+        'num_2_units': 'permits_2_units',
+        'num_3_4_units': 'permits_3_4_units',
+        'num_5_more_units': 'permits_5plus_units',
+    })
+    columns = ['year', 'state_fips', 'state_name', 'permits_total', 'permits_1_unit',
+               'permits_2_units', 'permits_3_4_units', 'permits_5plus_units']
+    return df[columns].sort_values(['year', 'state_fips']).reset_index(drop=True)
+
+
+def permit_history(permit_dir: Path = PERMIT_DATA_DIR,
+                   column: str = 'permits_total') -> pd.DataFrame:
+    """
+    Permit history as a [state_fips × year] table (for temporal allocation).
+    """
+    permits = load_state_permits(permit_dir)
+    return permits.pivot(index='state_fips', columns='year', values=column).fillna(0)
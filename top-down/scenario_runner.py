@@ -0,0 +1,211 @@
+"""
+Scenario Grid Runner for the Top-Down Model
+===========================================
+
+Runs many model configurations concurrently and appends every scenario's
+time series to one Parquet dataset partitioned by scenario id:
+
+    scenario_results/
+        scenario_id=baseline/part-0.parquet
+        scenario_id=scenario_0001/part-0.parquet
+        ...
+        _scenarios.json         # parameter overrides for each scenario id
+
+Re-running a scenario id replaces its partition and leaves the others.
+
+A grid file is JSON with an optional list of named scenarios and/or a
+grid whose cartesian product is expanded into scenarios:
+
+    {
+        "scenarios": [{"id": "baseline"},
+                      {"id": "long_lived", "lifetimes.residential.mean": 90}],
+        "grid": {"building_fraction": [0.50, 0.55, 0.60],
+                 "lifetimes.residential.distribution": ["normal", "weibull"]},
+        "fixed": {"lifetimes.residential.shape": 3.0,
+                  "lifetimes.residential.scale": 80}
+    }
+
+Override keys use the same paths as sensitivity.py ('concrete_to_cement_ratio',
+'building_fraction', 'lifetimes.<type>.<param>', 'fractions.<type>') plus
+'current_year'.
+"""
+
+import copy
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from stock_engine import stock_flows
+from survival_tables import SurvivalTable
+
+
+# ============================================================================
+# SCENARIO DEFINITIONS
+# ============================================================================
+
+def load_scenario_grid(grid_file: str) -> List[Dict]:
+    """
+    Expand a grid file into a list of scenarios.
+
+    Args:
+        grid_file: Path to a JSON grid file (see module docstring)
+
+    Returns:
+        List of override dicts, each with a unique 'id'
+    """
+    with open(grid_file, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+
+    fixed = spec.get('fixed', {})
+    scenarios = [dict(fixed, **scenario) for scenario in spec.get('scenarios', [])]
+
+    grid = spec.get('grid', {})
+    if grid:
+        keys = list(grid.keys())
+        for values in itertools.product(*(grid[key] for key in keys)):
+            scenarios.append(dict(fixed, **dict(zip(keys, values))))
+
+    unnamed = [scenario for scenario in scenarios if 'id' not in scenario]
+    for i, scenario in enumerate(unnamed, start=1):
+        scenario['id'] = f'scenario_{i:04d}'
+
+    ids = [scenario['id'] for scenario in scenarios]
+    duplicates = sorted({sid for sid in ids if ids.count(sid) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate scenario ids: {duplicates}")
+
+    return scenarios
+
+
+def apply_overrides(base: Dict, overrides: Dict) -> Dict:
+    """
+    Model inputs for one scenario.
+
+    Args:
+        base: Base model inputs (see monte_carlo.run_monte_carlo) plus
+              'years' and 'current_year'
+        overrides: Scenario overrides keyed by parameter path
+
+    Returns:
+        New inputs dict; `base` is left untouched
+    """
+    inputs = copy.deepcopy(base)
+    building_types = inputs['building_types']
+    fraction_scale = np.ones(len(building_types))
+
+    for key, value in overrides.items():
+        if key == 'id':
+            continue
+        parts = key.split('.')
+        if key in ('concrete_to_cement_ratio', 'building_fraction', 'current_year'):
+            inputs[key] = value
+        elif parts[0] == 'lifetimes' and len(parts) == 3 and parts[1] in building_types:
+            inputs['lifetimes'][parts[1]][parts[2]] = value
+        elif parts[0] == 'fractions' and len(parts) == 2 and parts[1] in building_types:
+            fraction_scale[building_types.index(parts[1])] = value
+        else:
+            raise ValueError(f"Unknown scenario parameter: {key}")
+
+    fractions = np.asarray(inputs['fractions'], dtype=float) * fraction_scale
+    inputs['fractions'] = fractions / fractions.sum(axis=1, keepdims=True)
+    return inputs
+
+
+# ============================================================================
+# EXECUTION
+# ============================================================================
+
+def run_scenario(inputs: Dict) -> pd.DataFrame:
+    """
+    Stock-flow time series for one set of model inputs.
+
+    Returns:
+        Long table with columns year, building_type, stock, inflow,
+        outflow, net_additions
+    """
+    building_types = inputs['building_types']
+    years = np.asarray(inputs['years'])
+    keep = years <= inputs['current_year']
+    years = years[keep]
+
+    production = np.asarray(inputs['production'], dtype=float)[keep]
+    fractions = np.asarray(inputs['fractions'], dtype=float)[keep]
+    to_buildings = production * inputs['concrete_to_cement_ratio'] * inputs['building_fraction']
+    inflows = to_buildings[None, :] * fractions.T  # [type × year]
+
+    table = SurvivalTable(inputs['lifetimes'], max_age=len(years) - 1)
+    flows = stock_flows(inflows, table.curves)
+
+    df = pd.DataFrame({
+        'year': np.tile(years, len(building_types)),
+        'building_type': np.repeat(building_types, len(years)),
+    })
+    for flow, values in flows.items():
+        df[flow] = values.reshape(-1)
+    return df
+
+
+def _run_and_write(base: Dict, scenario: Dict, output_dir: str) -> int:
+    """Run one scenario and write its partition (process pool entry point)."""
+    df = run_scenario(apply_overrides(base, scenario))
+    partition = Path(output_dir) / f"scenario_id={scenario['id']}"
+    partition.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(partition / 'part-0.parquet', index=False)
+    return len(df)
+
+
+def run_scenario_grid(base: Dict, scenarios: List[Dict],
+                      output_dir: str = 'scenario_results',
+                      workers: int = None) -> pd.DataFrame:
+    """
+    Run scenarios concurrently and append them to a partitioned Parquet dataset.
+
+    Args:
+        base: Base model inputs plus 'years' and 'current_year'
+        scenarios: Override dicts from load_scenario_grid
+        output_dir: Dataset root directory
+        workers: Worker processes (None = all cores, 1 = run in-process)
+
+    Returns:
+        Summary with one row per scenario (id and rows written)
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    if workers == 1:
+        rows = [_run_and_write(base, scenario, output_dir) for scenario in scenarios]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_run_and_write, [base] * len(scenarios),
+                                 scenarios, [output_dir] * len(scenarios)))
+
+    # Keep a registry of every scenario ever written to this dataset
+    # (leading underscore keeps Parquet readers from treating it as data)
+    registry_file = output_path / '_scenarios.json'
+    registry = {}
+    if registry_file.exists():
+        with open(registry_file, 'r', encoding='utf-8') as f:
+            registry = json.load(f)
+    registry.update({s['id']: {k: v for k, v in s.items() if k != 'id'} for s in scenarios})
+    with open(registry_file, 'w', encoding='utf-8') as f:
+        json.dump(registry, f, indent=2)
+
+    return pd.DataFrame({'scenario_id': [s['id'] for s in scenarios], 'rows': rows})
+
+
+def load_scenario_results(output_dir: str = 'scenario_results',
+                          scenario_ids: List[str] = None) -> pd.DataFrame:
+    """
+    Read the scenario dataset back as one table.
+
+    Args:
+        output_dir: Dataset root directory
+        scenario_ids: Only read these scenarios (default: all)
+    """
+    filters = [('scenario_id', 'in', scenario_ids)] if scenario_ids else None
+    return pd.read_parquet(output_dir, filters=filters)
@@ -0,0 +1,324 @@
+"""
+Global Sensitivity Analysis for the Top-Down Model
+==================================================
+
+Variance-based (Sobol) and screening (Morris) sensitivity analysis of the
+current-year concrete stock with respect to the top-down parameters.
+
+Parameters are named by path and given (low, high) bounds:
+
+    'concrete_to_cement_ratio'     concrete per ton of cement
+    'building_fraction'            share of concrete going to buildings
+    'lifetimes.<type>.<param>'     lifetime distribution parameter
+    'fractions.<type>'             multiplier on the spending fraction of
+                                   <type> (fractions are renormalized)
+
+Designs follow the Saltelli (2010) and Morris (1991) schemes used by SALib.
+Every design row is evaluated through the batched stock kernel, and large
+designs are split into chunks evaluated in a process pool.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+from monte_carlo import batched_inputs
+from stock_engine import final_stock
+
+# Design rows evaluated per worker task
+CHUNK_SIZE = 5000
+
+
+# ============================================================================
+# PARAMETER MAPPING
+# ============================================================================
+
+def design_to_samples(base: Dict, names: List[str], X: np.ndarray) -> Dict:
+    """
+    Convert design rows into the batched parameter layout of monte_carlo.py.
+
+    Args:
+        base: Base model inputs (see monte_carlo.run_monte_carlo)
+        names: Parameter path for each design column
+        X: Design matrix [row × parameter] in parameter units
+
+    Returns:
+        Dictionary of parameter arrays with a leading row axis
+    """
+    n_rows = X.shape[0]
+    building_types = base['building_types']
+    columns = dict(zip(names, X.T))
+
+    samples = {}
+    for name in ['concrete_to_cement_ratio', 'building_fraction']:
+        samples[name] = columns.get(name, np.full(n_rows, float(base[name])))
+
+    samples['lifetimes'] = {}
+    for btype in building_types:
+        sampled = {}
+        for param, value in base['lifetimes'][btype].items():
+            path = f'lifetimes.{btype}.{param}'
+            if isinstance(value, str):
+                if path in columns:
+                    raise ValueError(f"'{path}' is categorical and can't be a "
+                                     f"sensitivity parameter")
+                sampled[param] = value
+            elif path in columns:
+                sampled[param] = columns[path]
+            else:
+                sampled[param] = np.full(n_rows, float(value))
+        samples['lifetimes'][btype] = sampled
+
+    fractions = np.asarray(base['fractions'], dtype=float)
+    scale = np.stack([columns.get(f'fractions.{bt}', np.ones(n_rows))
+                      for bt in building_types], axis=1)
+    scaled = fractions[None, :, :] * scale[:, None, :]
+    samples['fractions'] = scaled / scaled.sum(axis=2, keepdims=True)
+
+    unknown = set(names) - set(['concrete_to_cement_ratio', 'building_fraction']
+                               + [f'fractions.{bt}' for bt in building_types]
+                               + [f'lifetimes.{bt}.{p}' for bt in building_types
+                                  for p in base['lifetimes'][bt]])
+    if unknown:
+        raise ValueError(f"Unknown sensitivity parameters: {sorted(unknown)}")
+
+    return samples
+
+
+def _evaluate_chunk(base: Dict, names: List[str], X: np.ndarray) -> np.ndarray:
+    """Current-year stock [row × building_type] for one chunk of the design."""
+    inflows, curves = batched_inputs(base, design_to_samples(base, names, X))
+    return final_stock(inflows, curves)
+
+
+def evaluate_design(base: Dict, names: List[str], X: np.ndarray,
+                    workers: int = None) -> np.ndarray:
+    """
+    Evaluate the current-year stock for every design row.
+
+    Args:
+        base: Base model inputs
+        names: Parameter path for each design column
+        X: Design matrix [row × parameter] in parameter units
+        workers: Worker processes (None = all cores, 1 = run in-process)
+
+    Returns:
+        Stock [row × (building types..., total)]
+    """
+    chunks = [X[i:i + CHUNK_SIZE] for i in range(0, len(X), CHUNK_SIZE)]
+
+    if workers == 1 or len(chunks) == 1:
+        results = [_evaluate_chunk(base, names, chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_evaluate_chunk, [base] * len(chunks),
+                                    [names] * len(chunks), chunks))
+
+    stocks = np.concatenate(results, axis=0)
+    return np.concatenate([stocks, stocks.sum(axis=1, keepdims=True)], axis=1)
+
+
+def _scale(unit: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Map unit-hypercube samples onto parameter bounds."""
+    return bounds[:, 0] + unit * (bounds[:, 1] - bounds[:, 0])
+
+
+# ============================================================================
+# SOBOL
+# ============================================================================
+
+def saltelli_design(n_base: int, n_params: int, seed: int = 0) -> np.ndarray:
+    """
+    Saltelli design in the unit hypercube.
+
+    Rows are laid out as [A; B; AB_1; ...; AB_D] where AB_i is A with
+    column i taken from B, giving n_base × (D + 2) rows.
+    """
+    sampler = qmc.Sobol(d=2 * n_params, scramble=True, seed=seed)
+    base = sampler.random(n_base)
+    A, B = base[:, :n_params], base[:, n_params:]
+
+    AB = np.repeat(A[None, :, :], n_params, axis=0)
+    idx = np.arange(n_params)
+    AB[idx, :, idx] = B[:, idx].T
+    return np.concatenate([A, B, AB.reshape(-1, n_params)], axis=0)
+
+
+def sobol_indices(Y: np.ndarray, n_base: int, n_params: int,
+                  n_bootstrap: int = 100, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    First-order (Saltelli 2010) and total (Jansen) Sobol indices.
+
+    Args:
+        Y: Model outputs [row × output] from a saltelli_design
+        n_base: Base sample size used for the design
+        n_params: Number of parameters
+        n_bootstrap: Bootstrap resamples for 95% confidence half-widths
+        seed: Bootstrap seed
+
+    Returns:
+        Dictionary of arrays [parameter × output]: S1, S1_conf, ST, ST_conf
+    """
+    # Standardize each output (as SALib does) so the bootstrap isn't
+    # dominated by the magnitude of the stock
+    std = Y.std(axis=0)
+    Y = (Y - Y.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+    fA = Y[:n_base]
+    fB = Y[n_base:2 * n_base]
+    fAB = Y[2 * n_base:].reshape(n_params, n_base, -1)
+
+    def estimate(rows):
+        a, b, ab = fA[rows], fB[rows], fAB[:, rows]
+        var = np.var(np.concatenate([a, b], axis=-2), axis=-2)
+        s1 = np.mean(b * (ab - a), axis=-2) / var
+        st = 0.5 * np.mean((a - ab) ** 2, axis=-2) / var
+        return s1, st
+
+    S1, ST = estimate(np.arange(n_base))
+
+    rng = np.random.default_rng(seed)
+    resamples = rng.integers(0, n_base, size=(n_bootstrap, n_base))
+    boot_s1, boot_st = estimate(resamples)  # [param × bootstrap × output]
+    z = 1.959964
+
+    return {
+        'S1': S1,
+        'S1_conf': z * boot_s1.std(axis=1, ddof=1),
+        'ST': ST,
+        'ST_conf': z * boot_st.std(axis=1, ddof=1),
+    }
+
+
+def run_sobol(base: Dict, bounds: Dict[str, Tuple[float, float]], n_base: int = 1024,
+              seed: int = 0, workers: int = None) -> pd.DataFrame:
+    """
+    Sobol sensitivity of the current-year stock.
+
+    Args:
+        base: Base model inputs (see monte_carlo.run_monte_carlo)
+        bounds: (low, high) per parameter path
+        n_base: Base sample size (power of 2); total runs = n_base × (D + 2)
+        seed: Seed for the scrambled Sobol sequence and bootstrap
+        workers: Worker processes (None = all cores)
+
+    Returns:
+        DataFrame with columns output, parameter, S1, S1_conf, ST, ST_conf
+    """
+    names = list(bounds.keys())
+    limits = np.array([bounds[name] for name in names], dtype=float)
+
+    X = _scale(saltelli_design(n_base, len(names), seed=seed), limits)
+    Y = evaluate_design(base, names, X, workers=workers)
+    indices = sobol_indices(Y, n_base, len(names), seed=seed)
+
+    return _index_table(indices, names, base['building_types'])
+
+
+# ============================================================================
+# MORRIS
+# ============================================================================
+
+def morris_design(n_trajectories: int, n_params: int, n_levels: int = 4,
+                  seed: int = 0) -> np.ndarray:
+    """
+    Morris one-at-a-time trajectories in the unit hypercube.
+
+    Each trajectory has D + 1 points, consecutive points differing in one
+    parameter by ±Δ with Δ = p / (2(p - 1)).
+
+    Returns:
+        Design [(trajectory × (D + 1)) × parameter]
+    """
+    rng = np.random.default_rng(seed)
+    delta = n_levels / (2 * (n_levels - 1))
+    grid = np.arange(n_levels // 2) / (n_levels - 1)
+    r, D = n_trajectories, n_params
+
+    # Lower-triangular step matrix B [D+1 × D], random signs, start points and orders
+    B = np.tril(np.ones((D + 1, D)), k=-1)
+    signs = rng.choice([-1.0, 1.0], size=(r, D))
+    start = rng.choice(grid, size=(r, D))
+    order = np.argsort(rng.random((r, D)), axis=1)
+
+    # B* = x* + (Δ/2) [(2B - J) D* + J], then permute columns
+    J = np.ones((D + 1, D))
+    steps = ((2 * B - J)[None, :, :] * signs[:, None, :] + J) * (delta / 2)
+    points = start[:, None, :] + steps
+    points = np.take_along_axis(points, order[:, None, :], axis=2)
+    return points.reshape(r * (D + 1), D)
+
+
+def morris_effects(X: np.ndarray, Y: np.ndarray, n_params: int) -> Dict[str, np.ndarray]:
+    """
+    Elementary-effect statistics mu, mu* and sigma.
+
+    Args:
+        X: Unit-hypercube design from morris_design
+        Y: Model outputs [row × output]
+        n_params: Number of parameters
+
+    Returns:
+        Dictionary of arrays [parameter × output]: mu, mu_star, sigma
+    """
+    D = n_params
+    X = X.reshape(-1, D + 1, D)
+    Y = Y.reshape(X.shape[0], D + 1, -1)
+
+    dX = np.diff(X, axis=1)                       # [traj × step × param]
+    dY = np.diff(Y, axis=1)                       # [traj × step × output]
+    changed = np.argmax(np.abs(dX) > 0, axis=2)   # parameter moved at each step
+    step = np.take_along_axis(dX, changed[:, :, None], axis=2)[:, :, 0]
+    effects = dY / step[:, :, None]
+
+    # Reorder steps so effects line up by parameter [traj × param × output]
+    order = np.argsort(changed, axis=1)
+    effects = np.take_along_axis(effects, order[:, :, None], axis=1)
+
+    return {
+        'mu': effects.mean(axis=0),
+        'mu_star': np.abs(effects).mean(axis=0),
+        'sigma': effects.std(axis=0, ddof=1),
+    }
+
+
+def run_morris(base: Dict, bounds: Dict[str, Tuple[float, float]],
+               n_trajectories: int = 100, n_levels: int = 4, seed: int = 0,
+               workers: int = None) -> pd.DataFrame:
+    """
+    Morris screening of the current-year stock.
+
+    Effects are expressed per unit of the normalized [0, 1] parameter range,
+    so mu* is comparable across parameters.
+
+    Returns:
+        DataFrame with columns output, parameter, mu, mu_star, sigma
+    """
+    names = list(bounds.keys())
+    limits = np.array([bounds[name] for name in names], dtype=float)
+
+    unit = morris_design(n_trajectories, len(names), n_levels=n_levels, seed=seed)
+    Y = evaluate_design(base, names, _scale(unit, limits), workers=workers)
+    effects = morris_effects(unit, Y, len(names))
+
+    return _index_table(effects, names, base['building_types'])
+
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def _index_table(indices: Dict[str, np.ndarray], names: List[str],
+                 building_types: List[str]) -> pd.DataFrame:
+    """Flatten [parameter × output] index arrays into a long table."""
+    outputs = list(building_types) + ['total']
+    rows = []
+    for j, output in enumerate(outputs):
+        for i, name in enumerate(names):
+            row = {'output': output, 'parameter': name}
+            row.update({key: values[i, j] for key, values in indices.items()})
+            rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,259 @@
+"""
+Matrix-Form Spatial Allocation
+==============================
+
+Allocates national stock by building type to spatial units in one matrix
+product instead of one SpatialAllocator per building type:
+
+    Stock[unit, type] = Σ_p Share[unit, p] × Weight[p, type] × National[type]
+
+Share holds every proxy normalized once (columns sum to 1) and Weight holds
+the proxy weights of every building type (columns sum to 1). A stack of
+weight matrices (e.g. an ensemble) is allocated the same way in one einsum.
+
+Temporal proxies (permit or spending histories) are collapsed to one value
+per unit by weighting each period with the survival probability of its
+cohort today, using the same lifetime distributions as the top-down model:
+
+    Proxy[unit] = Σ_t History[unit, t] × Survival(current_year - t)
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from lifetime_distributions import survival_probability
+
+BUILDING_TYPES = ['residential', 'commercial', 'institutional', 'industrial']
+
+# Proxy columns picked up from a proxy table when present
+PROXY_COLUMNS = ['population', 'gdp', 'floor_area', 'housing_units',
+                 'single_family_units', 'multi_family_units', 'permits_total']
+
+# Proxy weights by building type for each allocation method in
+# concrete_stock_spatial.allocate_national_stock
+METHOD_WEIGHTS = {
+    'population': {bt: {'population': 1.0} for bt in BUILDING_TYPES},
+    'gdp': {bt: {'gdp': 1.0} for bt in BUILDING_TYPES},
+    'floor_area': {bt: {'floor_area': 1.0} for bt in BUILDING_TYPES},
+    # Census proxy table (spatial_proxies.py)
+    'housing_units': {bt: {'housing_units': 1.0} for bt in BUILDING_TYPES},
+    'permits': {bt: {'permits_total': 1.0} for bt in BUILDING_TYPES},
+    # Survival-weighted permit history of each type's own lifetime
+    'permit_history': {bt: {f'permit_history_{bt}': 1.0} for bt in BUILDING_TYPES},
+    'hybrid': {
+        # Residential: Population + floor area
+        'residential': {'population': 0.6, 'floor_area': 0.4},
+        # Commercial: GDP + urban population
+        'commercial': {'gdp': 0.7, 'urban': 0.3},
+        # Institutional: schools, hospitals serve people
+        'institutional': {'population': 1.0},
+        # Industrial: GDP
+        'industrial': {'gdp': 1.0},
+    },
+}
+
+
+# Dirichlet concentrations for the weight ensemble. Means follow the hybrid
+# weights (institutional and industrial get a minor floor-area term so their
+# weights are uncertain too); larger totals mean tighter priors.
+ENSEMBLE_PRIORS = {
+    'residential': {'population': 6.0, 'floor_area': 4.0},
+    'commercial': {'gdp': 7.0, 'urban': 3.0},
+    'institutional': {'population': 8.0, 'floor_area': 2.0},
+    'industrial': {'gdp': 8.0, 'floor_area': 2.0},
+}
+
+# Total concentration of the symmetric fallback prior (see default_priors)
+FALLBACK_CONCENTRATION = 10.0
+
+DEFAULT_PERCENTILES = (2.5, 50.0, 97.5)
+
+
+def weight_matrix(weights: Dict[str, Dict[str, float]], proxies: Sequence[str],
+                  building_types: Sequence[str] = BUILDING_TYPES) -> pd.DataFrame:
+    """
+    Proxy × building type weight matrix from nested {type: {proxy: weight}}.
+
+    Raises:
+        ValueError if a weight names an unknown proxy or a column doesn't sum to 1
+    """
+    matrix = pd.DataFrame(0.0, index=list(proxies), columns=list(building_types))
+    for building_type in building_types:
+        for proxy, weight in weights[building_type].items():
+            if proxy not in matrix.index:
+                raise ValueError(f"Unknown proxy '{proxy}' for {building_type}")
+            matrix.loc[proxy, building_type] = weight
+
+    totals = matrix.sum(axis=0)
+    if not np.allclose(totals, 1.0, atol=1e-3):
+        raise ValueError(f"Weights must sum to 1.0 per building type, got {totals.to_dict()}")
+    return matrix
+
+
+def _decimal_years(periods) -> np.ndarray:
+    """Period labels (years, decimal years or dates/periods) as decimal years."""
+    index = pd.Index(periods)
+    if isinstance(index, pd.PeriodIndex):
+        index = index.to_timestamp()
+    if isinstance(index, pd.DatetimeIndex):
+        return (index.year + (index.dayofyear - 1) / 365.25).to_numpy(dtype=float)
+    return index.to_numpy(dtype=float)
+
+
+def survival_weighted_history(history: pd.DataFrame, lifetime_params: Dict,
+                              current_year: float) -> pd.Series:
+    """
+    Collapse a construction history to surviving construction per unit.
+
+    Args:
+        history: DataFrame [spatial_unit × period] of permits or spending;
+                 columns are years, decimal years or monthly dates/periods
+        lifetime_params: Lifetime distribution of the building type
+                         (same format as the top-down LIFETIMES entries)
+        current_year: Year the stock is evaluated in
+
+    Returns:
+        Series of survival-weighted totals by spatial unit
+    """
+    ages = current_year - _decimal_years(history.columns)
+    weights = np.where(ages >= 0, survival_probability(np.clip(ages, 0, None), lifetime_params), 0.0)
+    return pd.Series(history.fillna(0).to_numpy(dtype=float) @ weights, index=history.index)
+
+
+class MatrixAllocator:
+    """
+    Allocates national stocks for all building types and methods at once.
+    """
+
+    def __init__(self, proxies: pd.DataFrame):
+        """
+        Args:
+            proxies: DataFrame [spatial_unit × proxy] of non-negative proxy
+                     values, indexed by spatial unit
+        """
+        values = proxies.to_numpy(dtype=float)
+        totals = values.sum(axis=0)
+        if np.any(totals <= 0):
+            empty = list(proxies.columns[totals <= 0])
+            raise ValueError(f"Proxies with no positive values: {empty}")
+
+        self.spatial_units = list(proxies.index)
+        self.proxies = list(proxies.columns)
+        self.shares = values / totals  # [unit × proxy], normalized once
+
+    def allocate(self, national_stocks: Dict[str, float],
+                 weights: pd.DataFrame) -> pd.DataFrame:
+        """
+        Allocate one set of national stocks.
+
+        Args:
+            national_stocks: Stock by building type (extra keys such as
+                             'total' are ignored)
+            weights: Weight matrix [proxy × building_type] (see weight_matrix)
+
+        Returns:
+            DataFrame [spatial_unit × building_type] of allocated stock
+        """
+        weights = weights.reindex(index=self.proxies, fill_value=0.0)
+        stocks = np.array([national_stocks[bt] for bt in weights.columns], dtype=float)
+        allocated = self.shares @ (weights.to_numpy() * stocks)
+        return pd.DataFrame(allocated, index=self.spatial_units, columns=weights.columns)
+
+    def allocate_batch(self, national_stocks: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        Allocate many weight matrices (and optionally stock vectors) at once.
+
+        Args:
+            national_stocks: Stocks [building_type] or [k × building_type]
+            weights: Weight matrices [k × proxy × building_type] in the
+                     proxy order of self.proxies
+
+        Returns:
+            Array [k × spatial_unit × building_type]
+        """
+        weights = np.asarray(weights, dtype=float)
+        stocks = np.asarray(national_stocks, dtype=float)
+        if stocks.ndim == 1:
+            stocks = stocks[None, :]
+        return np.einsum('up,kpt->kut', self.shares, weights * stocks[:, None, :])
+
+
+# ============================================================================
+# WEIGHT ENSEMBLES
+# ============================================================================
+
+def default_priors(proxies: Sequence[str],
+                   building_types: Sequence[str] = BUILDING_TYPES) -> Dict[str, Dict[str, float]]:
+    """
+    Ensemble priors for the proxies at hand.
+
+    ENSEMBLE_PRIORS where a building type's proxies are all present;
+    otherwise a symmetric Dirichlet over every available proxy with total
+    concentration FALLBACK_CONCENTRATION.
+    """
+    proxies = list(proxies)
+    if not proxies:
+        raise ValueError("No proxies to build ensemble priors from")
+    symmetric = {proxy: FALLBACK_CONCENTRATION / len(proxies) for proxy in proxies}
+    priors = {}
+    for building_type in building_types:
+        prior = ENSEMBLE_PRIORS.get(building_type)
+        priors[building_type] = prior if prior and set(prior) <= set(proxies) else symmetric
+    return priors
+
+
+def dirichlet_weights(priors: Dict[str, Dict[str, float]], proxies: Sequence[str],
+                      n_draws: int, rng: np.random.Generator,
+                      building_types: Sequence[str] = BUILDING_TYPES) -> np.ndarray:
+    """
+    Draw weight matrices from per-building-type Dirichlet priors.
+
+    Args:
+        priors: {building_type: {proxy: concentration}}
+        proxies: Proxy order of the returned matrices
+        n_draws: Number of weight matrices
+        rng: NumPy random generator
+        building_types: Building type order of the returned matrices
+
+    Returns:
+        Array [draw × proxy × building_type]; each column sums to 1
+    """
+    proxies = list(proxies)
+    weights = np.zeros((n_draws, len(proxies), len(building_types)))
+    for j, building_type in enumerate(building_types):
+        prior = priors[building_type]
+        unknown = set(prior) - set(proxies)
+        if unknown:
+            raise ValueError(f"Unknown proxies for {building_type}: {sorted(unknown)}")
+        rows = [proxies.index(proxy) for proxy in prior]
+        weights[:, rows, j] = rng.dirichlet(list(prior.values()), size=n_draws)
+    return weights
+
+
+def allocation_percentiles(allocations: np.ndarray, spatial_units: List,
+                           building_types: Sequence[str] = BUILDING_TYPES,
+                           percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> pd.DataFrame:
+    """
+    Summarize an allocation ensemble as percentiles per spatial unit.
+
+    Args:
+        allocations: Array [draw × spatial_unit × building_type]
+        spatial_units: Labels for the spatial unit axis
+        building_types: Labels for the building type axis
+        percentiles: Percentiles to report (0-100)
+
+    Returns:
+        DataFrame indexed by spatial unit with {type}_stock_p{q} columns,
+        including total
+    """
+    totals = allocations.sum(axis=2, keepdims=True)
+    stacked = np.concatenate([allocations, totals], axis=2)
+    bands = np.percentile(stacked, percentiles, axis=0)  # [q × unit × type]
+
+    df = pd.DataFrame(index=pd.Index(spatial_units))
+    for i, label in enumerate(list(building_types) + ['total']):
+        for j, q in enumerate(percentiles):
+            df[f'{label}_stock_p{q:g}'] = bands[j, :, i]
+    return df
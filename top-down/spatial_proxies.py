@@ -0,0 +1,102 @@
+"""
+Spatial Proxy Tables from Census Data
+=====================================
+
+Assembles one row per spatial unit (state, county or MSA) of allocation
+proxies from the cleaned ACS and building permit files:
+- housing_units: latest ACS B25001 total
+- single_family_units, multi_family_units, mobile_units and the matching
+  *_share columns: latest ACS B25024 structure-type mix
+- population: latest ACS B01003 total (only if those files are present)
+- permits_<year> and permits_total: building permit history (state level;
+  the BPS county and metro files aren't in data/permit_data yet)
+
+The table is keyed by integer FIPS codes and cached as Parquet in
+data/stock_data/cleaned_data/.cache, rebuilt whenever any source file
+changes (see data_cache.py).
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from acs_data import (STATE_FIPS, STOCK_DATA_DIR, acs_files,
+                      load_housing_units, load_population, load_structure_types)
+from data_cache import cached_table
+from permit_data import PERMIT_DATA_DIR, load_state_permits, permit_files
+
+SINGLE_FAMILY = ['single_family_detached', 'single_family_attached']
+MULTI_FAMILY = ['units_2', 'units_3_4', 'units_5_9', 'units_10_19', 'units_20_49', 'units_50_plus']
+MOBILE = ['mobile_homes', 'boat_rv_van']
+
+
+def _latest(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows of the most recent year, indexed by fips."""
+    return df[df['year'] == df['year'].max()].set_index('fips')
+
+
+def build_proxy_table(level: str = 'state', stock_dir: Path = STOCK_DATA_DIR,
+                      permit_dir: Path = PERMIT_DATA_DIR) -> pd.DataFrame:
+    """
+    Assemble the proxy table without the cache (see load_proxy_table).
+    """
+    units = load_housing_units(stock_dir, level=level)
+    if level == 'state':
+        units = units.rename(columns={'state_fips': 'fips', 'state_name': 'name'})
+    units = _latest(units)
+
+    table = pd.DataFrame({'fips': units.index.astype('int32'),
+                          'name': units['name'].astype(str).values})
+    if level == 'state':
+        fips_to_code = {fips: code for code, fips in STATE_FIPS.items()}
+        table['state_fips'] = table['fips'].astype('int16')
+        table['state_abbrev'] = table['fips'].map(fips_to_code)
+    elif level == 'county':
+        table['state_fips'] = units['state_fips'].astype('int16').values
+    table['housing_units'] = units['housing_units'].astype('int64').values
+
+    structures = _latest(load_structure_types(stock_dir, level=level)).reindex(units.index)
+    groups = {'single_family': SINGLE_FAMILY, 'multi_family': MULTI_FAMILY, 'mobile': MOBILE}
+    for group, columns in groups.items():
+        table[f'{group}_units'] = structures[columns].sum(axis=1).astype('int64').values
+    total = structures['total_units'].to_numpy(dtype=float)
+    for group in groups:
+        table[f'{group}_share'] = np.divide(table[f'{group}_units'].to_numpy(dtype=float), total,
+                                            out=np.zeros(len(table)), where=total > 0)
+
+    try:
+        population = _latest(load_population(stock_dir, level=level))
+        table['population'] = population['population'].reindex(units.index).values
+    except FileNotFoundError:
+        pass
+
+    if level == 'state':
+        permits = load_state_permits(permit_dir).pivot(index='state_fips', columns='year',
+                                                        values='permits_total')
+        permits = permits.reindex(units.index).fillna(0).astype('int64')
+        for year in permits.columns:
+            table[f'permits_{year}'] = permits[year].values
+        table['permits_total'] = permits.sum(axis=1).values
+
+    return table.sort_values('fips').reset_index(drop=True)
+
+
+def load_proxy_table(level: str = 'state', use_cache: bool = True,
+                     stock_dir: Path = STOCK_DATA_DIR,
+                     permit_dir: Path = PERMIT_DATA_DIR) -> pd.DataFrame:
+    """
+    Proxy table for every spatial unit at one geography level (cached).
+
+    Args:
+        level: 'state', 'county' or 'msa'
+        use_cache: Read/write the Parquet cache
+
+    Returns:
+        DataFrame with integer fips, name, housing units, structure mix,
+        population (if available) and permit history (state level)
+    """
+    sources = acs_files(stock_dir) + (permit_files(permit_dir) if level == 'state' else [])
+    return cached_table(f'spatial_proxies_{level}', stock_dir, sources,
+                        lambda: build_proxy_table(level, stock_dir, permit_dir),
+                        use_cache=use_cache)
@@ -0,0 +1,128 @@
+"""
+State-Resolved Dynamic Stock Model
+==================================
+
+Runs the stock-flow model for every state at once instead of splitting the
+national stock afterwards with static proxies.
+
+State inflows are the national building inflows distributed by a
+state × year share matrix that blends
+- where cement is produced (GHGP state production, 2010 onward), and
+- where it is consumed (ACS housing units as a construction proxy),
+
+so a state's stock reflects when its construction happened. All states,
+building types and years are evaluated as one (state × type × year) tensor
+through stock_engine.stock_flows.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from acs_data import STATE_FIPS, load_housing_units
+from cement_data import load_state_production
+from cohort_cube import write_cohort_cube
+from stock_engine import inflow_array, stock_flows
+from survival_tables import SurvivalTable
+
+# Weight of the production share in the blended state share; cement ships
+# across state lines, so consumption proxies carry most of the weight
+PRODUCTION_WEIGHT = 0.3
+
+
+# ============================================================================
+# STATE SHARES
+# ============================================================================
+
+def production_shares(states: List[str], years: np.ndarray) -> np.ndarray:
+    """
+    State shares of GHGP cement production [state × year].
+
+    Years before the first GHGP year use the first year's shares and years
+    after the last use the last year's.
+    """
+    production = (load_state_production()
+                  .pivot_table(index='state', columns='year', values='production_mt',
+                               aggfunc='sum', observed=True)
+                  .reindex(states).fillna(0.0))
+    shares = production / production.sum(axis=0)
+    shares = shares.reindex(columns=years).ffill(axis=1).bfill(axis=1)
+    return shares.to_numpy()
+
+
+def consumption_shares(states: List[str]) -> np.ndarray:
+    """State shares of housing units in the latest ACS year [state]."""
+    units = load_housing_units()
+    latest = units[units['year'] == units['year'].max()].set_index('state_fips')
+    values = latest['housing_units'].reindex([STATE_FIPS[s] for s in states]).fillna(0.0)
+    return (values / values.sum()).to_numpy()
+
+
+def state_shares(states: List[str], years: np.ndarray,
+                 production_weight: float = PRODUCTION_WEIGHT) -> np.ndarray:
+    """
+    Blended state shares of national inflow [state × year]; columns sum to 1.
+
+    Args:
+        states: State postal codes
+        years: Model years
+        production_weight: Weight on the production share (0 = consumption only)
+    """
+    shares = (production_weight * production_shares(states, years)
+              + (1 - production_weight) * consumption_shares(states)[:, None])
+    return shares / shares.sum(axis=0, keepdims=True)
+
+
+# ============================================================================
+# BATCHED MODEL
+# ============================================================================
+
+def run_state_model(inflows: pd.DataFrame, lifetimes: Dict,
+                    states: List[str] = None, shares: np.ndarray = None,
+                    production_weight: float = PRODUCTION_WEIGHT,
+                    cohort_cube: str = None) -> pd.DataFrame:
+    """
+    Stock-flow time series for every state in one tensor computation.
+
+    Args:
+        inflows: National concrete inflows by year and building type
+                 (columns: year, {type}_concrete_mt)
+        lifetimes: Dictionary of lifetime parameters by building type
+        states: State postal codes (default: all of STATE_FIPS)
+        shares: State shares [state × year] (default: state_shares())
+        production_weight: Passed to state_shares() when `shares` is None
+        cohort_cube: If given, also write the state × year × cohort × type
+                     cube to this directory
+
+    Returns:
+        Long table with columns state, state_fips, year, building_type,
+        stock, inflow, outflow, net_additions
+    """
+    building_types = list(lifetimes.keys())
+    states = list(states or STATE_FIPS)
+    years = np.arange(int(inflows['year'].min()), int(inflows['year'].max()) + 1)
+
+    if shares is None:
+        shares = state_shares(states, years, production_weight)
+
+    national = inflow_array(inflows, building_types, years)       # [type × year]
+    state_inflows = shares[:, None, :] * national[None, :, :]     # [state × type × year]
+
+    curves = SurvivalTable(lifetimes, max_age=len(years) - 1).curves
+    flows = stock_flows(state_inflows, curves)
+
+    if cohort_cube:
+        write_cohort_cube(cohort_cube, state_inflows, curves, years, building_types,
+                          lead_coords={'state': states})
+
+    n_states, n_types, n_years = state_inflows.shape
+    df = pd.DataFrame({
+        'state': np.repeat(states, n_types * n_years),
+        'state_fips': np.repeat([STATE_FIPS[s] for s in states], n_types * n_years),
+        'year': np.tile(years, n_states * n_types),
+        'building_type': np.tile(np.repeat(building_types, n_years), n_states),
+    })
+    for flow, values in flows.items():
+        df[flow] = values.reshape(-1)
+    return df
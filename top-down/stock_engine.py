@@ -0,0 +1,290 @@
+"""
+Convolution-Based Stock-Flow Engine
+===================================
+
+Inflow-driven dynamic stock model in array form:
+
+    Stock(t)   = Σ_c Inflow(c) × Survival(t - c)      (discrete convolution)
+    Outflow(t) = Inflow(t) - [Stock(t) - Stock(t-1)]
+
+All building types (and any leading batch axes such as Monte Carlo draws
+or states) are evaluated in one call. Short series use a direct
+lower-triangular (Toeplitz) product; long series switch to FFT convolution.
+
+The stock-driven (inverse) mode solves the same lower-triangular Toeplitz
+system for the inflows that reproduce an observed stock trajectory.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import solve_triangular
+from scipy.signal import fftconvolve
+
+from cohort_cube import write_cohort_cube
+from survival_tables import SurvivalTable
+
+# Series longer than this use FFT convolution instead of the direct product
+FFT_THRESHOLD = 256
+
+
+# ============================================================================
+# ARRAY KERNELS
+# ============================================================================
+
+def survival_toeplitz(curves: np.ndarray, n_years: int) -> np.ndarray:
+    """
+    Lower-triangular survival operator.
+
+    Args:
+        curves: Survival curves [..., age], at least n_years ages long
+        n_years: Length of the inflow series
+
+    Returns:
+        Array [..., year, cohort] with entry Survival(year - cohort) on and
+        below the diagonal and zero above it
+    """
+    curves = np.asarray(curves, dtype=float)
+    if curves.shape[-1] < n_years:
+        raise ValueError(f"Survival curves cover {curves.shape[-1]} ages, "
+                         f"need at least {n_years}")
+    ages = np.arange(n_years)[:, None] - np.arange(n_years)[None, :]
+    lower = ages >= 0
+    return np.where(lower, curves[..., np.clip(ages, 0, None)], 0.0)
+
+
+def convolve_survival(inflows: np.ndarray, curves: np.ndarray,
+                      method: str = 'auto') -> np.ndarray:
+    """
+    Stock as the discrete convolution of inflows with survival curves.
+
+    Args:
+        inflows: Inflow series [..., year]
+        curves: Survival curves [..., age], broadcastable against inflows
+        method: 'direct', 'fft' or 'auto' (direct for short series)
+
+    Returns:
+        Stock [..., year]
+    """
+    inflows = np.asarray(inflows, dtype=float)
+    n_years = inflows.shape[-1]
+    curves = np.asarray(curves, dtype=float)[..., :n_years]
+
+    if method == 'auto':
+        method = 'fft' if n_years > FFT_THRESHOLD else 'direct'
+
+    if method == 'direct':
+        operator = survival_toeplitz(curves, n_years)
+        return np.einsum('...tc,...c->...t', operator, inflows)
+    elif method == 'fft':
+        shape = np.broadcast_shapes(inflows.shape[:-1], curves.shape[:-1])
+        inflows = np.broadcast_to(inflows, shape + (n_years,))
+        curves = np.broadcast_to(curves, shape + (curves.shape[-1],))
+        stock = fftconvolve(inflows, curves, axes=-1)[..., :n_years]
+        # FFT round-off can leave tiny negatives where the true stock is zero
+        return np.clip(stock, 0.0, None)
+    else:
+        raise ValueError(f"Unknown convolution method: {method}")
+
+
+def final_stock(inflows: np.ndarray, curves: np.ndarray) -> np.ndarray:
+    """
+    Stock in the last year of the inflow series only.
+
+    Cheaper than the full convolution when only one year is needed
+    (e.g. sensitivity analysis of the current-year stock).
+
+    Args:
+        inflows: Inflow series [..., year]
+        curves: Survival curves [..., age], broadcastable against inflows
+
+    Returns:
+        Stock [...] at the last year
+    """
+    inflows = np.asarray(inflows, dtype=float)
+    n_years = inflows.shape[-1]
+    # Cohort c has age (n_years - 1 - c) in the last year
+    survival = np.asarray(curves, dtype=float)[..., n_years - 1::-1]
+    return np.sum(inflows * survival, axis=-1)
+
+
+def stock_flows(inflows: np.ndarray, curves: np.ndarray,
+                method: str = 'auto') -> Dict[str, np.ndarray]:
+    """
+    Stock, inflow, outflow and net additions for every year.
+
+    Args:
+        inflows: Inflow series [..., year], first year has no prior stock
+        curves: Survival curves [..., age]
+        method: Convolution method (see convolve_survival)
+
+    Returns:
+        Dictionary of arrays [..., year]: stock, inflow, outflow, net_additions
+    """
+    inflows = np.asarray(inflows, dtype=float)
+    stock = convolve_survival(inflows, curves, method=method)
+    net_additions = np.diff(stock, axis=-1, prepend=0.0)
+    inflows = np.broadcast_to(inflows, stock.shape)
+
+    return {
+        'stock': stock,
+        'inflow': inflows,
+        'outflow': inflows - net_additions,
+        'net_additions': net_additions,
+    }
+
+
+# ============================================================================
+# STOCK-DRIVEN (INVERSE) MODE
+# ============================================================================
+
+def steady_state_cohorts(stock: np.ndarray, curve: np.ndarray) -> np.ndarray:
+    """
+    Age profile of a stock built up by constant inflow.
+
+    A stationary stock holds cohorts in proportion to their survival, which
+    is a reasonable default when the actual age distribution is unknown.
+
+    Args:
+        stock: Total stock [...] to distribute over ages
+        curve: Survival curve [age]
+
+    Returns:
+        Stock by age [..., age] summing to `stock`
+    """
+    curve = np.asarray(curve, dtype=float)
+    weights = curve / curve.sum()
+    return np.asarray(stock, dtype=float)[..., None] * weights
+
+
+def _remaining_initial_stock(initial_cohorts: np.ndarray, curves: np.ndarray,
+                             n_years: int) -> np.ndarray:
+    """Survivors of pre-existing cohorts in each modelled year [..., year]."""
+    n_ages = initial_cohorts.shape[-1]
+    if curves.shape[-1] < n_ages + n_years:
+        raise ValueError(f"Survival curves must cover {n_ages + n_years} ages "
+                         f"to age the initial stock, got {curves.shape[-1]}")
+    ages = np.arange(n_ages)
+    # A cohort aged a at the start is aged a + t + 1 at the end of year t;
+    # its survival is conditional on having reached age a
+    later = curves[..., ages[None, :] + np.arange(1, n_years + 1)[:, None]]
+    now = curves[..., None, ages]
+    conditional = np.divide(later, now, out=np.zeros_like(later), where=now > 0)
+    return np.einsum('...ta,...a->...t', conditional, initial_cohorts)
+
+
+def solve_inflows(stock: np.ndarray, curves: np.ndarray,
+                  initial_cohorts: np.ndarray = None) -> Dict[str, np.ndarray]:
+    """
+    Stock-driven model: inflows and outflows that reproduce a stock trajectory.
+
+    Solves the lower-triangular Toeplitz system Survival · Inflow = Stock
+    (minus survivors of any initial stock) by forward substitution, with
+    every series sharing a survival curve solved as one multi-column system.
+
+    Args:
+        stock: Observed stock [..., year]; with per-type curves the
+               second-to-last axis must be the building type
+        curves: Survival curves [age] (one for all series) or
+                [building_type × age]
+        initial_cohorts: Stock by age [..., age] at the end of the year
+                         before the first observed year (default: none, so
+                         the whole first-year stock is first-year inflow)
+
+    Returns:
+        Dictionary of arrays [..., year]: stock, inflow, outflow, net_additions.
+        Negative inflows mean the trajectory shrinks faster than the
+        survival curves allow.
+    """
+    stock = np.asarray(stock, dtype=float)
+    curves = np.asarray(curves, dtype=float)
+    n_years = stock.shape[-1]
+
+    target = stock
+    previous = np.zeros(stock.shape[:-1])
+    if initial_cohorts is not None:
+        initial_cohorts = np.asarray(initial_cohorts, dtype=float)
+        target = stock - _remaining_initial_stock(initial_cohorts, curves, n_years)
+        previous = initial_cohorts.sum(axis=-1) * np.ones(stock.shape[:-1])
+
+    if curves.ndim == 1:
+        operator = survival_toeplitz(curves, n_years)
+        rhs = target.reshape(-1, n_years).T
+        inflows = solve_triangular(operator, rhs, lower=True).T.reshape(stock.shape)
+    else:
+        if stock.ndim < 2 or stock.shape[-2] != curves.shape[0]:
+            raise ValueError("With per-type curves, stock must be [..., building_type, year]")
+        inflows = np.empty_like(target)
+        for k in range(curves.shape[0]):
+            operator = survival_toeplitz(curves[k], n_years)
+            rhs = target[..., k, :].reshape(-1, n_years).T
+            solved = solve_triangular(operator, rhs, lower=True).T
+            inflows[..., k, :] = solved.reshape(target[..., k, :].shape)
+
+    net_additions = np.diff(stock, axis=-1, prepend=previous[..., None])
+
+    return {
+        'stock': stock,
+        'inflow': inflows,
+        'outflow': inflows - net_additions,
+        'net_additions': net_additions,
+    }
+
+
+# ============================================================================
+# DATAFRAME INTERFACE
+# ============================================================================
+
+def inflow_array(inflows: pd.DataFrame, building_types: List[str],
+                 years: np.ndarray) -> np.ndarray:
+    """
+    Reshape the inflow table into a dense [building_type × year] array.
+
+    Years missing from the table are treated as zero inflow.
+    """
+    cols = [f'{btype}_concrete_mt' for btype in building_types]
+    dense = (inflows.set_index('year')[cols]
+             .reindex(years, fill_value=0.0)
+             .to_numpy(dtype=float))
+    return dense.T
+
+
+def calculate_stock_flows(inflows: pd.DataFrame, lifetimes: Dict,
+                          start_year: int, end_year: int,
+                          method: str = 'auto', cohort_cube: str = None) -> pd.DataFrame:
+    """
+    Run the stock-flow model for all building types in one vectorized call.
+
+    Args:
+        inflows: Concrete inflows by year and building type
+                 (columns: year, {type}_concrete_mt)
+        lifetimes: Dictionary of lifetime parameters by building type
+        start_year: First year to report
+        end_year: Last year to report
+        method: Convolution method (see convolve_survival)
+        cohort_cube: If given, also write the cohort-resolved stock
+                     [year × cohort × building_type] to this directory
+                     (see cohort_cube.py)
+
+    Returns:
+        DataFrame with one row per year and columns {type}_stock,
+        {type}_inflow, {type}_outflow and {type}_net_additions
+    """
+    building_types = list(lifetimes.keys())
+    first_year = min(int(inflows['year'].min()), start_year)
+    years = np.arange(first_year, end_year + 1)
+
+    table = SurvivalTable(lifetimes, max_age=len(years) - 1)
+    dense = inflow_array(inflows, building_types, years)
+    flows = stock_flows(dense, table.curves, method=method)
+
+    if cohort_cube is not None:
+        write_cohort_cube(cohort_cube, dense, table.curves, years, building_types)
+
+    keep = years >= start_year
+    df = pd.DataFrame({'year': years[keep]})
+    for flow, values in flows.items():
+        for i, btype in enumerate(building_types):
+            df[f'{btype}_{flow}'] = values[i, keep]
+    return df
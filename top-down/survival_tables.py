@@ -0,0 +1,165 @@
+"""
+Precomputed Survival Tables for the Top-Down Stock Model
+========================================================
+
+Building survival depends only on age and the lifetime parameters of a
+building type, so each curve is computed once as a NumPy array over
+ages 0..max_age and every later lookup is an array index.
+
+Curves are held in a bounded LRU cache keyed by distribution family and
+parameters (see lifetime_distributions.py), so repeated model runs
+(ensembles, scenario sweeps) with the same lifetimes never call scipy again.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from lifetime_distributions import (distribution_family, distribution_params,
+                                    survival_probability)
+
+# Maximum number of distinct survival curves kept in memory
+CACHE_SIZE = 512
+
+# Curves are computed in blocks of this many ages so that slightly different
+# horizons (e.g. 1950-2024 vs 1902-2024) share one cached array
+AGE_BLOCK = 128
+
+
+# ============================================================================
+# SURVIVAL CURVES
+# ============================================================================
+
+def _cache_key(lifetime_params: Dict) -> Tuple:
+    """Hashable (family, parameters) key for a LIFETIMES entry."""
+    params = distribution_params(lifetime_params)
+    return (distribution_family(lifetime_params),
+            tuple((name, float(value)) for name, value in params.items()))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _cached_curve(key: Tuple, n_ages: int) -> np.ndarray:
+    """Compute a read-only survival curve for ages 0..n_ages-1."""
+    family, params = key
+    lifetime_params = dict(params, distribution=family)
+    curve = survival_probability(np.arange(n_ages), lifetime_params)
+    curve.setflags(write=False)
+    return curve
+
+
+def _padded_length(max_age: int) -> int:
+    """Round an age horizon up to a whole number of AGE_BLOCKs."""
+    return (max_age // AGE_BLOCK + 1) * AGE_BLOCK
+
+
+def survival_curve(lifetime_params: Dict, max_age: int) -> np.ndarray:
+    """
+    Survival probabilities for ages 0..max_age.
+
+    Args:
+        lifetime_params: LIFETIMES entry (optional 'distribution' family
+                         name plus that family's parameters)
+        max_age: Oldest age needed
+
+    Returns:
+        Read-only array of length max_age + 1
+    """
+    if max_age < 0:
+        raise ValueError(f"max_age must be non-negative, got {max_age}")
+    curve = _cached_curve(_cache_key(lifetime_params), _padded_length(max_age))
+    return curve[:max_age + 1]
+
+
+def survival_curves(lifetime_params: Dict, max_age: int) -> np.ndarray:
+    """
+    Uncached survival curves for arrays of lifetime parameters.
+
+    Used when parameters are sampled (e.g. Monte Carlo draws) and no two
+    parameter sets repeat, so caching would only cost memory.
+
+    Args:
+        lifetime_params: LIFETIMES entry whose numeric parameters are
+                         arrays of a common shape
+        max_age: Oldest age needed
+
+    Returns:
+        Array [*param_shape, max_age + 1]
+    """
+    params = {name: np.asarray(value, dtype=float)[..., None]
+              for name, value in distribution_params(lifetime_params).items()}
+    params['distribution'] = distribution_family(lifetime_params)
+    return survival_probability(np.arange(max_age + 1), params)
+
+
+def cache_info():
+    """Hit/miss statistics of the survival curve cache."""
+    return _cached_curve.cache_info()
+
+
+def clear_cache():
+    """Drop all cached survival curves."""
+    _cached_curve.cache_clear()
+
+
+# ============================================================================
+# SURVIVAL TABLE
+# ============================================================================
+
+class SurvivalTable:
+    """
+    Age-to-survival lookup table for a set of building types.
+
+    Rows of `curves` follow `building_types`; columns are ages 0..max_age.
+    """
+
+    def __init__(self, lifetimes: Dict[str, Dict], max_age: int):
+        """
+        Args:
+            lifetimes: Dictionary of lifetime parameters by building type
+            max_age: Oldest age the table must cover
+        """
+        self.lifetimes = lifetimes
+        self.building_types: List[str] = list(lifetimes.keys())
+        self.max_age = max_age
+        self.curves = np.vstack([
+            survival_curve(lifetimes[btype], max_age)
+            for btype in self.building_types
+        ])
+
+    def curve(self, building_type: str) -> np.ndarray:
+        """Survival curve (ages 0..max_age) for one building type."""
+        return self.curves[self.building_types.index(building_type)]
+
+    def lookup(self, ages, building_type: str = None) -> np.ndarray:
+        """
+        Survival probabilities for an array of ages.
+
+        Args:
+            ages: Scalar or array of non-negative integer ages
+            building_type: Restrict to one type; otherwise returns one
+                           row per building type
+
+        Returns:
+            Survival probabilities, shaped like `ages` (or types × ages)
+        """
+        ages = np.asarray(ages, dtype=int)
+        if ages.size and (ages.min() < 0 or ages.max() > self.max_age):
+            raise ValueError(f"Ages must lie in [0, {self.max_age}]")
+        if building_type is not None:
+            return self.curve(building_type)[ages]
+        return self.curves[:, ages]
+
+    def matrix(self, current_year: int, start_year: int) -> pd.DataFrame:
+        """
+        Survival probabilities at `current_year` for every construction year.
+
+        Returns:
+            DataFrame with survival probabilities [year_built × building_type]
+        """
+        years = np.arange(start_year, current_year + 1)
+        survival = self.lookup(current_year - years)
+        df = pd.DataFrame(survival.T, index=years, columns=self.building_types)
+        df.index.name = 'year_built'
+        return df
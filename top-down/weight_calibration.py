@@ -0,0 +1,284 @@
+"""
+Calibration of Hybrid Allocation Weights
+========================================
+
+Fits the proxy weights of each building type to observed state-level
+quantities instead of picking them by hand.
+
+For every year t the state shares of each proxy form a matrix X_t
+[state × proxy] and the state shares of the target form y_t [state]. The
+weights solve the constrained least-squares problem
+
+    min_w Σ_t ||X_t w - y_t||²   subject to  w ≥ 0,  Σ w = 1
+
+by non-negative least squares with the sum-to-one constraint appended as a
+heavily weighted extra row. Leave-one-year-out cross-validation compares
+the out-of-sample error with equal weights, and the fit is only used when
+it clearly beats them (MIN_IMPROVEMENT).
+
+Observed state quantities (by year):
+- housing_units: ACS B25001 (2021-)
+- cement_production: GHGP state cement production (2010-2023)
+- aggregate_production: USGS construction sand and gravel (1971-2023)
+Proxies: ACS housing units and structure mix, building permits and
+population (when the ACS B01003 files are present).
+"""
+
+import warnings
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import nnls
+
+from acs_data import STATE_FIPS, STATE_NAMES, load_housing_units, load_population, load_structure_types
+from cement_data import load_state_production
+from permit_data import load_state_permits
+from spatial_allocation import METHOD_WEIGHTS
+from spatial_proxies import MULTI_FAMILY, SINGLE_FAMILY
+
+AGGREGATE_PRODUCTION_FILE = (Path(__file__).resolve().parent.parent / 'data' / 'production_data'
+                             / 'cleaned_data' / 'sand_production_1971_2023-12082025.csv')
+
+CALIBRATION_PROXIES = ['housing_units', 'single_family_units', 'multi_family_units',
+                       'permits_total', 'population']
+
+# Observed quantity each building type's weights are fitted against. There is
+# no state-level observation of institutional construction, so institutional
+# is deliberately tied to commercial (same target, hence identical weights).
+CALIBRATION_TARGETS = {
+    'residential': 'housing_units',
+    'commercial': 'cement_production',
+    'institutional': 'cement_production',
+    'industrial': 'aggregate_production',
+}
+
+# Proxies that are (parts of) a target and would make the fit trivial
+DERIVED_FROM = {
+    'housing_units': ['housing_units', 'single_family_units', 'multi_family_units'],
+    'cement_production': ['cement_production'],
+    'aggregate_production': ['aggregate_production'],
+}
+
+# Weight of the sum-to-one row relative to the share residuals
+CONSTRAINT_WEIGHT = 1e3
+
+# Fewer candidate proxies than this can't be calibrated (one proxy gets
+# weight 1 by construction); such types get fallback_weights
+MIN_CANDIDATES = 2
+
+# Relative cross-validated improvement over equal weights the fit needs to
+# be used; with only a few years of targets a smaller gain is noise
+MIN_IMPROVEMENT = 0.1
+
+
+# ============================================================================
+# DATA
+# ============================================================================
+
+def calibration_panel() -> pd.DataFrame:
+    """
+    State × year panel of observed targets and proxies.
+
+    Returns:
+        DataFrame with year, state_fips and one column per quantity
+        (NaN where a source doesn't cover a year)
+    """
+    frames = []
+
+    units = load_housing_units()[['year', 'state_fips', 'housing_units']]
+    frames.append(units)
+
+    structures = load_structure_types()
+    structures['single_family_units'] = structures[SINGLE_FAMILY].sum(axis=1)
+    structures['multi_family_units'] = structures[MULTI_FAMILY].sum(axis=1)
+    frames.append(structures[['year', 'state_fips', 'single_family_units', 'multi_family_units']])
+
+    permits = load_state_permits()[['year', 'state_fips', 'permits_total']]
+    frames.append(permits)
+
+    try:
+        population = load_population().rename(columns={'fips': 'state_fips'})
+        frames.append(population)
+    except FileNotFoundError:
+        pass
+
+    cement = load_state_production()
+    cement = pd.DataFrame({'year': cement['year'].astype(int),
+                           'state_fips': cement['state'].astype(str).map(STATE_FIPS),
+                           'cement_production': cement['production_mt']})
+    frames.append(cement.dropna(subset=['state_fips']))
+
+    aggregates = pd.read_csv(AGGREGATE_PRODUCTION_FILE)
+    name_to_fips = {name: STATE_FIPS[code] for code, name in STATE_NAMES.items()}
+    aggregates = pd.DataFrame({'year': aggregates['Year'],
+                               'state_fips': aggregates['State Coverage'].map(name_to_fips),
+                               'aggregate_production': aggregates['Quantity']})
+    frames.append(aggregates.dropna(subset=['state_fips']))
+
+    panel = frames[0]
+    for frame in frames[1:]:
+        frame = frame.astype({'year': int, 'state_fips': int})
+        panel = panel.merge(frame, on=['year', 'state_fips'], how='outer')
+    return panel.sort_values(['year', 'state_fips']).reset_index(drop=True)
+
+
+def _share_blocks(panel: pd.DataFrame, proxies: List[str],
+                  target: str) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Per-year (X_t [state × proxy], y_t [state]) share blocks.
+
+    Only years where the target and every proxy are observed are kept; states
+    missing a value in a kept year count as zero.
+    """
+    blocks = {}
+    for year, group in panel.groupby('year'):
+        values = group[proxies + [target]]
+        if values.isna().all(axis=0).any():
+            continue
+        values = values.fillna(0).to_numpy(dtype=float)
+        totals = values.sum(axis=0)
+        if np.any(totals <= 0):
+            continue
+        shares = values / totals
+        blocks[int(year)] = (shares[:, :-1], shares[:, -1])
+    return blocks
+
+
+# ============================================================================
+# FITTING
+# ============================================================================
+
+def fit_weights(X: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Non-negative, sum-to-one least-squares weights.
+
+    Args:
+        X: Stacked proxy shares [observation × proxy]
+        y: Stacked target shares [observation]
+
+    Returns:
+        Weights [proxy], non-negative and summing to 1
+    """
+    n_proxies = X.shape[1]
+    A = np.vstack([X, np.full((1, n_proxies), CONSTRAINT_WEIGHT)])
+    b = np.append(y, CONSTRAINT_WEIGHT)
+    weights, _ = nnls(A, b)
+    return weights / weights.sum()
+
+
+def _rmse(blocks: Dict, years: List[int], weights: np.ndarray) -> float:
+    """Root mean squared share error over the given years."""
+    residuals = np.concatenate([blocks[year][0] @ weights - blocks[year][1] for year in years])
+    return float(np.sqrt(np.mean(residuals ** 2)))
+
+
+def cross_validate(blocks: Dict) -> Dict[str, float]:
+    """
+    Leave-one-year-out cross-validation of fit_weights.
+
+    Returns:
+        Dictionary with cv_rmse (fitted weights) and equal_rmse (equal
+        weights), both on the held-out years; NaN with fewer than 2 years
+    """
+    years = sorted(blocks)
+    if len(years) < 2:
+        return {'cv_rmse': np.nan, 'equal_rmse': np.nan}
+
+    n_proxies = blocks[years[0]][0].shape[1]
+    equal = np.full(n_proxies, 1.0 / n_proxies)
+    fitted_errors, equal_errors = [], []
+    for held_out in years:
+        train = [year for year in years if year != held_out]
+        weights = fit_weights(np.vstack([blocks[y][0] for y in train]),
+                              np.concatenate([blocks[y][1] for y in train]))
+        fitted_errors.append(_rmse(blocks, [held_out], weights))
+        equal_errors.append(_rmse(blocks, [held_out], equal))
+    return {'cv_rmse': float(np.mean(fitted_errors)), 'equal_rmse': float(np.mean(equal_errors))}
+
+
+def fallback_weights(building_type: str, proxies: List[str]) -> Dict[str, float]:
+    """
+    Weights for a building type that can't be calibrated.
+
+    The hybrid weights when `proxies` has all of them, otherwise equal
+    weights over `proxies`.
+    """
+    hybrid = METHOD_WEIGHTS['hybrid'][building_type]
+    if set(hybrid) <= set(proxies):
+        return dict(hybrid)
+    return {proxy: 1.0 / len(proxies) for proxy in proxies}
+
+
+def calibrate_weights(panel: pd.DataFrame = None,
+                      targets: Dict[str, str] = CALIBRATION_TARGETS,
+                      proxies: List[str] = CALIBRATION_PROXIES) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Fit proxy weights for every building type.
+
+    Candidates are the proxies that the panel observes and that aren't
+    derived from the target. Types left with fewer than MIN_CANDIDATES
+    get fallback_weights, with a warning; types whose cross-validated fit
+    doesn't beat equal weights by MIN_IMPROVEMENT get equal weights over
+    the candidates.
+
+    Args:
+        panel: Output of calibration_panel (loaded if None)
+        targets: Observed quantity to fit for each building type
+        proxies: Proxies the weights may use, e.g. the proxy columns of
+                 the table being allocated
+
+    Returns:
+        (weights [proxy × building_type] with columns summing to 1,
+         diagnostics with one row per building type: target, candidates,
+         status ('fitted', 'equal weights' or 'fallback', noting when a
+         type is tied to another), years, in-sample rmse of the fit,
+         cross-validated rmse, equal-weight rmse and the relative
+         improvement of the fit)
+    """
+    if panel is None:
+        panel = calibration_panel()
+    proxies = list(proxies)
+    weights = pd.DataFrame(0.0, index=proxies, columns=list(targets))
+    diagnostics = []
+    target_types = {}
+
+    for building_type, target in targets.items():
+        candidates = [p for p in proxies
+                      if p in panel and p not in DERIVED_FROM.get(target, [target])]
+        row = {'building_type': building_type, 'target': target,
+               'candidates': ', '.join(candidates), 'status': 'fitted', 'years': '',
+               'rmse': np.nan, 'cv_rmse': np.nan, 'equal_rmse': np.nan, 'improvement': np.nan}
+
+        if len(candidates) < MIN_CANDIDATES:
+            fallback = fallback_weights(building_type, proxies)
+            warnings.warn(f"Only {len(candidates)} candidate proxy for {building_type} "
+                          f"({target}): using {fallback}")
+            weights.loc[list(fallback), building_type] = list(fallback.values())
+            row['status'] = 'fallback'
+            diagnostics.append(row)
+            continue
+
+        blocks = _share_blocks(panel, candidates, target)
+        if not blocks:
+            raise ValueError(f"No year has both {target} and the proxies {candidates}")
+
+        years = sorted(blocks)
+        fitted = fit_weights(np.vstack([blocks[y][0] for y in years]),
+                             np.concatenate([blocks[y][1] for y in years]))
+        scores = cross_validate(blocks)
+        improvement = 1 - scores['cv_rmse'] / scores['equal_rmse']
+        if improvement >= MIN_IMPROVEMENT:
+            weights.loc[candidates, building_type] = fitted
+        else:
+            weights.loc[candidates, building_type] = 1.0 / len(candidates)
+            row['status'] = 'equal weights'
+        if target in target_types:
+            row['status'] += f' (tied to {target_types[target]})'
+        target_types.setdefault(target, building_type)
+        row.update({'years': f'{years[0]}-{years[-1]}', 'rmse': _rmse(blocks, years, fitted),
+                    **scores, 'improvement': improvement})
+        diagnostics.append(row)
+
+    return weights, pd.DataFrame(diagnostics)
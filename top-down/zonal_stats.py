@@ -0,0 +1,243 @@
+"""
+Windowed Zonal Statistics for Raster Proxies
+============================================
+
+Per-unit sums and means of a raster (e.g. VIIRS nighttime lights) without
+loading the raster into memory:
+
+1. The unit polygons are rasterized once onto the raster grid as an int32
+   label raster (pixel centres inside the exterior ring and outside every
+   hole) and cached as a memory-mapped .npy file keyed by a hash of the
+   grid and the polygon coordinates.
+2. The raster and the label raster are read in blocks of rows; each block
+   adds np.bincount sums and counts per label.
+
+Rasters can be GeoTIFFs (read through rasterio, if installed) or .npy arrays
+with a JSON sidecar holding the geotransform, which is also how small
+synthetic rasters are tested:
+
+    <name>.npy
+    <name>.npy.json     {"transform": [x0, dx, 0, y0, 0, -dy], "nodata": -9999}
+
+Geotransforms use the GDAL convention: x = x0 + col × dx, y = y0 + row × (-dy).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from matplotlib.path import Path as MplPath
+
+try:
+    import rasterio
+    from rasterio.windows import Window
+except ImportError:  # GeoTIFF support is optional
+    rasterio = None
+
+BLOCK_ROWS = 512
+CACHE_DIR = Path(__file__).resolve().parent / '.zonal_cache'
+
+# A zone is a list of polygons; a polygon is a list of rings (exterior first,
+# then holes); a ring is an (N × 2) array of x, y coordinates
+Polygon = List[np.ndarray]
+
+
+# ============================================================================
+# RASTER ACCESS
+# ============================================================================
+
+class ArrayRaster:
+    """
+    Raster backed by a (possibly memory-mapped) 2D array.
+    """
+
+    def __init__(self, array: np.ndarray, transform: Sequence[float], nodata: float = None):
+        """
+        Args:
+            array: Raster values [row × col]
+            transform: GDAL geotransform (x0, dx, 0, y0, 0, -dy)
+            nodata: Value to ignore
+        """
+        self.array = array
+        self.shape = array.shape
+        self.transform = tuple(float(v) for v in transform)
+        self.nodata = nodata
+
+    def read(self, row_start: int, row_stop: int) -> np.ndarray:
+        """Rows [row_start, row_stop) as a float array."""
+        return np.asarray(self.array[row_start:row_stop], dtype=float)
+
+
+class RasterioRaster:
+    """
+    GeoTIFF (or any GDAL raster) read band 1 window by window through rasterio.
+    """
+
+    def __init__(self, path: str):
+        self.dataset = rasterio.open(path)
+        self.shape = (self.dataset.height, self.dataset.width)
+        self.transform = tuple(self.dataset.transform.to_gdal())
+        self.nodata = self.dataset.nodata
+
+    def read(self, row_start: int, row_stop: int) -> np.ndarray:
+        window = Window(0, row_start, self.shape[1], row_stop - row_start)
+        return self.dataset.read(1, window=window).astype(float)
+
+
+def open_raster(path: str):
+    """
+    Open a raster for windowed reading.
+
+    .npy files are memory-mapped and need a <path>.json sidecar with the
+    geotransform; anything else is opened with rasterio.
+    """
+    path = Path(path)
+    if path.suffix == '.npy':
+        with open(f'{path}.json', 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return ArrayRaster(np.load(path, mmap_mode='r'), meta['transform'], meta.get('nodata'))
+    if rasterio is None:
+        raise ImportError(f"Reading {path.suffix} rasters requires rasterio")
+    return RasterioRaster(str(path))
+
+
+# ============================================================================
+# ZONE MASKS
+# ============================================================================
+
+def zones_from_geodataframe(gdf, label_column: str) -> Dict[str, List[Polygon]]:
+    """
+    Convert a GeoDataFrame of (multi)polygons to the zone format used here.
+    """
+    zones = {}
+    for label, geometry in zip(gdf[label_column], gdf.geometry):
+        parts = getattr(geometry, 'geoms', [geometry])
+        zones[label] = [[np.asarray(p.exterior.coords)] + [np.asarray(r.coords) for r in p.interiors]
+                        for p in parts]
+    return zones
+
+
+def _mask_key(zones: Dict[str, List[Polygon]], shape: Tuple[int, int],
+              transform: Sequence[float]) -> str:
+    """Hash of the grid and every polygon coordinate."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([list(shape), list(transform)]).encode())
+    for label, polygons in zones.items():
+        digest.update(str(label).encode())
+        for polygon in polygons:
+            for ring in polygon:
+                digest.update(np.ascontiguousarray(ring, dtype=float).tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _rasterize_polygon(polygon: Polygon, shape: Tuple[int, int], transform: Sequence[float],
+                       block_rows: int):
+    """
+    Yield (row_slice, col_slice, inside) blocks for pixel centres inside a polygon.
+    """
+    x0, dx, _, y0, _, dy = transform
+    points = np.vstack(polygon)
+    # Pixel bounding box of the polygon, clipped to the grid
+    cols = (points[:, 0] - x0) / dx
+    rows = (points[:, 1] - y0) / dy
+    c0, c1 = max(int(np.floor(cols.min())), 0), min(int(np.ceil(cols.max())), shape[1])
+    r0, r1 = max(int(np.floor(rows.min())), 0), min(int(np.ceil(rows.max())), shape[0])
+    if c0 >= c1 or r0 >= r1:
+        return
+
+    exterior = MplPath(polygon[0])
+    holes = [MplPath(ring) for ring in polygon[1:]]
+
+    xs = x0 + (np.arange(c0, c1) + 0.5) * dx
+    for start in range(r0, r1, block_rows):
+        stop = min(start + block_rows, r1)
+        ys = y0 + (np.arange(start, stop) + 0.5) * dy
+        grid_x, grid_y = np.meshgrid(xs, ys)
+        centres = np.column_stack([grid_x.ravel(), grid_y.ravel()])
+        inside = exterior.contains_points(centres)
+        for hole in holes:
+            inside &= ~hole.contains_points(centres)
+        yield slice(start, stop), slice(c0, c1), inside.reshape(stop - start, c1 - c0)
+
+
+def zone_mask(zones: Dict[str, List[Polygon]], shape: Tuple[int, int],
+              transform: Sequence[float], cache_dir: Path = CACHE_DIR,
+              block_rows: int = BLOCK_ROWS) -> Tuple[np.ndarray, List[str]]:
+    """
+    Label raster of the zones on a raster grid (cached).
+
+    Pixel value i + 1 marks zone labels[i]; 0 is outside every zone. Where
+    zones overlap the later zone wins.
+
+    Returns:
+        (memory-mapped int32 label raster [row × col], zone labels)
+    """
+    labels = list(zones)
+    key = _mask_key(zones, shape, transform)
+    cache_dir = Path(cache_dir)
+    mask_file = cache_dir / f'mask_{key}.npy'
+    labels_file = cache_dir / f'mask_{key}.json'
+
+    if mask_file.exists() and labels_file.exists():
+        with open(labels_file, 'r', encoding='utf-8') as f:
+            return np.load(mask_file, mmap_mode='r'), json.load(f)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    mask = np.lib.format.open_memmap(mask_file, mode='w+', dtype=np.int32, shape=tuple(shape))
+    mask[:] = 0
+    for i, label in enumerate(labels):
+        for polygon in zones[label]:
+            for rows, cols, inside in _rasterize_polygon(polygon, shape, transform, block_rows):
+                block = mask[rows, cols]
+                block[inside] = i + 1
+    mask.flush()
+    del mask
+
+    with open(labels_file, 'w', encoding='utf-8') as f:
+        json.dump([str(label) if not isinstance(label, (int, float)) else label
+                   for label in labels], f)
+    return np.load(mask_file, mmap_mode='r'), labels
+
+
+# ============================================================================
+# ZONAL STATISTICS
+# ============================================================================
+
+def zonal_stats(raster, zones: Dict[str, List[Polygon]], block_rows: int = BLOCK_ROWS,
+                cache_dir: Path = CACHE_DIR) -> pd.DataFrame:
+    """
+    Sum, count and mean of raster values per zone, read block by block.
+
+    Args:
+        raster: Path (see open_raster) or an opened raster
+        zones: {label: [polygon, ...]} in the raster's coordinate system
+        block_rows: Raster rows per block (bounds memory use)
+        cache_dir: Where zone masks are cached
+
+    Returns:
+        DataFrame indexed by zone label with columns sum, count, mean
+    """
+    if isinstance(raster, (str, Path)):
+        raster = open_raster(raster)
+    mask, labels = zone_mask(zones, raster.shape, raster.transform, cache_dir, block_rows)
+
+    n_labels = len(labels) + 1
+    sums = np.zeros(n_labels)
+    counts = np.zeros(n_labels)
+    for start in range(0, raster.shape[0], block_rows):
+        stop = min(start + block_rows, raster.shape[0])
+        values = raster.read(start, stop)
+        zone_ids = np.asarray(mask[start:stop])
+        valid = np.isfinite(values)
+        if raster.nodata is not None:
+            valid &= values != raster.nodata
+        sums += np.bincount(zone_ids[valid], weights=values[valid], minlength=n_labels)
+        counts += np.bincount(zone_ids[valid], minlength=n_labels)
+
+    df = pd.DataFrame({'sum': sums[1:], 'count': counts[1:].astype(int)}, index=labels)
+    df['mean'] = np.divide(df['sum'], df['count'], out=np.full(len(df), np.nan),
+                           where=df['count'] > 0)
+    return df